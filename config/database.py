@@ -1,22 +1,95 @@
 # Responsável por: criar engine, sessão, base do SQLAlchemy, schemas e tabelas
 
+from functools import lru_cache
 from sqlalchemy import create_engine, text # Biblioteca para se comunicar com meu Banco de Dados Postgre SQL
 from sqlalchemy.orm import declarative_base, sessionmaker
-from config.settings import database_url 
+from config.settings import obter_configuracoes, obter_database_url
+from core.json_compacto import carregar_json, serializar_json
 
 
 # =====================================================
 # 1. CONFIGURAÇÃO DO BANCO DE DADOS
 # =====================================================
+# Engine e sessão são criados na primeira utilização (obter_engine / Session())
+# → importar modelos ou transformadores não conecta nem valida o .env
 
-# Cria o engine e a sessão do banco de dados
-engine = create_engine(database_url)
-Session = sessionmaker(bind=engine)
+def criar_engine(url=None, **opcoes):
+    """
+    Cria o engine do PostgreSQL com pool e execução em lote configurados pelo .env
+
+    - Pool: pool_size/max_overflow para extratores e transformadores concorrentes,
+      pool_pre_ping e pool_recycle contra conexões derrubadas pelo servidor
+    - psycopg2: executemany_mode="values_plus_batch" → INSERTs em lote viram
+      INSERT ... VALUES com várias linhas (bulk_insert_mappings, to_sql) e
+      UPDATE/DELETE em lote usam execute_batch
+    - statement_timeout (ms) opcional, aplicado em cada conexão
+    - JSON/JSONB: orjson quando instalado; JSON já serializado (JsonBruto) vai direto
+
+    Args:
+        url: URL de conexão (padrão: obter_database_url())
+        **opcoes: Sobrescrevem qualquer parâmetro do create_engine
+
+    Returns:
+        Engine: Engine do SQLAlchemy
+    """
+    configuracoes = obter_configuracoes()
+
+    connect_args = {}
+    if configuracoes.db_statement_timeout_ms > 0:
+        connect_args["options"] = f"-c statement_timeout={configuracoes.db_statement_timeout_ms}"
+
+    parametros = {
+        "pool_size": configuracoes.db_pool_size,
+        "max_overflow": configuracoes.db_max_overflow,
+        "pool_timeout": configuracoes.db_pool_timeout,
+        "pool_recycle": configuracoes.db_pool_recycle,
+        "pool_pre_ping": configuracoes.db_pool_pre_ping,
+        "executemany_mode": "values_plus_batch",
+        "insertmanyvalues_page_size": configuracoes.db_insertmanyvalues_page_size,
+        "executemany_batch_page_size": configuracoes.db_executemany_batch_page_size,
+        "connect_args": connect_args,
+        "json_serializer": serializar_json,
+        "json_deserializer": carregar_json,
+    }
+    parametros.update(opcoes)
+
+    return create_engine(url or obter_database_url(), **parametros)
+
+
+@lru_cache(maxsize=None)
+def obter_engine():
+    """
+    Retorna o engine compartilhado do projeto (criado na primeira chamada)
+    """
+    return criar_engine()
+
+
+@lru_cache(maxsize=None)
+def _obter_fabrica_sessoes():
+    return sessionmaker(bind=obter_engine())
+
+
+def Session():
+    """
+    Abre uma nova sessão ligada ao engine compartilhado
 
-# Cria a base para os modelos SQLAlchemy
+    Mantém o uso antigo (`session = Session()`) sem criar o engine no import
+    """
+    return _obter_fabrica_sessoes()()
+
+
+# Cria a base para os modelos SQLAlchemy (não depende do engine)
 Base = declarative_base()
 
-print("Modelo de dados definido !")
+
+def __getattr__(nome):
+    """
+    Mantém funcionando `from config.database import engine` (criado só quando acessado)
+    """
+    if nome == "engine":
+        return obter_engine()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
 # =====================================================
 # 2. FUNÇÕES AUXILIARES - Criando schemas
@@ -28,7 +101,7 @@ def create_schema_raw():
     Schema RAW: Armazena dados brutos extraídos da API Bling
     """
     print("Criando schema raw...")
-    with engine.connect() as conn:
+    with obter_engine().connect() as conn:
         conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw"))
         conn.commit()
     print("✅ Schema 'raw' criado/verificado com sucesso!")
@@ -40,7 +113,7 @@ def create_schema_processed():
     Schema PROCESSED: Armazena dados transformados e estruturados (Data Warehouse)
     """
     print("Criando schema processed...")
-    with engine.connect() as conn:
+    with obter_engine().connect() as conn:
         conn.execute(text("CREATE SCHEMA IF NOT EXISTS processed"))
         conn.commit()
     print("✅ Schema 'processed' criado/verificado com sucesso!")
@@ -80,7 +153,7 @@ def create_all_tables():
     from models.contact_raw import ContatoRaw
     from models.product_raw import ProdutoRaw
     from models.sales_raw import VendasRaw
-    from models.stocks_raw import EstoqueRaw
+    from models.stocks_raw import EstoqueRaw, EstoqueExecucaoRaw
     from models.situation_raw import SituacoesRaw
     from models.channels_raw import CanaisRaw
     
@@ -89,6 +162,7 @@ def create_all_tables():
     print("   ✓ ProdutoRaw")
     print("   ✓ VendasRaw")
     print("   ✓ EstoqueRaw")
+    print("   ✓ EstoqueExecucaoRaw")
     print("   ✓ SituacoesRaw")
     print("   ✓ CanaisRaw")
 
@@ -116,12 +190,21 @@ def create_all_tables():
     
     from models.dim_fato.fato_pedidos import FatoPedidos 
     from models.dim_fato.fato_itens_pedidos import FatoItensPedidos
-    #from models.dim_fato.fato_estoques import FatoEstoques
+    from models.dim_fato.fato_estoques import FatoEstoques
     
     print("   ✓ FatoPedidos")
     print("   ✓ FatoItensPedidos")
     print("   ✓ FatoEstoques")
 
+    print("\n📊 MODELOS PROCESSED - AGREGADOS:")
+
+    from models.dim_fato.agregados_vendas import AggVendasCanalDia, AggVendasProdutoDia, AggVendasSituacaoDia, AggDatasPendentes
+
+    print("   ✓ AggVendasCanalDia")
+    print("   ✓ AggVendasProdutoDia")
+    print("   ✓ AggVendasSituacaoDia")
+    print("   ✓ AggDatasPendentes")
+
     # =====================================================
     # 3.4. CRIAÇÃO DAS TABELAS
     # =====================================================
@@ -134,6 +217,7 @@ def create_all_tables():
     print("   • raw.produtos_raw") 
     print("   • raw.vendas_raw")
     print("   • raw.estoque_raw")
+    print("   • raw.estoque_execucoes")
     print("   • raw.situacoes_raw") 
     print("   • raw.canais_raw") 
     
@@ -145,15 +229,66 @@ def create_all_tables():
     print("   • processed.fato_pedidos")
     print("   • processed.fato_itens_pedidos")
     print("   • processed.fato_estoques")
+    print("   • processed.agg_vendas_canal_dia")
+    print("   • processed.agg_vendas_marca_categoria_dia")
+    print("   • processed.agg_vendas_situacao_dia")
+    print("   • processed.agg_datas_pendentes")
     
     # Cria todas as tabelas de uma vez
-    Base.metadata.create_all(engine)
+    Base.metadata.create_all(obter_engine())
+
+    # create_all não altera tabelas existentes → adicionar colunas novas manualmente
+    adicionar_colunas_novas()
+
+    # Funções SQL usadas pelos motores de transformação no banco
+    criar_funcoes_sql()
     
     print("\n" + "=" * 60)
     print("✅ Todas as tabelas foram criadas com sucesso!")
     print("=" * 60 + "\n")
 
 
+def adicionar_colunas_novas():
+    """
+    Adiciona colunas criadas depois da primeira versão das tabelas
+    (Base.metadata.create_all só cria tabelas que não existem)
+    """
+    colunas_novas = [
+        ("raw.vendas_raw", "hash_resumo", "VARCHAR(32)"),
+        ("raw.vendas_raw", "hash_resumo_detalhado", "VARCHAR(32)"),
+        ("processed.fato_pedidos", "hash_itens", "VARCHAR(32)"),
+    ]
+
+    with obter_engine().connect() as conn:
+        for tabela, coluna, tipo in colunas_novas:
+            conn.execute(text(f"ALTER TABLE {tabela} ADD COLUMN IF NOT EXISTS {coluna} {tipo}"))
+        conn.commit()
+
+    print(f"   ✓ {len(colunas_novas)} colunas novas verificadas")
+
+
+def criar_funcoes_sql():
+    """
+    Cria (ou atualiza) as funções SQL auxiliares do schema processed
+    - processed.try_cast_date(texto): converte para DATE ou devolve NULL se inválido
+      (equivalente ao pd.to_datetime(errors="coerce") dos transformadores)
+    """
+    with obter_engine().connect() as conn:
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION processed.try_cast_date(valor text)
+            RETURNS date AS $$
+            BEGIN
+                RETURN valor::date;
+            EXCEPTION WHEN others THEN
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE
+        """))
+        conn.commit()
+
+    print("   ✓ Funções SQL verificadas")
+
+
 # =====================================================
 # 4. FUNÇÃO AUXILIAR - Verificar estrutura do banco
 # =====================================================
@@ -166,7 +301,7 @@ def verificar_estrutura_banco():
     print("\n🔍 VERIFICANDO ESTRUTURA DO BANCO")
     print("=" * 60)
     
-    with engine.connect() as conn:
+    with obter_engine().connect() as conn:
         # Verificar schemas
         print("\n📂 SCHEMAS EXISTENTES:")
         result = conn.execute(text("""
@@ -1,58 +1,163 @@
 # Responsável por: carregar .env, validar variáveis, configurar API
+# Nada é lido/validado no import: tudo é carregado na primeira chamada dos acessores
+# (obter_configuracoes, obter_database_url, obter_headers) e fica em cache
 
 import os # Esse modulo é usado para interagir com o sistema operacional
+from functools import lru_cache
+from types import SimpleNamespace
 from dotenv import load_dotenv # Biblioteca para carregar as variáveis de ambiente
 
 # =====================================================
 # 1. CONFIGURAÇÃO DE AMBIENTE
 # =====================================================
 
-print("Carregando configurações...")
+@lru_cache(maxsize=None)
+def carregar_ambiente():
+    """
+    Carrega as variáveis do arquivo .env (uma única vez por processo)
+    """
+    load_dotenv()
 
-# Carregando as variáveis de ambiente do arquivo .env
-load_dotenv()
-postgres_username = os.getenv("postgres_username")
-postgres_password = os.getenv("postgres_password")
-postgres_host = os.getenv("postgres_host")
-postgres_port = os.getenv("postgres_port")
-postgres_database = os.getenv("postgres_database")
 
-# Configurando a API_KEY BLING
-access_token = os.getenv("API_KEY")
+@lru_cache(maxsize=None)
+def obter_configuracoes():
+    """
+    Lê as opções do pipeline (com valores padrão) na primeira chamada
 
-# Validação das variáveis
-if not all([postgres_username, postgres_password, postgres_host, postgres_port, postgres_database]):
-    raise Exception("Variáveis do PostgreSQL não encontradas no .env")
+    Não exige credenciais → pode ser usada por scripts que não acessam o Bling
+    nem o banco (ex: main_time.py, testes)
 
-if not access_token:
-    raise Exception("API_KEY não encontrada no .env")
+    Returns:
+        SimpleNamespace: Opções acessíveis como atributos (ex: obter_configuracoes().motor_transformacao)
+    """
+    carregar_ambiente()
 
-# Construção da URL do banco
-database_url = (
-    f"postgresql://{postgres_username}:{postgres_password}"
-    f"@{postgres_host}:{postgres_port}/{postgres_database}"
-)
+    return SimpleNamespace(
+        # Validade (em segundos) dos mapeamentos de lookup em memória (core/lookup_cache.py)
+        lookup_cache_ttl=int(os.getenv("LOOKUP_CACHE_TTL", "900")),
 
-print(f"Configurações carregadas")
-print(f"Banco: {postgres_host}:{postgres_port}/{postgres_database}")
+        # Onde resolver as chaves substitutas (cliente_id, produto_id) dos fatos:
+        # "python" → mapa em memória + Series.map | "sql" → staging no banco + JOIN no merge
+        resolucao_chaves=os.getenv("RESOLUCAO_CHAVES", "python").lower(),
+
+        # Como explodir o array de itens dos pedidos (transform/items_dw.py):
+        # "python" → loop por pedido/item | "pandas" → explode + json_normalize | "sql" → jsonb_to_recordset no banco
+        explosao_itens=os.getenv("EXPLOSAO_ITENS", "pandas").lower(),
+
+        # Como gravar fato_itens_pedidos:
+        # "substituir" → apaga e reinsere os itens dos pedidos cujo array de itens mudou | "inserir_novos" → só insere itens inéditos
+        estrategia_itens=os.getenv("ESTRATEGIA_ITENS", "substituir").lower(),
+
+        # Motor das transformações de fatos (transform/sales_dw.py e transform/items_dw.py):
+        # "pandas" → transforma no Python | "sql" → INSERT ... SELECT direto no banco (nada trafega para o cliente)
+        motor_transformacao=os.getenv("MOTOR_TRANSFORMACAO", "pandas").lower(),
+
+        # Incluir saldos de estoque (/estoques/saldos → fato_estoques) no pipeline completo
+        # Só faz sentido na conta Bling que controla estoque
+        extrair_estoques=os.getenv("EXTRAIR_ESTOQUES", "false").lower() == "true",
+
+        # Extração paginada guarda cada registro como ID + JSON em bytes (core/json_compacto.py)
+        # em vez de dicts → menos memória em cargas grandes (produtos, vendas)
+        registros_compactos=os.getenv("REGISTROS_COMPACTOS", "false").lower() == "true",
+
+        # Engine do banco (config/database.py → criar_engine):
+        # pool dimensionado para extratores/transformadores concorrentes + helpers de batch do psycopg2
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", "10")),                      # Conexões mantidas abertas no pool
+        db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),                # Conexões extras em picos
+        db_pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),                # Segundos esperando conexão livre
+        db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),              # Recicla conexões antigas (segundos)
+        db_pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",  # Testa a conexão antes de usar
+        db_insertmanyvalues_page_size=int(os.getenv("DB_INSERTMANYVALUES_PAGE_SIZE", "1000")),  # Linhas por INSERT ... VALUES
+        db_executemany_batch_page_size=int(os.getenv("DB_EXECUTEMANY_BATCH_PAGE_SIZE", "500")),  # UPDATE/DELETE por execute_batch
+        db_statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0")),  # 0 → sem limite
+    )
+
+
+@lru_cache(maxsize=None)
+def obter_database_url():
+    """
+    Valida as variáveis do PostgreSQL e monta a URL do banco (primeira chamada)
+
+    Returns:
+        str: URL de conexão do SQLAlchemy
+    """
+    carregar_ambiente()
+
+    postgres_username = os.getenv("postgres_username")
+    postgres_password = os.getenv("postgres_password")
+    postgres_host = os.getenv("postgres_host")
+    postgres_port = os.getenv("postgres_port")
+    postgres_database = os.getenv("postgres_database")
+
+    # Validação das variáveis
+    if not all([postgres_username, postgres_password, postgres_host, postgres_port, postgres_database]):
+        raise Exception("Variáveis do PostgreSQL não encontradas no .env")
+
+    print(f"Banco: {postgres_host}:{postgres_port}/{postgres_database}")
+
+    # Construção da URL do banco
+    return (
+        f"postgresql://{postgres_username}:{postgres_password}"
+        f"@{postgres_host}:{postgres_port}/{postgres_database}"
+    )
+
+
+@lru_cache(maxsize=None)
+def obter_headers():
+    """
+    Valida a API_KEY do Bling e monta os headers das requisições (primeira chamada)
+
+    Returns:
+        dict: Headers da API Bling
+    """
+    carregar_ambiente()
+
+    # Configurando a API_KEY BLING
+    access_token = os.getenv("API_KEY")
+
+    if not access_token:
+        raise Exception("API_KEY não encontrada no .env")
+
+    # Definindo os headers da requisição (Segundo a documentação da API)
+    return {
+        "Authorization": f"Bearer {access_token}",  # Token OAuth obtido no fluxo
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
 
 # =====================================================
 # 2. CONFIGURAÇÃO DA API BLING - TODOS OS ENDPOINTS
 # =====================================================
 
-# Definindo os headers da requisição (Segundo a documentação da API)
-headers = {
-    "Authorization": f"Bearer {access_token}",  # Token OAuth obtido no fluxo
-    "Content-Type": "application/json",
-    "Accept": "application/json",
-}
-
 # URLs de todos os endpoints da API Bling
 endpoints = {
     'contatos': 'https://api.bling.com.br/Api/v3/contatos',
     'produtos': 'https://api.bling.com.br/Api/v3/produtos', 
     'vendas': 'https://api.bling.com.br/Api/v3/pedidos/vendas',
     'estoque': 'https://api.bling.com.br/Api/v3/estoques',
+    'estoque_saldos': 'https://api.bling.com.br/Api/v3/estoques/saldos',
     'situacoes': 'https://api.bling.com.br/Api/v3/situacoes/modulos',
     'canais': 'https://api.bling.com.br/Api/v3/canais-venda'
-}
\ No newline at end of file
+}
+
+# =====================================================
+# 3. COMPATIBILIDADE COM O ACESSO ANTIGO (config.settings.<nome>)
+# =====================================================
+
+def __getattr__(nome):
+    """
+    Mantém funcionando `from config.settings import headers, database_url, motor_transformacao...`
+    O valor só é carregado quando o atributo é acessado
+    """
+    if nome.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    if nome == "headers":
+        return obter_headers()
+    if nome == "database_url":
+        return obter_database_url()
+
+    configuracoes = obter_configuracoes()
+    if hasattr(configuracoes, nome):
+        return getattr(configuracoes, nome)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
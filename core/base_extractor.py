@@ -1,11 +1,15 @@
 # Responsável por: lógica comum de extração, retry, paginação, comparação JSON
 
+import hashlib
+import json
 import requests
 import time
 from datetime import datetime
+from sqlalchemy import text
 from sqlalchemy.dialects.postgresql import insert
-from config.settings import headers
+from config.settings import obter_configuracoes, obter_headers
 from config.database import Session
+from core.json_compacto import RegistroCompacto, decodificar_registros
 
 # =======================================================
 # 1. FUNÇÃO DE COMPARAÇÃO DE JSON - VERSÃO FINAL
@@ -77,6 +81,17 @@ def comparar_jsons(json1, json2):
         # Em caso de erro, assume que são diferentes
         return True
 
+
+def calcular_hash_json(dados):
+    """
+    Calcula um hash estável (md5) do JSON
+    Chaves ordenadas → o mesmo conteúdo sempre gera o mesmo hash
+
+    Usado como sinal de mudança: se o hash do resumo mudou, o registro mudou
+    """
+    serializado = json.dumps(dados, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.md5(serializado.encode('utf-8')).hexdigest()
+
 # =======================================================
 # 2. CLASSE BASE PARA EXTRATORES
 # =======================================================
@@ -86,6 +101,16 @@ class BaseExtractor:
     Classe base que contém toda a lógica comum de extração
     Outros extractors vão herdar desta classe e só mudar o que é específico
     """
+
+    # Se True, o UPDATE mescla o JSON novo sobre o existente (dados_json || novo)
+    # em vez de sobrescrever. Preserva campos que só vêm do endpoint de detalhes (ex: itens)
+    mesclar_json_existente = False
+
+    # Parâmetro de filtro por lista de IDs do endpoint de listagem (ex: 'idsContatos[]')
+    parametro_ids = None
+
+    # Registros comparados por lote: sem hash, só os JSONs existentes do lote ficam em memória
+    tamanho_lote_comparacao = 1000
     
     def __init__(self, base_url, model_class):
         """
@@ -95,14 +120,15 @@ class BaseExtractor:
             model_class: Classe do modelo SQLAlchemy (ex: ContatoRaw)
         """
         self.base_url = base_url 
-        self.headers = headers
+        self.headers = obter_headers()
         self.model_class = model_class
+        self.registros_compactos = obter_configuracoes().registros_compactos
 
 # =======================================================
 # 3. FUNÇÃO DE EXTRAÇÃO DOS DADOS (COM RETRY E PARADA)
 # =======================================================  
 
-    def extract_dados_bling_paginado(self, limite_por_pagina=100, delay_entre_requests=0.35, max_paginas=1000, max_tentativas=3):
+    def extract_dados_bling_paginado(self, limite_por_pagina=100, delay_entre_requests=0.35, max_paginas=1000, max_tentativas=3, compacto=False):
         """
         Extrai todos os dados de qualquer endpoint da API Bling usando paginação
         PARA COMPLETAMENTE se não conseguir obter uma página após 3 tentativas
@@ -112,9 +138,12 @@ class BaseExtractor:
             delay_entre_requests (float): Tempo de espera entre requests em segundos
             max_paginas (int): Limite máximo de páginas para evitar loops infinitos
             max_tentativas (int): Número de tentativas por página antes de parar tudo
+            compacto (bool): Se True, cada registro vira um RegistroCompacto (ID + JSON em bytes)
+                em vez de um dict → pico de memória bem menor em extrações grandes
 
         Returns:
             list: Lista com todos os dados de cada endpoint extraídos
+                (dicts, ou RegistroCompacto se compacto=True)
         """
         todos_registros = []
         pagina_atual = 1
@@ -156,7 +185,11 @@ class BaseExtractor:
                             print("INTERROMPENDO EXTRAÇÃO para evitar perda de dados")
                             raise Exception(f"Falha HTTP {response.status_code} após {max_tentativas} tentativas")
 
-                    dados = response.json()
+                    if compacto:
+                        registros_pagina, dados = decodificar_registros(response.content)
+                    else:
+                        dados = response.json()
+                        registros_pagina = dados.get("data", [])
                     sucesso = True
                     break
 
@@ -199,16 +232,15 @@ class BaseExtractor:
                 print(f"Total de páginas: {total_paginas}")
                 print(f"Total de registros: {total_registros}")
 
-            registros_pagina = dados.get("data", [])
-            
             if not registros_pagina:
                 print(f"Página {pagina_atual} vazia. Finalizando extração.")
                 break
 
             registros_novos = 0
             for registro in registros_pagina:
-                if registro['id'] not in registros_unicos:
-                    registros_unicos.add(registro['id'])
+                id_registro = registro.bling_id if compacto else registro['id']
+                if id_registro not in registros_unicos:
+                    registros_unicos.add(id_registro)
                     todos_registros.append(registro)
                     registros_novos += 1
 
@@ -231,6 +263,78 @@ class BaseExtractor:
         print(f"Páginas processadas: {pagina_atual - 1}")
         return todos_registros   
 
+# =======================================================
+# 3.1. BUSCA EM LOTE POR LISTA DE IDs (idsContatos[], idsProdutos[]...)
+# =======================================================
+
+    def extrair_por_ids(self, ids, parametro_ids=None, tamanho_lote=100, delay_entre_requests=0.35, max_tentativas=3):
+        """
+        Busca registros específicos pelo endpoint de LISTAGEM, vários IDs por requisição
+        Ex: GET /contatos?idsContatos[]=1&idsContatos[]=2...
+
+        Uma requisição traz até `tamanho_lote` registros, em vez de 1 GET por ID no endpoint de detalhes.
+        Só traz os campos da listagem (campos exclusivos do detalhe exigem GET /{id}).
+
+        Args:
+            ids: IDs dos registros no Bling
+            parametro_ids: Nome do parâmetro de filtro (padrão: self.parametro_ids)
+            tamanho_lote (int): IDs por requisição (máx 100 - limite da página)
+            delay_entre_requests (float): Tempo de espera entre requests em segundos
+            max_tentativas (int): Número de tentativas por lote
+
+        Returns:
+            list: Registros encontrados (IDs inexistentes simplesmente não voltam)
+        """
+        parametro_ids = parametro_ids or self.parametro_ids
+        if not parametro_ids:
+            raise ValueError(f"{type(self).__name__} não define parametro_ids para busca em lote")
+
+        ids = list(dict.fromkeys(ids))  # Remove duplicados mantendo a ordem
+        registros = []
+
+        if not ids:
+            return registros
+
+        total_lotes = (len(ids) + tamanho_lote - 1) // tamanho_lote
+        print(f"Buscando {len(ids)} registros em {total_lotes} lotes de até {tamanho_lote} IDs...")
+
+        for numero_lote, inicio in enumerate(range(0, len(ids), tamanho_lote), 1):
+            lote = ids[inicio:inicio + tamanho_lote]
+            params = {
+                parametro_ids: lote,
+                "limite": tamanho_lote,
+                "pagina": 1
+            }
+
+            for tentativa in range(max_tentativas):
+                try:
+                    response = requests.get(
+                        self.base_url,
+                        headers=self.headers,
+                        params=params,
+                        timeout=30
+                    )
+
+                    if response.status_code == 200:
+                        registros.extend(response.json().get("data", []))
+                        break
+
+                    print(f"Erro HTTP {response.status_code} no lote {numero_lote}/{total_lotes} (tentativa {tentativa + 1}/{max_tentativas})")
+
+                except requests.exceptions.RequestException as e:
+                    print(f"Erro de conexão no lote {numero_lote}/{total_lotes} (tentativa {tentativa + 1}/{max_tentativas}): {e}")
+
+                if tentativa < max_tentativas - 1:
+                    time.sleep(delay_entre_requests * (2 ** tentativa))
+                else:
+                    raise Exception(f"Falha ao buscar lote {numero_lote}/{total_lotes} após {max_tentativas} tentativas")
+
+            if numero_lote < total_lotes and delay_entre_requests > 0:
+                time.sleep(delay_entre_requests)
+
+        print(f"✅ {len(registros)}/{len(ids)} registros encontrados em {total_lotes} requisições")
+        return registros
+
 # =============================================================
 # 4. FUNÇÃO PARA SALVAR NO POSTGRES (COMPARAR ANTES DE SALVAR)
 # =============================================================
@@ -241,6 +345,14 @@ class BaseExtractor:
         - Novos registros: INSERT
         - Registros existentes idênticos: SKIP
         - Registros existentes diferentes: UPDATE
+
+        Modelos com coluna hash_resumo (ex: VendasRaw) comparam apenas o hash
+        do JSON, sem carregar os JSONs existentes. Registros antigos sem hash
+        caem na comparação completa uma única vez e recebem o hash.
+        Sem hash, os JSONs existentes são carregados por lote (tamanho_lote_comparacao).
+
+        lista_dados aceita dicts {'bling_id', 'dados_json'} ou RegistroCompacto:
+        o JSON compacto só é decodificado durante a comparação e vai em bytes para o JSONB.
         """
         if not lista_dados:
             print("Nenhum dado para salvar.")
@@ -253,56 +365,110 @@ class BaseExtractor:
             print(f"🔍 Buscando registros existentes para comparação...")
             inicio_busca = datetime.now()
 
-            # Buscar TODOS os registros existentes com seus JSONs
+            usa_hash = hasattr(self.model_class, 'hash_resumo')
+
+            # Com hash: buscar apenas bling_id + hash (JSON só dos registros antigos sem hash)
+            # Sem hash: JSONs existentes buscados por lote, durante a comparação
             registros_existentes = {}
-            existing_records = session.query(
-                self.model_class.bling_id,
-                self.model_class.dados_json
-            ).all()
+            jsons_sem_hash = {}
+
+            if usa_hash:
+                existing_records = session.query(
+                    self.model_class.bling_id,
+                    self.model_class.hash_resumo
+                ).all()
 
-            for record in existing_records:
-                registros_existentes[record.bling_id] = record.dados_json
+                for record in existing_records:
+                    registros_existentes[record.bling_id] = record.hash_resumo
+
+                registros_sem_hash = session.query(
+                    self.model_class.bling_id,
+                    self.model_class.dados_json
+                ).filter(self.model_class.hash_resumo.is_(None)).all()
+
+                for record in registros_sem_hash:
+                    jsons_sem_hash[record.bling_id] = record.dados_json
             
             fim_busca = datetime.now()
-            print(f"📋 {len(registros_existentes)} registros existentes carregados em {fim_busca - inicio_busca}")
+            if usa_hash:
+                print(f"📋 {len(registros_existentes)} registros existentes carregados em {fim_busca - inicio_busca}")
+            else:
+                print(f"📋 JSONs existentes serão carregados por lote de {self.tamanho_lote_comparacao} durante a comparação")
 
             # Classificar os dados
             registros_novos = []
             registros_para_atualizar = []
+            registros_para_backfill = []
             
             print(f"🔍 Comparando {len(lista_dados)} registros...")
             inicio_comparacao = datetime.now()
             
-            for i, dados in enumerate(lista_dados):
-                bling_id = dados['bling_id']
-                novo_json = dados['dados_json']
+            for inicio_lote in range(0, len(lista_dados), self.tamanho_lote_comparacao):
+                lote = lista_dados[inicio_lote:inicio_lote + self.tamanho_lote_comparacao]
+
+                if not usa_hash:
+                    # Sem hash: JSONs existentes só dos IDs deste lote (memória limitada ao lote)
+                    registros_existentes = dict(session.query(
+                        self.model_class.bling_id,
+                        self.model_class.dados_json
+                    ).filter(self.model_class.bling_id.in_([self._id_registro(d) for d in lote])).all())
+
+                for i, dados in enumerate(lote, inicio_lote):
+                    if isinstance(dados, RegistroCompacto):
+                        # Decodificado só para comparar/calcular o hash; grava-se os bytes
+                        bling_id = dados.bling_id
+                        novo_json = dados.dados()
+                        dados = {'bling_id': bling_id, 'dados_json': dados.json_bytes}
+                    else:
+                        bling_id = dados['bling_id']
+                        novo_json = dados['dados_json']
+                    hash_novo = calcular_hash_json(novo_json) if usa_hash else None
                 
-                if (i + 1) % 1000 == 0:
-                    print(f"Processados {i + 1}/{len(lista_dados)} registros...")
+                    if (i + 1) % 1000 == 0:
+                        print(f"Processados {i + 1}/{len(lista_dados)} registros...")
                 
-                if bling_id not in registros_existentes:
-                    # Registro novo → INSERT
-                    registros_novos.append({
-                        'bling_id': bling_id,
-                        'dados_json': novo_json,
-                        'data_ingestao': datetime.now(),
-                        'status_processamento': 'pendente'
-                    })
-                    stats["inseridos"] += 1
-                    
-                else:
-                    # Registro existe → comparar conteúdo
-                    json_existente = registros_existentes[bling_id]
+                    if bling_id not in registros_existentes:
+                        # Registro novo → INSERT
+                        registro_novo = {
+                            'bling_id': bling_id,
+                            'dados_json': dados['dados_json'],
+                            'data_ingestao': datetime.now(),
+                            'status_processamento': 'pendente'
+                        }
+                        if usa_hash:
+                            registro_novo['hash_resumo'] = hash_novo
+                        registros_novos.append(registro_novo)
+                        stats["inseridos"] += 1
+
+                    elif usa_hash and registros_existentes[bling_id] is not None:
+                        # Registro existe com hash → comparar só o hash
+                        if registros_existentes[bling_id] != hash_novo:
+                            registros_para_atualizar.append({**dados, 'hash_resumo': hash_novo})
+                            stats["atualizados"] += 1
+                        else:
+                            stats["ignorados"] += 1
                     
-                    # USAR A FUNÇÃO OTIMIZADA (compara apenas campos comuns)
-                    if comparar_jsons(json_existente, novo_json):
-                        # Conteúdo diferente → UPDATE
-                        registros_para_atualizar.append(dados)
-                        stats["atualizados"] += 1
                     else:
-                        # Conteúdo idêntico → SKIP
-                        stats["ignorados"] += 1
-            
+                        # Registro existe → comparar conteúdo
+                        json_existente = jsons_sem_hash[bling_id] if usa_hash else registros_existentes[bling_id]
+                    
+                        # USAR A FUNÇÃO OTIMIZADA (compara apenas campos comuns)
+                        if comparar_jsons(json_existente, novo_json):
+                            # Conteúdo diferente → UPDATE
+                            if usa_hash:
+                                dados = {**dados, 'hash_resumo': hash_novo}
+                            registros_para_atualizar.append(dados)
+                            stats["atualizados"] += 1
+                        else:
+                            # Conteúdo idêntico → SKIP (mas grava o hash para as próximas execuções)
+                            if usa_hash:
+                                registros_para_backfill.append({
+                                    'bling_id': bling_id,
+                                    'hash_resumo': hash_novo,
+                                    'detalhado': self._json_ja_detalhado(json_existente)
+                                })
+                            stats["ignorados"] += 1
+
             fim_comparacao = datetime.now()
             print(f"✅ Comparação concluída em {fim_comparacao - inicio_comparacao}")
             
@@ -329,20 +495,34 @@ class BaseExtractor:
                     if (i + 1) % 100 == 0:
                         print(f"Atualizados {i + 1}/{len(registros_para_atualizar)} registros...")
                     
-                    stmt = insert(self.model_class).values(
-                        bling_id=dados['bling_id'],
-                        dados_json=dados['dados_json'],
-                        data_ingestao=datetime.now(),
-                        status_processamento='pendente'
-                    )
+                    valores = {
+                        'bling_id': dados['bling_id'],
+                        'dados_json': dados['dados_json'],
+                        'data_ingestao': datetime.now(),
+                        'status_processamento': 'pendente'
+                    }
+                    if usa_hash:
+                        valores['hash_resumo'] = dados['hash_resumo']
+
+                    stmt = insert(self.model_class).values(**valores)
+
+                    if self.mesclar_json_existente:
+                        # Mescla o resumo sobre o JSON existente (mantém itens e demais campos de detalhe)
+                        novo_json = self.model_class.__table__.c.dados_json.op('||')(stmt.excluded.dados_json)
+                    else:
+                        novo_json = stmt.excluded.dados_json
+
+                    set_ = {
+                        'dados_json': novo_json,
+                        'data_ingestao': stmt.excluded.data_ingestao,
+                        'status_processamento': 'pendente'
+                    }
+                    if usa_hash:
+                        set_['hash_resumo'] = stmt.excluded.hash_resumo
                     
                     stmt = stmt.on_conflict_do_update(
                         index_elements=['bling_id'],
-                        set_={
-                            'dados_json': stmt.excluded.dados_json, 
-                            'data_ingestao': stmt.excluded.data_ingestao,
-                            'status_processamento': 'pendente'
-                        }
+                        set_=set_
                     )
                     
                     session.execute(stmt)
@@ -350,6 +530,17 @@ class BaseExtractor:
                 fim_update = datetime.now()
                 print(f"✅ Atualizações concluídas em {fim_update - inicio_update}")
 
+            # BACKFILL DE HASH (registros antigos idênticos, sem reescrever o JSON)
+            if registros_para_backfill:
+                print(f"\n🔑 Gravando hash de {len(registros_para_backfill)} registros antigos...")
+                tabela = self.model_class.__table__.fullname
+                session.execute(text(f"""
+                    UPDATE {tabela}
+                    SET hash_resumo = :hash_resumo,
+                        hash_resumo_detalhado = CASE WHEN :detalhado THEN :hash_resumo ELSE hash_resumo_detalhado END
+                    WHERE bling_id = :bling_id
+                """), registros_para_backfill)
+
             if not registros_novos and not registros_para_atualizar:
                 print(f"\n✨ Nenhum registro novo ou alterado! Banco já está atualizado.")
 
@@ -372,4 +563,20 @@ class BaseExtractor:
             print(f"❌ Erro ao salvar dados: {e}")
             raise
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    def _id_registro(self, dados):
+        """
+        bling_id de um item de lista_dados (dict ou RegistroCompacto)
+        """
+        if isinstance(dados, RegistroCompacto):
+            return dados.bling_id
+        return dados['bling_id']
+
+    def _json_ja_detalhado(self, dados_json):
+        """
+        Indica se o JSON salvo já contém os dados do endpoint de detalhes
+        Usado no backfill do hash: registros já detalhados não precisam ser buscados de novo
+        Extratores com endpoint de detalhes (ex: vendas) sobrescrevem este método
+        """
+        return False
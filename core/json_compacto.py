@@ -0,0 +1,91 @@
+# Responsável por: decodificar/serializar JSON (orjson quando instalado) e manter registros
+# extraídos da API em forma compacta (bytes do JSON + ID), reduzindo o pico de memória
+
+import json
+
+try:
+    import orjson  # Opcional: decodifica/serializa bem mais rápido que o json da biblioteca padrão
+except ImportError:
+    orjson = None
+
+# =======================================================
+# 1. DECODIFICAR / SERIALIZAR
+# =======================================================
+
+def carregar_json(conteudo):
+    """
+    Decodifica JSON a partir de bytes ou str (orjson se disponível)
+    """
+    if orjson is not None:
+        if isinstance(conteudo, bytes) and type(conteudo) is not bytes:
+            conteudo = memoryview(conteudo)  # orjson não aceita subclasses de bytes (JsonBruto); sem cópia
+        return orjson.loads(conteudo)
+    return json.loads(conteudo)
+
+
+def serializar_bytes(dados):
+    """
+    Serializa para bytes UTF-8 compactos (orjson se disponível)
+    """
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return json.dumps(dados, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class JsonBruto(bytes):
+    """
+    JSON já serializado → vai para a coluna JSONB sem ser decodificado de novo
+    (reconhecido por serializar_json, o json_serializer do engine)
+    """
+    __slots__ = ()
+
+
+def serializar_json(valor):
+    """
+    json_serializer do engine (config/database.py):
+    JsonBruto passa direto; demais valores seguem o json.dumps padrão do SQLAlchemy
+    """
+    if isinstance(valor, JsonBruto):
+        return valor.decode('utf-8')
+    return json.dumps(valor)
+
+# =======================================================
+# 2. REGISTRO COMPACTO
+# =======================================================
+
+class RegistroCompacto:
+    """
+    Registro extraído da API guardado como (bling_id, JSON em bytes)
+    Sem __dict__ por instância e sem a árvore de dicts/strings do JSON decodificado;
+    o conteúdo só é decodificado quando necessário (comparação, hash)
+    """
+    __slots__ = ("bling_id", "json_bytes")
+
+    def __init__(self, bling_id, json_bytes):
+        self.bling_id = bling_id
+        self.json_bytes = JsonBruto(json_bytes)
+
+    def dados(self):
+        """Decodifica o JSON completo (sob demanda, não fica guardado)"""
+        return carregar_json(self.json_bytes)
+
+
+def decodificar_registros(conteudo, campo_id='id'):
+    """
+    Decodifica a resposta de uma página da API ({"data": [...]}) em registros compactos
+    O dict de cada registro existe só durante esta função: fica guardado apenas o ID
+    e o JSON reserializado em bytes
+
+    Args:
+        conteudo: Corpo da resposta (bytes)
+        campo_id: Campo usado como bling_id
+
+    Returns:
+        tuple: (lista de RegistroCompacto, dict da resposta sem a chave "data")
+    """
+    resposta = carregar_json(conteudo)
+    registros = [
+        RegistroCompacto(registro[campo_id], serializar_bytes(registro))
+        for registro in resposta.pop("data", None) or []
+    ]
+    return registros, resposta
@@ -0,0 +1,154 @@
+# Responsável por: manter em memória os mapeamentos de lookup (ID Bling → valor) compartilhados entre transformadores
+
+import threading
+import time
+from sqlalchemy import text
+from config.database import Session
+from config.settings import obter_configuracoes
+
+# =======================================================
+# 1. CACHE DE LOOKUP COM TTL E ATUALIZAÇÃO INCREMENTAL
+# =======================================================
+
+class CacheLookup:
+    """
+    Cache de um mapeamento {chave: valor} lido de uma tabela do banco
+
+    Estratégia:
+    1. Primeira chamada (ou após invalidar): carga completa da tabela
+    2. TTL expirado ou marcado como desatualizado: busca apenas as linhas com
+       coluna_versao >= última versão vista (atualização incremental)
+    3. Dentro do TTL: devolve o mapa em memória, sem tocar no banco
+    """
+
+    def __init__(self, nome, tabela, coluna_chave, coluna_valor, coluna_versao, ttl_segundos=None):
+        """
+        Args:
+            nome: Nome usado nos logs (ex: "situações")
+            tabela: Tabela qualificada com schema (ex: "raw.situacoes_raw")
+            coluna_chave: Coluna usada como chave do mapa (ex: "bling_situacao_id")
+            coluna_valor: Coluna usada como valor do mapa (ex: "nome")
+            coluna_versao: Coluna de data usada na atualização incremental (ex: "data_ingestao")
+            ttl_segundos: Tempo de validade do mapa em memória (padrão: LOOKUP_CACHE_TTL)
+        """
+        self.nome = nome
+        self.tabela = tabela
+        self.coluna_chave = coluna_chave
+        self.coluna_valor = coluna_valor
+        self.coluna_versao = coluna_versao
+        self._ttl_segundos = ttl_segundos
+
+        self._lock = threading.Lock()
+        self._mapa = None
+        self._ultima_versao = None
+        self._carregado_em = 0.0
+        self._desatualizado = False
+
+    def obter(self):
+        """
+        Retorna o mapeamento {chave: valor}, recarregando do banco apenas o necessário
+        """
+        with self._lock:
+            if self._mapa is None:
+                self._carregar_completo()
+            elif self._desatualizado or self._expirado():
+                self._atualizar_incremental()
+
+            return self._mapa
+
+    def invalidar(self):
+        """
+        Descarta o mapa em memória → próxima chamada faz carga completa
+        """
+        with self._lock:
+            self._mapa = None
+            self._ultima_versao = None
+            self._desatualizado = False
+
+    def marcar_desatualizado(self):
+        """
+        Sinaliza que a tabela de origem mudou → próxima chamada faz atualização incremental
+        """
+        with self._lock:
+            self._desatualizado = True
+
+    @property
+    def ttl_segundos(self):
+        """TTL informado no construtor ou, se omitido, LOOKUP_CACHE_TTL (lido só quando usado)"""
+        if self._ttl_segundos is None:
+            return obter_configuracoes().lookup_cache_ttl
+        return self._ttl_segundos
+
+    def _expirado(self):
+        return time.monotonic() - self._carregado_em > self.ttl_segundos
+
+    def _buscar_linhas(self, desde=None):
+        """
+        Busca (chave, valor, versão) na tabela de origem, opcionalmente a partir de uma versão
+        """
+        query = f"""
+            SELECT {self.coluna_chave} AS chave,
+                   {self.coluna_valor} AS valor,
+                   {self.coluna_versao} AS versao
+            FROM {self.tabela}
+        """
+        parametros = {}
+
+        if desde is not None:
+            # >= (e não >) para não perder linhas gravadas no mesmo instante da última versão vista
+            query += f" WHERE {self.coluna_versao} >= :desde"
+            parametros["desde"] = desde
+
+        session = Session()
+
+        try:
+            return session.execute(text(query), parametros).fetchall()
+        finally:
+            session.close()
+
+    def _registrar_linhas(self, linhas):
+        for linha in linhas:
+            self._mapa[linha.chave] = linha.valor
+
+            if linha.versao is not None and (self._ultima_versao is None or linha.versao > self._ultima_versao):
+                self._ultima_versao = linha.versao
+
+        self._carregado_em = time.monotonic()
+        self._desatualizado = False
+
+    def _carregar_completo(self):
+        linhas = self._buscar_linhas()
+
+        self._mapa = {}
+        self._ultima_versao = None
+        self._registrar_linhas(linhas)
+
+        print(f"📋 {len(self._mapa)} {self.nome} carregados para mapeamento")
+
+    def _atualizar_incremental(self):
+        if self._ultima_versao is None:
+            self._carregar_completo()
+            return
+
+        linhas = self._buscar_linhas(desde=self._ultima_versao)
+        self._registrar_linhas(linhas)
+
+        print(f"📋 Mapeamento de {self.nome} atualizado: {len(linhas)} registros relidos ({len(self._mapa)} no total)")
+
+
+# =======================================================
+# 2. CACHES COMPARTILHADOS DO PIPELINE
+# =======================================================
+
+cache_situacoes = CacheLookup("situações", "raw.situacoes_raw", "bling_situacao_id", "nome", "data_ingestao")
+cache_canais = CacheLookup("canais", "raw.canais_raw", "bling_canal_id", "descricao", "data_ingestao")
+cache_contatos = CacheLookup("clientes", "processed.dim_contatos", "bling_cliente_id", "cliente_id", "data_processamento")
+cache_produtos = CacheLookup("produtos", "processed.dim_produtos", "bling_produto_id", "produto_id", "data_processamento")
+
+
+def invalidar_todos():
+    """
+    Descarta todos os mapeamentos em memória (usado no início de cada execução do pipeline)
+    """
+    for cache in (cache_situacoes, cache_canais, cache_contatos, cache_produtos):
+        cache.invalidar()
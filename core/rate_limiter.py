@@ -0,0 +1,74 @@
+# Responsável por: limitar a taxa de requisições à API Bling e executar buscas concorrentes
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# =======================================================
+# 1. LIMITADOR DE TAXA COMPARTILHADO
+# =======================================================
+
+class RateLimiter:
+    """
+    Limitador de taxa thread-safe
+    Garante um intervalo mínimo entre requisições, mesmo com várias threads buscando ao mesmo tempo
+    """
+
+    def __init__(self, requisicoes_por_segundo=3):
+        """
+        Args:
+            requisicoes_por_segundo: Limite de requisições por segundo (API Bling: 3 req/s)
+        """
+        self.intervalo = 1.0 / requisicoes_por_segundo
+        self._lock = threading.Lock()
+        self._proxima_liberacao = time.monotonic()
+
+    def aguardar(self):
+        """
+        Bloqueia até a próxima "vaga" de requisição
+        Cada chamada reserva o próximo horário livre e dorme fora do lock
+        """
+        with self._lock:
+            agora = time.monotonic()
+            horario = max(agora, self._proxima_liberacao)
+            self._proxima_liberacao = horario + self.intervalo
+
+        espera = horario - agora
+        if espera > 0:
+            time.sleep(espera)
+
+
+# Limitador único para TODOS os extratores do processo (o limite da API é por conta, não por endpoint)
+limitador_bling = RateLimiter(requisicoes_por_segundo=3)
+
+# =======================================================
+# 2. BUSCA CONCORRENTE SOB O LIMITADOR
+# =======================================================
+
+def buscar_em_paralelo(funcao_busca, itens, max_workers=4, limitador=limitador_bling):
+    """
+    Executa funcao_busca(item) em várias threads, respeitando o limitador de taxa
+    Entrega os resultados conforme ficam prontos (não espera todos terminarem)
+
+    Args:
+        funcao_busca: Função que recebe um item (ex: ID) e retorna o resultado da API
+        itens: Itens a buscar
+        max_workers: Número de threads de busca
+        limitador: RateLimiter compartilhado
+
+    Yields:
+        tuple: (item, resultado) na ordem de conclusão
+    """
+    def _buscar(item):
+        limitador.aguardar()
+        return funcao_busca(item)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futuros = {executor.submit(_buscar, item): item for item in itens}
+
+    try:
+        for futuro in as_completed(futuros):
+            yield futuros[futuro], futuro.result()
+    finally:
+        # Se o consumidor parar no meio (erro, Ctrl+C), cancela o que ainda não começou
+        executor.shutdown(wait=True, cancel_futures=True)
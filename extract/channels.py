@@ -3,9 +3,11 @@
 import requests
 import time
 from datetime import datetime
-from config.settings import headers
+from config.settings import obter_headers
 from config.database import Session
 from config.settings import endpoints
+from core.rate_limiter import buscar_em_paralelo
+from core.lookup_cache import cache_canais
 from models.channels_raw import CanaisRaw
 from sqlalchemy import text
 from sqlalchemy.dialects.postgresql import insert
@@ -19,18 +21,21 @@ class CanaisExtractor:
     Extrator de canais de venda baseado nos IDs encontrados nos pedidos
     
     Estratégia:
-    1. Busca IDs únicos de canal na tabela vendas_raw
-    2. Para cada ID, busca detalhes na API: /canais-venda/{id}
-    3. Salva no banco
+    1. Busca IDs únicos de canal na tabela vendas_raw que ainda não estão
+       em canais_raw (ou que estão desatualizados)
+    2. Busca os detalhes na API em paralelo: /canais-venda/{id} (sob o limitador de taxa)
+    3. Salva todos no banco com um único UPSERT
     """
     
     def __init__(self):
         self.base_url = endpoints["canais"]
-        self.headers = headers
+        self.headers = obter_headers()
     
-    def obter_canais_dos_pedidos(self):
+    def obter_canais_dos_pedidos(self, dias_validade=7):
         """
-        Busca IDs únicos de canal na tabela vendas_raw
+        Busca IDs únicos de canal na tabela vendas_raw que precisam ser buscados:
+        - Não existem em canais_raw
+        - Ou foram ingeridos há mais de `dias_validade` dias
         """
         print("\n🔍 BUSCANDO IDs DE CANAIS NOS PEDIDOS...")
         print("=" * 70)
@@ -40,16 +45,20 @@ class CanaisExtractor:
         try:
             # Query para buscar loja.id únicos do JSON
             query = text("""
-                SELECT DISTINCT (dados_json->'loja'->>'id')::integer as canal_id
-                FROM raw.vendas_raw
-                WHERE dados_json->'loja'->>'id' IS NOT NULL
+                SELECT DISTINCT (vr.dados_json->'loja'->>'id')::integer as canal_id
+                FROM raw.vendas_raw vr
+                LEFT JOIN raw.canais_raw cr
+                    ON cr.bling_canal_id = (vr.dados_json->'loja'->>'id')::integer
+                WHERE vr.dados_json->'loja'->>'id' IS NOT NULL
+                  AND (cr.bling_canal_id IS NULL
+                       OR cr.data_ingestao < NOW() - make_interval(days => :dias_validade))
                 ORDER BY canal_id
             """)
             
-            resultado = session.execute(query)
+            resultado = session.execute(query, {"dias_validade": dias_validade})
             canais_ids = [row.canal_id for row in resultado]
             
-            print(f"✅ {len(canais_ids)} canais únicos encontrados nos pedidos")
+            print(f"✅ {len(canais_ids)} canais novos ou desatualizados encontrados nos pedidos")
             print(f"IDs: {canais_ids}")
             
             return canais_ids
@@ -97,26 +106,32 @@ class CanaisExtractor:
         
         return None
     
-    def salvar_canal(self, canal_data):
+    def salvar_canais(self, lista_canais):
         """
-        Salva um canal no banco usando UPSERT
+        Salva vários canais no banco com um único UPSERT (1 statement, 1 commit)
+
+        Returns:
+            int: Quantidade de canais salvos
         """
-        if not canal_data:
-            return False
+        if not lista_canais:
+            return 0
         
         session = Session()
         
         try:
-            canal_id = canal_data.get('id')
-            descricao = canal_data.get('descricao', 'Sem descrição')
+            agora = datetime.now()
+            registros = [
+                {
+                    'bling_canal_id': canal_data.get('id'),
+                    'descricao': canal_data.get('descricao', 'Sem descrição'),
+                    'dados_json': canal_data,
+                    'data_ingestao': agora
+                }
+                for canal_data in lista_canais
+            ]
             
             # UPSERT: Insert ou Update se já existir
-            stmt = insert(CanaisRaw).values(
-                bling_canal_id=canal_id,
-                descricao=descricao,
-                dados_json=canal_data,
-                data_ingestao=datetime.now()
-            )
+            stmt = insert(CanaisRaw).values(registros)
             
             stmt = stmt.on_conflict_do_update(
                 index_elements=['bling_canal_id'],
@@ -130,12 +145,12 @@ class CanaisExtractor:
             session.execute(stmt)
             session.commit()
             
-            return True
+            return len(registros)
             
         except Exception as e:
             session.rollback()
-            print(f"   ✗ Erro ao salvar canal {canal_data.get('id')}: {e}")
-            return False
+            print(f"   ✗ Erro ao salvar canais: {e}")
+            return 0
         finally:
             session.close()
     
@@ -155,35 +170,31 @@ class CanaisExtractor:
             canais_ids = self.obter_canais_dos_pedidos()
             
             if not canais_ids:
-                print("\n❌ Nenhum ID de canal encontrado nos pedidos.")
-                print("💡 Execute primeiro a extração de vendas (main_sales.py)")
+                print("\n✅ Nenhum canal novo ou desatualizado nos pedidos.")
+                print("💡 Se a tabela de vendas estiver vazia, execute primeiro a extração de vendas (main_sales.py)")
                 return
             
-            # 2. Buscar detalhes de cada canal
+            # 2. Buscar detalhes de cada canal (em paralelo, sob o limitador de taxa)
             print(f"\n💾 BUSCANDO DETALHES DE {len(canais_ids)} CANAIS...")
             print("-" * 70)
             
             stats = {'sucesso': 0, 'erro': 0, 'nao_encontrado': 0}
+            canais_encontrados = []
             
-            for i, canal_id in enumerate(canais_ids, 1):
-                print(f"\n[{i}/{len(canais_ids)}] Canal ID: {canal_id}")
-                
-                # Buscar detalhes
-                detalhes = self.buscar_detalhes_canal(canal_id)
-                
+            for canal_id, detalhes in buscar_em_paralelo(self.buscar_detalhes_canal, canais_ids):
                 if detalhes:
-                    # Salvar no banco
-                    if self.salvar_canal(detalhes):
-                        descricao = detalhes.get('descricao', 'Sem descrição')
-                        print(f"   ✓ {canal_id}: {descricao}")
-                        stats['sucesso'] += 1
-                    else:
-                        stats['erro'] += 1
+                    descricao = detalhes.get('descricao', 'Sem descrição')
+                    print(f"   ✓ {canal_id}: {descricao}")
+                    canais_encontrados.append(detalhes)
                 else:
                     stats['nao_encontrado'] += 1
-                
-                # Delay entre requisições
-                time.sleep(0.4)
+            
+            # 3. Salvar todos de uma vez
+            salvos = self.salvar_canais(canais_encontrados)
+            if salvos:
+                cache_canais.marcar_desatualizado()
+            stats['sucesso'] = salvos
+            stats['erro'] = len(canais_encontrados) - salvos
             
             fim = datetime.now()
             tempo_total = fim - inicio
@@ -215,26 +226,15 @@ class CanaisExtractor:
 def obter_mapeamento_canais():
     """
     Retorna dicionário {id: descricao} para lookup rápido
+    Usa o cache compartilhado (core/lookup_cache.py): só relê o banco quando necessário
     
     Uso na transformação:
         mapa = obter_mapeamento_canais()
         df['canal_nome'] = df['canal_id'].map(mapa)
     """
-    session = Session()
-    
     try:
-        canais = session.query(
-            CanaisRaw.bling_canal_id,
-            CanaisRaw.descricao
-        ).all()
-        
-        mapa = {canal.bling_canal_id: canal.descricao for canal in canais}
-        
-        print(f"📋 {len(mapa)} canais carregados para mapeamento")
-        return mapa
+        return cache_canais.obter()
         
     except Exception as e:
         print(f"❌ Erro ao carregar mapeamento: {e}")
         return {}
-    finally:
-        session.close()
\ No newline at end of file
@@ -1,13 +1,14 @@
 # Responsável por: extrair contatos completos - INSERIR APENAS NOVOS (SEM COMPARAÇÃO)
 
 from datetime import datetime
-import time
 import requests
 from core.base_extractor import BaseExtractor
+from core.rate_limiter import buscar_em_paralelo
 from models.contact_raw import ContatoRaw
-from config.settings import endpoints, headers
+from config.settings import endpoints, obter_headers
 from config.database import Session
 from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
 
 # =============================================================
 # 1. CRIANDO A CLASSE PARA EXTRAÇÃO DE CLIENTES + ENDEREÇOS
@@ -19,9 +20,33 @@ class ContatosCompletoExtractor(BaseExtractor):
     SEM comparação de dados existentes
     MUDANÇA: Não usa salvar_dados_postgres_bulk() igual os contatos e vendas.
     """
+
+    parametro_ids = 'idsContatos[]'
+
+    # Campos que SÓ existem no GET /contatos/{id} (a listagem não traz) - bling-openapi.json
+    CAMPOS_SOMENTE_DETALHE = {
+        'fantasia', 'tipo', 'indicadorIe', 'ie', 'rg', 'inscricaoMunicipal',
+        'orgaoEmissor', 'email', 'endereco', 'vendedor', 'dadosAdicionais',
+        'financeiro', 'pais', 'tiposContato', 'pessoasContato'
+    }
+
+    # Campos usados pela dim_contatos (transform/contacts_dw.py)
+    CAMPOS_NECESSARIOS = {'nome', 'numeroDocumento', 'telefone', 'tipo', 'endereco'}
     
-    def __init__(self):
+    def __init__(self, campos_necessarios=None):
+        """
+        Args:
+            campos_necessarios: Campos do contato que precisam ser coletados.
+                Se nenhum for exclusivo do detalhe, o GET por contato é dispensado.
+        """
         super().__init__(endpoints['contatos'], ContatoRaw)
+        self.campos_necessarios = set(campos_necessarios or self.CAMPOS_NECESSARIOS)
+
+    def _precisa_detalhe(self):
+        """
+        Retorna os campos necessários que só o endpoint de detalhes fornece
+        """
+        return self.campos_necessarios & self.CAMPOS_SOMENTE_DETALHE
     
     def executar_extracao_completa(self):
         """
@@ -68,35 +93,26 @@ class ContatosCompletoExtractor(BaseExtractor):
             
             print(f"✅ {len(contatos_novos)} contatos novos identificados em {fim_filtro - inicio_filtro}")
             
-            # ETAPA 3: Buscar detalhes apenas dos novos
-            print(f"\n3️⃣ BUSCANDO DETALHES DOS NOVOS CONTATOS...")
+            # ETAPA 3+4: Buscar detalhes e salvar em pipeline (salva conforme os detalhes chegam)
+            print(f"\n3️⃣ BUSCANDO DETALHES E SALVANDO NOVOS CONTATOS (PIPELINE)...")
             inicio_detalhes = datetime.now()
             
-            contatos_completos = self._buscar_detalhes_otimizado(contatos_novos)
+            # ⚡ FUNÇÃO OTIMIZADA - NÃO USA salvar_dados_postgres_bulk()
+            stats = self._enriquecer_e_salvar(contatos_novos)
             
             fim_detalhes = datetime.now()
             tempo_detalhes = fim_detalhes - inicio_detalhes
-            
-            print(f"✅ Detalhes coletados em {tempo_detalhes}")
-            
-            # ETAPA 4: Salvar apenas novos (SEM COMPARAÇÃO - DIRETO)
-            print(f"\n4️⃣ SALVANDO NOVOS CONTATOS (INSERT DIRETO)...")
-            inicio_salvamento = datetime.now()
-            
-            # ⚡ FUNÇÃO OTIMIZADA - NÃO USA salvar_dados_postgres_bulk()
-            stats = self._salvar_novos_direto(contatos_completos)
-            
-            fim_salvamento = datetime.now()
             fim_total = datetime.now()
             
+            print(f"✅ Detalhes coletados e salvos em {tempo_detalhes}")
+            
             # RELATÓRIO FINAL
             print(f"\n🎉 EXTRAÇÃO CONCLUÍDA COM SUCESSO!")
             print(f"=" * 60)
             print(f"\n⏱️  TEMPOS:")
             print(f"   • Extração da API: {tempo_lista}")
             print(f"   • Filtro de novos: {fim_filtro - inicio_filtro}")
-            print(f"   • Busca detalhes: {tempo_detalhes}")
-            print(f"   • Salvamento: {fim_salvamento - inicio_salvamento}")
+            print(f"   • Busca detalhes + salvamento: {tempo_detalhes}")
             print(f"   • TOTAL: {fim_total - inicio_total}")
             
             print(f"\n📊 ESTATÍSTICAS GERAIS:")
@@ -106,6 +122,7 @@ class ContatosCompletoExtractor(BaseExtractor):
             
             print(f"\n💾 OPERAÇÕES NO BANCO:")
             print(f"   • Inseridos com sucesso: {stats['inseridos']}")
+            print(f"   • Ignorados (já existiam): {stats['ignorados']}")
             print(f"   • Erros durante inserção: {stats['erros']}")
             
             print(f"\n📈 RESUMO DO BANCO:")
@@ -114,7 +131,7 @@ class ContatosCompletoExtractor(BaseExtractor):
             print(f"   • Total de contatos no banco agora: {total_no_banco}")
             
             # Estatísticas de endereços
-            self._calcular_estatisticas_enderecos(contatos_completos, len(contatos_novos))
+            self._calcular_estatisticas_enderecos(stats['com_endereco'], len(contatos_novos))
             
             # Resumo de economia
             economia_operacoes = len(lista_contatos) - len(contatos_novos)
@@ -173,106 +190,201 @@ class ContatosCompletoExtractor(BaseExtractor):
         finally:
             session.close()
     
-    def _salvar_novos_direto(self, contatos_completos):
+    def _salvar_novos_direto(self, contatos_completos, tamanho_lote=1000):
         """
         NOVA FUNÇÃO OTIMIZADA: Salva direto sem comparação
         
         - Sem SELECT de registros existentes
         - Sem comparação de JSON  
-        - Apenas INSERT direto
-        - Commits em lote para performance
+        - INSERT ... ON CONFLICT DO NOTHING em lotes grandes (1 statement por lote, sem ORM)
+        - Contagem exata: RETURNING devolve só os que foram realmente inseridos
         
         Args:
             contatos_completos: Lista de contatos processados
+            tamanho_lote: Registros por INSERT/commit
             
         Returns:
-            dict: Estatísticas de inserção
+            dict: Estatísticas de inserção (inseridos, ignorados por já existirem, erros)
         """
+        stats = {'inseridos': 0, 'ignorados': 0, 'erros': 0}
+
         if not contatos_completos:
-            return {'inseridos': 0, 'erros': 0}
+            return stats
         
         session = Session()
-        stats = {'inseridos': 0, 'erros': 0}
         
         try:
             print(f"   💾 Preparando {len(contatos_completos)} registros para inserção...")
             
-            for i, contato in enumerate(contatos_completos):
+            for inicio in range(0, len(contatos_completos), tamanho_lote):
+                lote = contatos_completos[inicio:inicio + tamanho_lote]
+                agora = datetime.now()
+
+                registros = [
+                    {
+                        'bling_id': contato['id'],
+                        'dados_json': contato,
+                        'data_ingestao': agora,
+                        'status_processamento': 'pendente'
+                    }
+                    for contato in lote
+                ]
+
+                stmt = (
+                    insert(ContatoRaw)
+                    .values(registros)
+                    .on_conflict_do_nothing(index_elements=['bling_id'])
+                    .returning(ContatoRaw.bling_id)
+                )
+
                 try:
-                    # Cria objeto diretamente (sem verificações)
-                    novo_registro = ContatoRaw(
-                        bling_id=contato['id'],
-                        dados_json=contato,
-                        data_ingestao=datetime.now(),
-                        status_processamento='pendente'
-                    )
-                    
-                    session.add(novo_registro)
-                    stats['inseridos'] += 1
-                    
-                    # Commit em lotes de 100 para performance
-                    if (i + 1) % 100 == 0:
-                        session.commit()
-                        print(f"   ✅ {i + 1}/{len(contatos_completos)} registros inseridos...")
-                    
+                    inseridos = len(session.execute(stmt).fetchall())
+                    session.commit()
+
+                    stats['inseridos'] += inseridos
+                    stats['ignorados'] += len(lote) - inseridos
+                    print(f"   ✅ {inicio + len(lote)}/{len(contatos_completos)} registros processados ({inseridos} inseridos)...")
+
                 except Exception as e:
+                    # Só o lote com problema é descartado - e contado como erro, não como inserido
                     session.rollback()
-                    stats['erros'] += 1
-                    erro_msg = str(e)
-                    
-                    # Log apenas se não for duplicata (que seria estranho aqui)
-                    if "duplicate key" not in erro_msg and "already exists" not in erro_msg:
-                        print(f"   ❌ Erro no contato {contato.get('id')}: {erro_msg[:100]}")
-            
-            # Commit final para registros restantes
-            session.commit()
-            print(f"   ✅ Commit final realizado")
+                    stats['erros'] += len(lote)
+                    print(f"   ❌ Erro no lote {inicio + 1}-{inicio + len(lote)}: {str(e)[:100]}")
             
-        except Exception as e:
-            session.rollback()
-            print(f"❌ Erro crítico no salvamento: {e}")
-            raise
         finally:
             session.close()
         
         return stats
     
-    def _buscar_detalhes_otimizado(self, lista_contatos):
+    def _enriquecer_e_salvar(self, lista_contatos, tamanho_lote=100, max_workers=4):
+        """
+        Pipeline produtor/consumidor:
+        1. Busca: detalhes buscados em paralelo (threads) sob o limitador de taxa compartilhado
+        2. Processamento: cada contato é estruturado assim que o detalhe chega
+        3. Inserção: commit a cada `tamanho_lote` contatos prontos (não espera a busca terminar)
+
+        Args:
+            lista_contatos: Lista de contatos básicos
+            tamanho_lote: Contatos por lote de inserção
+            max_workers: Threads de busca
+
+        Returns:
+            dict: Estatísticas de inserção + contatos com endereço
+        """
+        stats = {'inseridos': 0, 'ignorados': 0, 'erros': 0, 'com_endereco': 0}
+        lote = []
+
+        def _salvar_lote():
+            stats_lote = self._salvar_novos_direto(lote)
+            for chave, valor in stats_lote.items():
+                stats[chave] = stats.get(chave, 0) + valor
+            lote.clear()
+
+        for contato in self._buscar_detalhes_otimizado(lista_contatos, max_workers=max_workers):
+            lote.append(contato)
+
+            if contato.get('endereco_estruturado', {}).get('tem_endereco', False):
+                stats['com_endereco'] += 1
+
+            if len(lote) >= tamanho_lote:
+                _salvar_lote()
+
+        if lote:
+            _salvar_lote()
+
+        return stats
+
+    def _buscar_detalhes_otimizado(self, lista_contatos, max_workers=4):
         """
         Busca detalhes completos dos contatos (incluindo endereços)
-        com delay otimizado entre requisições
+        em paralelo, respeitando o limitador de taxa compartilhado
         
         Args:
             lista_contatos: Lista de contatos básicos
+            max_workers: Threads de busca
             
-        Returns:
-            list: Contatos com detalhes completos e endereços estruturados
+        Yields:
+            dict: Contatos com detalhes completos e endereços estruturados (na ordem de chegada)
         """
-        contatos_completos = []
         total = len(lista_contatos)
+
+        campos_detalhe = self._precisa_detalhe()
+        if not campos_detalhe:
+            print(f"   ⚡ Nenhum campo exclusivo do detalhe é necessário - usando dados da listagem")
+            yield from lista_contatos
+            return
         
-        print(f"   📡 Buscando detalhes de {total} contatos...")
+        print(f"   📡 Buscando detalhes de {total} contatos (campos só do detalhe: {', '.join(sorted(campos_detalhe))})...")
+        print(f"   ⚙️  {max_workers} threads de busca")
+
+        contatos_por_id = {contato['id']: contato for contato in lista_contatos}
         
-        for i, contato in enumerate(lista_contatos):
+        for i, (contato_id, detalhes) in enumerate(
+            buscar_em_paralelo(self._buscar_detalhes_contato, list(contatos_por_id), max_workers=max_workers), 1
+        ):
             # Progresso a cada 50 contatos
-            if (i + 1) % 50 == 0:
-                print(f"   Processando {i + 1}/{total}...")
-            
-            # Busca detalhes do contato
-            detalhes = self._buscar_detalhes_contato(contato['id'])
+            if i % 50 == 0:
+                print(f"   Processando {i}/{total}...")
             
             if detalhes:
                 # Processa e estrutura o endereço
-                processado = self._processar_contato_detalhado(detalhes)
-                contatos_completos.append(processado)
-            else:
+                yield self._processar_contato_detalhado(detalhes)
+            elif len(contatos_por_id[contato_id]) > 1:
                 # Se não conseguir detalhes, usa dados básicos
-                contatos_completos.append(contato)
-            
-            # Delay pequeno para não estourar rate limit
-            time.sleep(0.05)
-        
-        return contatos_completos
+                yield contatos_por_id[contato_id]
+            else:
+                # Só o ID (sem dados da listagem) → não salva; fica para a próxima execução
+                print(f"   ⚠️  Detalhe do contato {contato_id} indisponível - será buscado na próxima execução")
+
+    def extrair_contatos_por_ids(self, ids_contatos):
+        """
+        Extrai contatos específicos que ainda não estão no banco
+        - Algum campo necessário só existe no detalhe → GET /contatos/{id} direto
+          (a listagem por IDs não acrescentaria nada: o detalhe seria buscado de qualquer forma)
+        - Caso contrário → GET /contatos?idsContatos[]=... (até 100 contatos por requisição)
+
+        Args:
+            ids_contatos: IDs dos contatos no Bling (já sabidamente ausentes de raw.contatos_raw)
+
+        Returns:
+            dict: Estatísticas de inserção
+        """
+        if self._precisa_detalhe():
+            contatos_novos = [{'id': contato_id} for contato_id in ids_contatos]
+        else:
+            contatos = self.extrair_por_ids(ids_contatos)
+            contatos_novos = self._filtrar_apenas_novos(contatos)
+
+        return self._enriquecer_e_salvar(contatos_novos)
+
+    def extrair_contatos_das_vendas(self):
+        """
+        Extrai contatos que aparecem em raw.vendas_raw mas ainda não estão em raw.contatos_raw
+        (ex: cliente novo cadastrado junto com o pedido, depois da extração de contatos)
+        """
+        session = Session()
+
+        try:
+            query = text("""
+                SELECT DISTINCT (vr.dados_json->'contato'->>'id')::bigint AS contato_id
+                FROM raw.vendas_raw vr
+                WHERE vr.dados_json->'contato'->>'id' IS NOT NULL
+                  AND vr.dados_json->'contato'->>'id' <> '0'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM raw.contatos_raw cr
+                      WHERE cr.bling_id = (vr.dados_json->'contato'->>'id')::bigint
+                  )
+            """)
+            ids_faltantes = [row.contato_id for row in session.execute(query)]
+        finally:
+            session.close()
+
+        print(f"   🔍 {len(ids_faltantes)} contatos das vendas ainda não estão no banco")
+
+        if not ids_faltantes:
+            return {'inseridos': 0, 'ignorados': 0, 'erros': 0}
+
+        return self.extrair_contatos_por_ids(ids_faltantes)
     
     def _buscar_detalhes_contato(self, contato_id):
         """
@@ -286,7 +398,7 @@ class ContatosCompletoExtractor(BaseExtractor):
         """
         try:
             url = f"{endpoints['contatos']}/{contato_id}"
-            response = requests.get(url, headers=headers, timeout=30)
+            response = requests.get(url, headers=obter_headers(), timeout=30)
             
             if response.status_code == 200:
                 return response.json().get('data', {})
@@ -358,18 +470,14 @@ class ContatosCompletoExtractor(BaseExtractor):
         partes_validas = [p.strip() for p in partes if p and p.strip()]
         return ', '.join(partes_validas) if partes_validas else None
     
-    def _calcular_estatisticas_enderecos(self, contatos_completos, total_contatos):
+    def _calcular_estatisticas_enderecos(self, contatos_com_endereco, total_contatos):
         """
-        Calcula e exibe estatísticas sobre endereços
+        Exibe estatísticas sobre endereços
         
         Args:
-            contatos_completos: Lista de contatos processados
+            contatos_com_endereco: Contatos processados com endereço
             total_contatos: Total de contatos
         """
-        contatos_com_endereco = sum(
-            1 for c in contatos_completos
-            if c.get('endereco_estruturado', {}).get('tem_endereco', False)
-        )
         
         print(f"\n🏠 ESTATÍSTICAS DE ENDEREÇOS:")
         print(f"   • Com endereços completos: {contatos_com_endereco}/{total_contatos}")
@@ -15,7 +15,7 @@ class ProdutosExtractor(BaseExtractor):
     Extrator específico para produtos da API Bling
     Herda toda a lógica comum da BaseExtractor e adiciona só o que é específico de produtos
     """
-    
+
     def __init__(self): # Essa é a função que inicializa a classe
         """
         Inicializa o extrator de produtos
@@ -36,7 +36,8 @@ class ProdutosExtractor(BaseExtractor):
                 limite_por_pagina=100,       # Máximo permitido pela API
                 delay_entre_requests=0.35,   # Delay mínimo, com margem de segurança
                 max_paginas=1000,            # Limite de segurança
-                max_tentativas=3             # 3 tentativas antes de parar tudo
+                max_tentativas=3,            # 3 tentativas antes de parar tudo
+                compacto=self.registros_compactos  # REGISTROS_COMPACTOS: ID + JSON em bytes
             )
 
             fim_extracao = datetime.now()
@@ -53,14 +54,18 @@ class ProdutosExtractor(BaseExtractor):
 
             # Preparar dados
             print("\n📝 Preparando dados para salvamento...")
-            dados_para_salvar = []
+            if self.registros_compactos:
+                # RegistroCompacto já traz bling_id + JSON → salvamento aceita direto
+                dados_para_salvar = todos_produtos
+            else:
+                dados_para_salvar = []
             
-            for produto in todos_produtos:
-                dados_formatados = {
-                    'bling_id': produto['id'],
-                    'dados_json': produto
-                }
-                dados_para_salvar.append(dados_formatados)
+                for produto in todos_produtos:
+                    dados_formatados = {
+                        'bling_id': produto['id'],
+                        'dados_json': produto
+                    }
+                    dados_para_salvar.append(dados_formatados)
 
             # Salvamento inteligente
             print(f"\n💾 Iniciando salvamento inteligente...")
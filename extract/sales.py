@@ -15,6 +15,9 @@ class VendasExtractor(BaseExtractor):
     Extrator específico para vendas da API Bling
     Herda toda a lógica comum da BaseExtractor e adiciona só o que é específico de vendas
     """
+
+    # A listagem traz só o resumo do pedido: mesclar para não apagar os itens já detalhados
+    mesclar_json_existente = True
     
     def __init__(self): # Essa é a função que inicializa a classe
         """
@@ -36,7 +39,8 @@ class VendasExtractor(BaseExtractor):
                 limite_por_pagina=100,       # Máximo permitido pela API
                 delay_entre_requests=0.35,   # Deley mínimo, com margem de segurança. Segundo documentação da API são 3 requisições por segundo
                 max_paginas=1000,            # Limite de segurança
-                max_tentativas=3             # 3 tentativas antes de parar tudo
+                max_tentativas=3,            # 3 tentativas antes de parar tudo
+                compacto=self.registros_compactos  # REGISTROS_COMPACTOS: ID + JSON em bytes
             )
 
             fim_extracao = datetime.now()
@@ -53,14 +57,18 @@ class VendasExtractor(BaseExtractor):
 
             # Preparar dados
             print("\n📝 Preparando dados para salvamento...")
-            dados_para_salvar = []
+            if self.registros_compactos:
+                # RegistroCompacto já traz bling_id + JSON → salvamento aceita direto
+                dados_para_salvar = todas_vendas
+            else:
+                dados_para_salvar = []
             
-            for venda in todas_vendas:
-                dados_formatados = {
-                    'bling_id': venda['id'],
-                    'dados_json': venda
-                }
-                dados_para_salvar.append(dados_formatados)
+                for venda in todas_vendas:
+                    dados_formatados = {
+                        'bling_id': venda['id'],
+                        'dados_json': venda
+                    }
+                    dados_para_salvar.append(dados_formatados)
 
             # Salvamento inteligente
             print(f"\n💾 Iniciando salvamento inteligente...")
@@ -93,3 +101,8 @@ class VendasExtractor(BaseExtractor):
             print("Todos os dados extraídos até este ponto foram preservados")
             raise
 
+    def _json_ja_detalhado(self, dados_json):
+        """
+        Pedido já detalhado = JSON com a lista de itens preenchida
+        """
+        return bool(dados_json.get('itens')) if isinstance(dados_json, dict) else False
@@ -5,15 +5,17 @@ Responsável por: buscar detalhes completos de cada venda (incluindo itens)
 e atualizar o JSON na tabela vendas_raw
 
 Fluxo:
-1. Ler IDs das vendas já extraídas
+1. Ler IDs das vendas que mudaram desde a última busca de detalhes
+   (hash_resumo diferente de hash_resumo_detalhado, ou nunca detalhadas)
 2. Para cada ID, buscar detalhes completos na API
 3. Atualizar o JSON com os dados completos (incluindo itens)
+   e registrar o hash do resumo que foi detalhado
 """
 
 import requests
 import time
 from datetime import datetime
-from config.settings import endpoints, headers
+from config.settings import endpoints, obter_headers
 from config.database import Session
 from sqlalchemy import text
 from sqlalchemy.dialects.postgresql import insert
@@ -26,7 +28,7 @@ class VendasDetalhesExtractor:
     
     def __init__(self):
         self.base_url = endpoints['vendas']
-        self.headers = headers
+        self.headers = obter_headers()
         self.session = Session()
     
     def buscar_detalhes_venda(self, venda_id, tentativas=3):
@@ -91,7 +93,10 @@ class VendasDetalhesExtractor:
                 index_elements=['bling_id'],
                 set_={
                     'dados_json': stmt.excluded.dados_json,
-                    'data_ingestao': stmt.excluded.data_ingestao
+                    'data_ingestao': stmt.excluded.data_ingestao,
+                    'status_processamento': 'pendente',
+                    # Marca qual versão do resumo foi detalhada → não busca de novo até mudar
+                    'hash_resumo_detalhado': VendasRaw.__table__.c.hash_resumo
                 }
             )
             
@@ -119,37 +124,33 @@ class VendasDetalhesExtractor:
         inicio_total = datetime.now()
         
         try:
-            # 1. Buscar IDs de todas as vendas
-            print("\n1️⃣ BUSCANDO IDS DAS VENDAS...")
-            query = text("""
-                SELECT bling_id, dados_json
-                FROM raw.vendas_raw
-                ORDER BY bling_id
-            """)
-            
-            resultado = self.session.execute(query)
-            vendas = resultado.fetchall()
+            # 1. Contar vendas no banco
+            print("\n1️⃣ CONTANDO VENDAS NO BANCO...")
+            total_vendas = self.session.execute(text("SELECT COUNT(*) FROM raw.vendas_raw")).scalar()
             
-            if not vendas:
+            if not total_vendas:
                 print("❌ Nenhuma venda encontrada no banco")
                 return
             
-            total_vendas = len(vendas)
             print(f"✅ {total_vendas} vendas encontradas")
             
-            # 2. Identificar quais precisam de atualização
-            print("\n2️⃣ VERIFICANDO QUAIS VENDAS JÁ TÊM ITENS...")
-            vendas_sem_itens = []
-            vendas_com_itens = 0
+            # 2. Identificar quais mudaram desde a última busca de detalhes (direto no SQL)
+            # - Com hash: resumo mudou desde o último detalhe (ou nunca foi detalhada)
+            # - Sem hash (registros antigos): só as que ainda não têm itens
+            print("\n2️⃣ IDENTIFICANDO VENDAS NOVAS OU ALTERADAS...")
+            query = text("""
+                SELECT bling_id
+                FROM raw.vendas_raw
+                WHERE (hash_resumo IS NOT NULL AND hash_resumo IS DISTINCT FROM hash_resumo_detalhado)
+                   OR (hash_resumo IS NULL AND COALESCE(jsonb_array_length(dados_json->'itens'), 0) = 0)
+                ORDER BY bling_id
+            """)
             
-            for venda in vendas:
-                if 'itens' not in venda.dados_json or not venda.dados_json.get('itens'):
-                    vendas_sem_itens.append(venda.bling_id)
-                else:
-                    vendas_com_itens += 1
+            vendas_sem_itens = [row.bling_id for row in self.session.execute(query)]
+            vendas_com_itens = total_vendas - len(vendas_sem_itens)
             
-            print(f"✅ {vendas_com_itens} vendas já têm itens")
-            print(f"🔄 {len(vendas_sem_itens)} vendas precisam ser atualizadas")
+            print(f"✅ {vendas_com_itens} vendas já estão com detalhes atualizados")
+            print(f"🔄 {len(vendas_sem_itens)} vendas novas ou alteradas precisam ser atualizadas")
             
             if not vendas_sem_itens:
                 print("\n🎉 Todas as vendas já têm detalhes completos!")
@@ -3,9 +3,11 @@
 import requests
 import time
 from datetime import datetime
-from config.settings import headers
+from config.settings import obter_headers
 from config.database import Session
 from config.settings import endpoints
+from core.rate_limiter import buscar_em_paralelo
+from core.lookup_cache import cache_situacoes
 from models.situation_raw import SituacoesRaw
 from sqlalchemy import text
 from sqlalchemy.dialects.postgresql import insert
@@ -19,18 +21,21 @@ class SituacoesExtractor:
     Extrator de situações baseado nos IDs encontrados nos pedidos
     
     Estratégia:
-    1. Busca IDs únicos de situação na tabela vendas_raw
-    2. Para cada ID, busca detalhes na API: /situacoes/{id}
-    3. Salva no banco
+    1. Busca IDs únicos de situação na tabela vendas_raw que ainda não estão
+       em situacoes_raw (ou que estão desatualizados)
+    2. Busca os detalhes na API em paralelo: /situacoes/{id} (sob o limitador de taxa)
+    3. Salva todos no banco com um único UPSERT
     """
     
     def __init__(self):
         self.base_url = endpoints["situacoes"]
-        self.headers = headers
+        self.headers = obter_headers()
     
-    def obter_situacoes_dos_pedidos(self):
+    def obter_situacoes_dos_pedidos(self, dias_validade=7):
         """
-        Busca IDs únicos de situação na tabela vendas_raw
+        Busca IDs únicos de situação na tabela vendas_raw que precisam ser buscados:
+        - Não existem em situacoes_raw
+        - Ou foram ingeridos há mais de `dias_validade` dias
         """
         print("\n🔍 BUSCANDO IDs DE SITUAÇÃO NOS PEDIDOS...")
         print("=" * 70)
@@ -40,16 +45,20 @@ class SituacoesExtractor:
         try:
             # Query para buscar situacao.id únicos do JSON
             query = text("""
-                SELECT DISTINCT (dados_json->'situacao'->>'id')::integer as situacao_id
-                FROM raw.vendas_raw
-                WHERE dados_json->'situacao'->>'id' IS NOT NULL
+                SELECT DISTINCT (vr.dados_json->'situacao'->>'id')::integer as situacao_id
+                FROM raw.vendas_raw vr
+                LEFT JOIN raw.situacoes_raw sr
+                    ON sr.bling_situacao_id = (vr.dados_json->'situacao'->>'id')::integer
+                WHERE vr.dados_json->'situacao'->>'id' IS NOT NULL
+                  AND (sr.bling_situacao_id IS NULL
+                       OR sr.data_ingestao < NOW() - make_interval(days => :dias_validade))
                 ORDER BY situacao_id
             """)
             
-            resultado = session.execute(query)
+            resultado = session.execute(query, {"dias_validade": dias_validade})
             situacoes_ids = [row.situacao_id for row in resultado]
             
-            print(f"✅ {len(situacoes_ids)} situações únicas encontradas nos pedidos")
+            print(f"✅ {len(situacoes_ids)} situações novas ou desatualizadas encontradas nos pedidos")
             print(f"IDs: {situacoes_ids}")
             
             return situacoes_ids
@@ -97,28 +106,33 @@ class SituacoesExtractor:
         
         return None
     
-    def salvar_situacao(self, situacao_data):
+    def salvar_situacoes(self, lista_situacoes):
         """
-        Salva uma situação no banco usando UPSERT
+        Salva várias situações no banco com um único UPSERT (1 statement, 1 commit)
+
+        Returns:
+            int: Quantidade de situações salvas
         """
-        if not situacao_data:
-            return False
+        if not lista_situacoes:
+            return 0
         
         session = Session()
         
         try:
-            situacao_id = situacao_data.get('id')
-            nome = situacao_data.get('nome')
-            cor = situacao_data.get('cor', '')
+            agora = datetime.now()
+            registros = [
+                {
+                    'bling_situacao_id': situacao_data.get('id'),
+                    'nome': situacao_data.get('nome'),
+                    'cor': situacao_data.get('cor', ''),
+                    'dados_json': situacao_data,
+                    'data_ingestao': agora
+                }
+                for situacao_data in lista_situacoes
+            ]
             
             # UPSERT: Insert ou Update se já existir
-            stmt = insert(SituacoesRaw).values(
-                bling_situacao_id=situacao_id,
-                nome=nome,
-                cor=cor,
-                dados_json=situacao_data,
-                data_ingestao=datetime.now()
-            )
+            stmt = insert(SituacoesRaw).values(registros)
             
             stmt = stmt.on_conflict_do_update(
                 index_elements=['bling_situacao_id'],
@@ -133,12 +147,12 @@ class SituacoesExtractor:
             session.execute(stmt)
             session.commit()
             
-            return True
+            return len(registros)
             
         except Exception as e:
             session.rollback()
-            print(f"   ✗ Erro ao salvar situação {situacao_data.get('id')}: {e}")
-            return False
+            print(f"   ✗ Erro ao salvar situações: {e}")
+            return 0
         finally:
             session.close()
     
@@ -158,35 +172,31 @@ class SituacoesExtractor:
             situacoes_ids = self.obter_situacoes_dos_pedidos()
             
             if not situacoes_ids:
-                print("\n❌ Nenhum ID de situação encontrado nos pedidos.")
-                print("💡 Execute primeiro a extração de vendas (main_sales.py)")
+                print("\n✅ Nenhuma situação nova ou desatualizada nos pedidos.")
+                print("💡 Se a tabela de vendas estiver vazia, execute primeiro a extração de vendas (main_sales.py)")
                 return
             
-            # 2. Buscar detalhes de cada situação
+            # 2. Buscar detalhes de cada situação (em paralelo, sob o limitador de taxa)
             print(f"\n💾 BUSCANDO DETALHES DE {len(situacoes_ids)} SITUAÇÕES...")
             print("-" * 70)
             
             stats = {'sucesso': 0, 'erro': 0, 'nao_encontrado': 0}
+            situacoes_encontradas = []
             
-            for i, situacao_id in enumerate(situacoes_ids, 1):
-                print(f"\n[{i}/{len(situacoes_ids)}] Situação ID: {situacao_id}")
-                
-                # Buscar detalhes
-                detalhes = self.buscar_detalhes_situacao(situacao_id)
-                
+            for situacao_id, detalhes in buscar_em_paralelo(self.buscar_detalhes_situacao, situacoes_ids):
                 if detalhes:
-                    # Salvar no banco
-                    if self.salvar_situacao(detalhes):
-                        nome = detalhes.get('nome', 'Sem nome')
-                        print(f"   ✓ {situacao_id}: {nome}")
-                        stats['sucesso'] += 1
-                    else:
-                        stats['erro'] += 1
+                    nome = detalhes.get('nome', 'Sem nome')
+                    print(f"   ✓ {situacao_id}: {nome}")
+                    situacoes_encontradas.append(detalhes)
                 else:
                     stats['nao_encontrado'] += 1
-                
-                # Delay entre requisições
-                time.sleep(0.4)
+            
+            # 3. Salvar todas de uma vez
+            salvas = self.salvar_situacoes(situacoes_encontradas)
+            if salvas:
+                cache_situacoes.marcar_desatualizado()
+            stats['sucesso'] = salvas
+            stats['erro'] = len(situacoes_encontradas) - salvas
             
             fim = datetime.now()
             tempo_total = fim - inicio
@@ -218,26 +228,15 @@ class SituacoesExtractor:
 def obter_mapeamento_situacoes():
     """
     Retorna dicionário {id: nome} para lookup rápido
+    Usa o cache compartilhado (core/lookup_cache.py): só relê o banco quando necessário
     
     Uso na transformação:
         mapa = obter_mapeamento_situacoes()
         df['situacao'] = df['situacao_id'].map(mapa)
     """
-    session = Session()
-    
     try:
-        situacoes = session.query(
-            SituacoesRaw.bling_situacao_id,
-            SituacoesRaw.nome
-        ).all()
-        
-        mapa = {sit.bling_situacao_id: sit.nome for sit in situacoes}
-        
-        print(f"📋 {len(mapa)} situações carregadas para mapeamento")
-        return mapa
+        return cache_situacoes.obter()
         
     except Exception as e:
         print(f"❌ Erro ao carregar mapeamento: {e}")
         return {}
-    finally:
-        session.close()
\ No newline at end of file
@@ -1,73 +1,168 @@
-# Responsável por: orquestrar a extração de produtos especificamente
+# Responsável por: orquestrar a extração dos saldos de estoque (GET /estoques/saldos)
 
 from datetime import datetime
+from sqlalchemy import text
 from core.base_extractor import BaseExtractor
 from models.stocks_raw import EstoqueRaw
 from config.settings import endpoints
+from config.database import Session
 
 # =====================================================
 # 1. CRIANDO A CLASSE PARA EXTRAÇÃO DE ESTOQUE
 # =====================================================
 
 class EstoqueExtractor(BaseExtractor):
-    
+
     """
-    Extrator específico para estoque da API Bling
+    Extrator específico para saldos de estoque da API Bling
     Herda toda a lógica comum da BaseExtractor e adiciona só o que é específico de estoque
+
+    A API não lista estoque paginado: /estoques/saldos exige idsProdutos[] →
+    os saldos são buscados em lotes de IDs, só para os produtos que podem ter mudado
     """
-    
+
+    # /estoques/saldos?idsProdutos[]=1&idsProdutos[]=2...
+    parametro_ids = 'idsProdutos[]'
+
     def __init__(self): # Essa é a função que inicializa a classe
         """
         Inicializa o extrator de estoque
         Passa para a classe pai (BaseExtractor) a URL e modelo específicos de estoque
         """
-        super().__init__(endpoints['estoque'], EstoqueRaw)
-    
-    def executar_extracao_completa(self):
+        super().__init__(endpoints['estoque_saldos'], EstoqueRaw)
+
+    # =====================================================
+    # 2. PRODUTOS ALVO
+    # =====================================================
+
+    def obter_produtos_alvo(self, completo=False):
+        """
+        IDs Bling dos produtos cujo saldo precisa ser consultado
+
+        - Primeira execução ou completo=True: todos os produtos ativos
+        - Demais execuções: produtos alterados na dim_produtos ou vendidos
+          (itens gravados) desde o início da última extração concluída
+          (raw.estoque_execucoes → avança mesmo quando nenhum saldo mudou)
+
+        Returns:
+            list: IDs dos produtos no Bling
+        """
+        session = Session()
+
+        try:
+            ultima_execucao = None if completo else session.execute(
+                text("SELECT MAX(inicio_extracao) FROM raw.estoque_execucoes")
+            ).scalar()
+
+            if ultima_execucao is None:
+                print("📋 Buscando saldo de todos os produtos ativos...")
+                query = text("""
+                    SELECT bling_produto_id
+                    FROM processed.dim_produtos
+                    WHERE situacao = 'A'
+                """)
+                return list(session.execute(query).scalars())
+
+            print(f"📋 Buscando produtos ativos/vendidos desde {ultima_execucao}...")
+            query = text("""
+                SELECT dp.bling_produto_id
+                FROM processed.dim_produtos dp
+                WHERE dp.situacao = 'A'
+                  AND dp.data_processamento > :desde
+                UNION
+                SELECT dp.bling_produto_id
+                FROM processed.fato_itens_pedidos fi
+                INNER JOIN processed.dim_produtos dp
+                    ON dp.produto_id = fi.produto_id
+                WHERE fi.data_processamento > :desde
+            """)
+            return list(session.execute(query, {"desde": ultima_execucao}).scalars())
+
+        finally:
+            session.close()
+
+    def registrar_execucao(self, inicio_extracao, produtos_consultados, completo):
+        """
+        Grava a execução concluída → o início dela é a janela da próxima
+        (o início, e não o fim: mudanças durante a extração entram na próxima execução)
+        """
+        session = Session()
+
+        try:
+            session.execute(text("""
+                INSERT INTO raw.estoque_execucoes (inicio_extracao, fim_extracao, produtos_consultados, completo)
+                VALUES (:inicio, :fim, :produtos, :completo)
+            """), {
+                "inicio": inicio_extracao,
+                "fim": datetime.now(),
+                "produtos": produtos_consultados,
+                "completo": completo,
+            })
+            session.commit()
+
+        finally:
+            session.close()
+
+    # =====================================================
+    # 3. EXECUÇÃO
+    # =====================================================
+
+    def executar_extracao_completa(self, completo=False):
         """
-        Executa o processo completo de extração de estoque
+        Executa o processo de extração dos saldos
+
+        Args:
+            completo: Se True, consulta todos os produtos ativos (ex: reconciliação diária)
         """
         try:
-            # Extrai TODOS os dados da API usando paginação
-            print("Extraindo todo o estoque da API...")
             inicio_extracao = datetime.now()
 
-            todo_estoque = self.extract_dados_bling_paginado(
-                limite_por_pagina=100,       # Máximo permitido pela API
+            ids_produtos = self.obter_produtos_alvo(completo=completo)
+
+            if not ids_produtos:
+                print("✅ Nenhum produto com possível mudança de saldo desde a última execução")
+                self.registrar_execucao(inicio_extracao, 0, completo)
+                return
+
+            print(f"🎯 {len(ids_produtos)} produtos alvo")
+
+            saldos = self.extrair_por_ids(
+                ids_produtos,
+                tamanho_lote=100,            # IDs por requisição
                 delay_entre_requests=0.35,   # Delay mínimo, com margem de segurança
-                max_paginas=1000,            # Limite de segurança
-                max_tentativas=3             # 3 tentativas antes de parar tudo
+                max_tentativas=3
             )
 
             fim_extracao = datetime.now()
             tempo_extracao = fim_extracao - inicio_extracao
 
-            if not todo_estoque:
-                print("❌ Nenhum estoque foi extraído. Verificar API ou configurações.")
-                exit()
-            
             print(f"\n📊 EXTRAÇÃO CONCLUÍDA:")
             print(f"⏱️ Tempo de extração: {tempo_extracao}")
-            print(f"📈 Produtos extraídos: {len(todo_estoque)}")
-            print(f"🚀 Velocidade: {len(todo_estoque)/tempo_extracao.total_seconds():.1f} estoque/segundo")
+            print(f"📈 Saldos extraídos: {len(saldos)}")
+
+            if not saldos:
+                print("⚠️  Nenhum saldo retornado pela API")
+                self.registrar_execucao(inicio_extracao, len(ids_produtos), completo)
+                return
 
-            # Preparar dados
+            # Preparar dados (bling_id = ID do produto, uma linha por produto)
             print("\n📝 Preparando dados para salvamento...")
-            dados_para_salvar = []
-            
-            for estoque in todo_estoque:
-                dados_formatados = {
-                    'bling_id': estoque['id'],
-                    'dados_json': estoque
+            dados_para_salvar = [
+                {
+                    'bling_id': saldo['produto']['id'],
+                    'dados_json': saldo
                 }
-                dados_para_salvar.append(dados_formatados)
+                for saldo in saldos
+                if saldo.get('produto', {}).get('id')
+            ]
 
-            # Salvamento inteligente
+            # Salvamento inteligente (saldos idênticos são ignorados → não viram variação)
             print(f"\n💾 Iniciando salvamento inteligente...")
             inicio_salvamento = datetime.now()
-            
+
             stats = self.salvar_dados_postgres_bulk(dados_para_salvar)
-            
+            self.registrar_execucao(inicio_extracao, len(ids_produtos), completo)
+
             fim_salvamento = datetime.now()
             tempo_salvamento = fim_salvamento - inicio_salvamento
             tempo_total = fim_salvamento - inicio_extracao
@@ -76,19 +171,18 @@ class EstoqueExtractor(BaseExtractor):
             print(f"\n🏁 EXECUÇÃO COMPLETA!")
             print(f"⏱️ Tempo total: {tempo_total}")
             print(f"⏱️ Tempo de salvamento: {tempo_salvamento}")
-            print(f"🚀 Performance geral: {len(todo_estoque)/tempo_total.total_seconds():.1f} estoque/segundo")
-            
+
             # Eficiência do algoritmo
             if stats['total'] > 0:
                 eficiencia = (stats['ignorados'] / stats['total']) * 100
-                print(f"⚡ Eficiência: {eficiencia:.1f}% dos registros eram idênticos (evitou escritas desnecessárias)")
+                print(f"⚡ Eficiência: {eficiencia:.1f}% dos saldos não mudaram (evitou escritas desnecessárias)")
 
             print("\n🎉 Script de estoque executado com sucesso!")
-            
+
         except KeyboardInterrupt:
             print("\n⚠️ Execução interrompida pelo usuário")
         except Exception as e:
             print(f"\n❌ ERRO CRÍTICO durante execução: {e}")
             print("Script interrompido para análise do erro")
             print("Todos os dados extraídos até este ponto foram preservados")
-            raise
\ No newline at end of file
+            raise
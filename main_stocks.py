@@ -1,6 +1,7 @@
 # Responsável por: executar todo o processo, criar schema, chamar o extrator
 # Obs.: O Endpoint do estoque só será pissível rogar no Bling do G4, que é onde tem os dados atualizados. Os demais bling, não tem info de estoque!
-# Por hora esse scrip não irá ser usado ! 
+# No pipeline completo o estoque só roda com EXTRAIR_ESTOQUES=true no .env
+# Este script consulta o saldo de TODOS os produtos ativos (reconciliação completa)
 
 from config.database import create_schema_raw, create_all_tables
 from extract.stocks import EstoqueExtractor
@@ -19,7 +20,7 @@ if __name__ == "__main__":  # Se o arquivo for executado diretamente, não execu
 
         # Criar o extrator de estoque e executar
         extrator_estoque = EstoqueExtractor()
-        extrator_estoque.executar_extracao_completa()
+        extrator_estoque.executar_extracao_completa(completo=True)
         
     except KeyboardInterrupt:
         print("\n⚠️ Execução interrompida pelo usuário")
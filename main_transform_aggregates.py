@@ -0,0 +1,49 @@
+# Responsável por: Recalcular TODOS os agregados de vendas (processed.agg_*) a partir dos fatos
+# O pipeline (main_update_complete.py) já atualiza as datas tocadas → use este script após
+# mudanças que não passam pelos fatos (ex: marca/categoria reclassificadas na dim_produtos)
+
+from datetime import datetime
+from migrations.runner import migrar
+from transform.aggregates_dw import AgregadosTransformer
+
+# =====================================================
+# 1. EXECUÇÃO DO SCRIPT - RECÁLCULO DOS AGREGADOS
+# =====================================================
+
+if __name__ == "__main__":
+    try:
+        print("\n" + "=" * 70)
+        print("🔄 AGREGADOS: FATOS → PROCESSED.AGG_*")
+        print("=" * 70)
+        
+        inicio = datetime.now()
+        
+        # Schemas, tabelas, índices e views: só migra se a versão do banco estiver desatualizada
+        migrar()
+        
+        # Criar e executar o transformer
+        print("\n🚀 Iniciando transformação...")
+        transformer = AgregadosTransformer()
+        transformer.executar_transformacao_completa()
+        
+        fim = datetime.now()
+        tempo_total = fim - inicio
+        
+        print(f"\n{'='*70}")
+        print(f"✅ TRANSFORMAÇÃO CONCLUÍDA COM SUCESSO!")
+        print(f"⏱️  Tempo total: {tempo_total}")
+        print(f"{'='*70}")
+        
+        print(f"\n💡 PRÓXIMOS PASSOS:")
+        print(f"   1. Validar dados: SELECT * FROM processed.agg_vendas_canal_dia ORDER BY data DESC LIMIT 10;")
+        print(f"   2. Apontar os dashboards para as tabelas processed.agg_*")
+        
+    except KeyboardInterrupt:
+        print("\n⚠️ Transformação interrompida pelo usuário")
+        print("💾 Dados processados até este ponto foram preservados")
+    except Exception as e:
+        print(f"\n❌ ERRO CRÍTICO durante transformação: {e}")
+        print("Script interrompido para análise do erro")
+        import traceback
+        traceback.print_exc()
+        raise
\ No newline at end of file
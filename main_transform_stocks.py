@@ -0,0 +1,47 @@
+# Responsável por: Orquestrar a transformação de estoques de raw.estoque_raw para processed.fato_estoques
+
+from datetime import datetime
+from migrations.runner import migrar
+from transform.stocks_dw import EstoquesTransformer
+
+# =====================================================
+# 1. EXECUÇÃO DO SCRIPT - TRANSFORMAÇÃO DE ESTOQUES
+# =====================================================
+
+if __name__ == "__main__":
+    try:
+        print("\n" + "=" * 70)
+        print("🔄 TRANSFORMAÇÃO: ESTOQUE RAW → FATO_ESTOQUES")
+        print("=" * 70)
+        
+        inicio = datetime.now()
+        
+        # Schemas, tabelas, índices e views: só migra se a versão do banco estiver desatualizada
+        migrar()
+        
+        # Criar e executar o transformer
+        print("\n🚀 Iniciando transformação...")
+        transformer = EstoquesTransformer()
+        transformer.executar_transformacao_completa()
+        
+        fim = datetime.now()
+        tempo_total = fim - inicio
+        
+        print(f"\n{'='*70}")
+        print(f"✅ TRANSFORMAÇÃO CONCLUÍDA COM SUCESSO!")
+        print(f"⏱️  Tempo total: {tempo_total}")
+        print(f"{'='*70}")
+        
+        print(f"\n💡 PRÓXIMOS PASSOS:")
+        print(f"   1. Variações gravadas: SELECT * FROM processed.fato_estoques ORDER BY data_snapshot DESC LIMIT 10;")
+        print(f"   2. Saldo do dia: SELECT * FROM processed.vw_estoque_diario WHERE data = CURRENT_DATE;")
+        
+    except KeyboardInterrupt:
+        print("\n⚠️ Transformação interrompida pelo usuário")
+        print("💾 Dados processados até este ponto foram preservados")
+    except Exception as e:
+        print(f"\n❌ ERRO CRÍTICO durante transformação: {e}")
+        print("Script interrompido para análise do erro")
+        import traceback
+        traceback.print_exc()
+        raise
\ No newline at end of file
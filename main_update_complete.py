@@ -4,15 +4,22 @@
 
 from datetime import datetime
 from sqlalchemy import text
-from config.database import create_schema_raw, create_schema_processed, create_all_tables, Session
+from config.database import Session
+from config.settings import obter_configuracoes
 from extract.contacts import ContatosCompletoExtractor
 from extract.products import ProdutosExtractor
 from extract.sales import VendasExtractor
 from extract.sales_details import VendasDetalhesExtractor
+from extract.stocks import EstoqueExtractor
 from transform.contacts_dw import ContatosTransformer
 from transform.products_dw import ProdutosTransformer
 from transform.sales_dw import VendasTransformer
 from transform.items_dw import ItensTransformer  # ← ADICIONAR ESTA LINHA
+from transform.time_dw import TempoTransformer
+from transform.aggregates_dw import AgregadosTransformer
+from transform.stocks_dw import EstoquesTransformer
+from core.lookup_cache import invalidar_todos
+from migrations.runner import migrar
 
 # =====================================================
 # 1. EXECUÇÃO COMPLETA - EXTRAÇÃO
@@ -26,7 +33,9 @@ def executar_extracao_completa():
     1. Contatos (lista + detalhes individuais)
     2. Produtos (lista completa)
     3. Vendas (lista resumida)
-    4. Vendas Detalhes (itens de cada pedido)
+    4. Contatos das vendas que ainda não estão no banco (busca em lote por IDs)
+    5. Vendas Detalhes (itens de cada pedido)
+    6. Saldos de estoque (opcional - produtos alterados/vendidos até a execução anterior)
     """
     print("\n🚀 FASE 1: EXTRAÇÃO COMPLETA DE TODOS OS ENDPOINTS")
     print("=" * 60)
@@ -34,16 +43,22 @@ def executar_extracao_completa():
     inicio_extracao = datetime.now()
     
     # Lista dos extratores para executar
+    # (nome, classe, método executado)
     extratores = [
-        ("👥 CONTATOS", ContatosCompletoExtractor),
-        ("🏭 PRODUTOS", ProdutosExtractor), 
-        ("💰 VENDAS (Lista)", VendasExtractor),
-        ("🛒 VENDAS (Detalhes + Itens)", VendasDetalhesExtractor)
+        ("👥 CONTATOS", ContatosCompletoExtractor, "executar_extracao_completa"),
+        ("🏭 PRODUTOS", ProdutosExtractor, "executar_extracao_completa"), 
+        ("💰 VENDAS (Lista)", VendasExtractor, "executar_extracao_completa"),
+        ("👥 CONTATOS (Clientes das vendas)", ContatosCompletoExtractor, "extrair_contatos_das_vendas"),
+        ("🛒 VENDAS (Detalhes + Itens)", VendasDetalhesExtractor, "executar_extracao_detalhes")
     ]
+
+    # Saldos só dos produtos ativos/vendidos desde o último snapshot (EXTRAIR_ESTOQUES=true)
+    if obter_configuracoes().extrair_estoques:
+        extratores.append(("📦 ESTOQUES (Saldos)", EstoqueExtractor, "executar_extracao_completa"))
     
     resultados_extracao = []
     
-    for nome_endpoint, ExtractorClass in extratores:
+    for nome_endpoint, ExtractorClass, metodo in extratores:
         try:
             print(f"\n{nome_endpoint}")
             print("-" * 50)
@@ -62,7 +77,7 @@ def executar_extracao_completa():
                 )
             else:
                 # Executar normalmente
-                extrator.executar_extracao_completa()
+                getattr(extrator, metodo)()
             
             fim_endpoint = datetime.now()
             tempo_endpoint = fim_endpoint - inicio_endpoint
@@ -129,8 +144,9 @@ def executar_transformacao_completa():
     1. Resetar status_processamento (reprocessar tudo)
     2. Transformar Contatos → dim_contatos
     3. Transformar Produtos → dim_produtos
-    4. Transformar Vendas → fato_pedidos
-    5. Transformar Itens → fato_itens_pedidos  ← NOVO!
+    4. Estender dim_tempo para cobrir as datas dos pedidos
+    5. Transformar Vendas → fato_pedidos
+    6. Transformar Itens → fato_itens_pedidos
     """
     print(f"\n{'='*60}")
     print("🔄 FASE 2: TRANSFORMAÇÃO DOS DADOS")
@@ -158,9 +174,14 @@ def executar_transformacao_completa():
     transformadores = [
         ("👥 CONTATOS", ContatosTransformer),
         ("🏭 PRODUTOS", ProdutosTransformer),
+        ("📅 TEMPO", TempoTransformer),  # Datas dos pedidos precisam existir antes do fato_pedidos
         ("💰 VENDAS", VendasTransformer),
         ("🛒 ITENS", ItensTransformer)  # ← ADICIONAR ESTA LINHA
     ]
+
+    # Estoques dependem dos itens (produtos vendidos) e da dim_tempo
+    if obter_configuracoes().extrair_estoques:
+        transformadores.append(("📦 ESTOQUES", EstoquesTransformer))
     
     resultados_transformacao = []
     
@@ -248,12 +269,22 @@ def executar_pipeline_completo():
     
     inicio_pipeline = datetime.now()
     
+    # Mapeamentos em memória (situações, canais, clientes, produtos) começam do zero a cada execução
+    invalidar_todos()
+    
     # FASE 1: Extração
     resultados_extracao = executar_extracao_completa()
     
     # FASE 2: Transformação
     resultados_transformacao = executar_transformacao_completa()
     
+    # FASE 3: Agregados (só as datas de pedidos/itens gravados nesta execução)
+    try:
+        AgregadosTransformer().atualizar_datas_tocadas(desde=inicio_pipeline)
+    except Exception as e:
+        print(f"⚠️  Erro ao atualizar agregados: {e}")
+        print("💡 Execute python main_transform_aggregates.py para recalcular tudo")
+    
     # Relatório final consolidado
     fim_pipeline = datetime.now()
     tempo_total = fim_pipeline - inicio_pipeline
@@ -327,12 +358,8 @@ def executar_pipeline_completo():
 
 if __name__ == "__main__":
     try:
-        # Cria os schemas se não existirem
-        create_schema_raw()
-        create_schema_processed()
-
-        # Cria as tabelas
-        create_all_tables()
+        # Schemas, tabelas e índices: só migra se a versão do banco estiver desatualizada
+        migrar()
 
         # Executar pipeline completo
         executar_pipeline_completo()
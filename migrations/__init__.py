@@ -0,0 +1,4 @@
+"""
+Módulo de migrações versionadas do banco
+Cada arquivo mNNN_*.py define VERSAO, DESCRICAO e aplicar(conn)
+"""
@@ -0,0 +1,20 @@
+# Responsável por: criar a estrutura base do banco (schemas, tabelas dos modelos, colunas novas e funções SQL)
+
+from config.database import create_all_schemas, create_all_tables
+
+VERSAO = 0
+DESCRICAO = "Schemas raw/processed, tabelas dos modelos, colunas novas e funções SQL"
+
+# =====================================================
+# 1. APLICAR MIGRAÇÃO
+# =====================================================
+
+def aplicar(conn):
+    """
+    Cria schemas e tabelas (idempotente → também serve para bancos já existentes)
+
+    As funções de config/database.py abrem as próprias conexões; `conn` só
+    mantém a mesma assinatura das outras migrações
+    """
+    create_all_schemas()
+    create_all_tables()
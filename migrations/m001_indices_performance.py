@@ -0,0 +1,134 @@
+# Responsável por: criar os índices parciais e de expressão usados pelas consultas quentes do pipeline
+# e relatar o uso desses índices (pg_stat_user_indexes)
+
+from sqlalchemy import text
+
+VERSAO = 1
+DESCRICAO = "Índices parciais/expressão para consultas do pipeline + chave única dos itens"
+
+# =====================================================
+# 1. ÍNDICES
+# =====================================================
+# (nome, comando) → cada índice casa com uma consulta existente
+
+INDICES = [
+    # Transformadores: WHERE status_processamento = 'pendente' (só as linhas pendentes entram no índice)
+    ("ix_vendas_raw_pendentes",
+     "CREATE INDEX IF NOT EXISTS ix_vendas_raw_pendentes ON raw.vendas_raw (bling_id) "
+     "WHERE status_processamento = 'pendente'"),
+    ("ix_contatos_raw_pendentes",
+     "CREATE INDEX IF NOT EXISTS ix_contatos_raw_pendentes ON raw.contatos_raw (bling_id) "
+     "WHERE status_processamento = 'pendente'"),
+    ("ix_produtos_raw_pendentes",
+     "CREATE INDEX IF NOT EXISTS ix_produtos_raw_pendentes ON raw.produtos_raw (bling_id) "
+     "WHERE status_processamento = 'pendente'"),
+    ("ix_estoque_raw_pendentes",
+     "CREATE INDEX IF NOT EXISTS ix_estoque_raw_pendentes ON raw.estoque_raw (bling_id) "
+     "WHERE status_processamento = 'pendente'"),
+
+    # extract/channels.py e motor SQL de vendas: (dados_json->'loja'->>'id')::integer
+    ("ix_vendas_raw_loja_id",
+     "CREATE INDEX IF NOT EXISTS ix_vendas_raw_loja_id ON raw.vendas_raw "
+     "(((dados_json->'loja'->>'id')::integer))"),
+
+    # extract/situation.py e motor SQL de vendas: (dados_json->'situacao'->>'id')::integer
+    ("ix_vendas_raw_situacao_id",
+     "CREATE INDEX IF NOT EXISTS ix_vendas_raw_situacao_id ON raw.vendas_raw "
+     "(((dados_json->'situacao'->>'id')::integer))"),
+
+    # extract/contacts.py e motor SQL de vendas: (dados_json->'contato'->>'id')::bigint
+    ("ix_vendas_raw_contato_id",
+     "CREATE INDEX IF NOT EXISTS ix_vendas_raw_contato_id ON raw.vendas_raw "
+     "(((dados_json->'contato'->>'id')::bigint))"),
+
+    # Um item do Bling aparece uma única vez por pedido (anti-join do inserir_novos, ON CONFLICT futuro)
+    ("uq_fato_itens_pedido_item",
+     "CREATE UNIQUE INDEX IF NOT EXISTS uq_fato_itens_pedido_item "
+     "ON processed.fato_itens_pedidos (pedido_id, bling_item_id)"),
+]
+
+# =====================================================
+# 2. APLICAR MIGRAÇÃO
+# =====================================================
+
+def remover_itens_duplicados(conn):
+    """
+    Remove itens repetidos (mesmo pedido_id + bling_item_id), mantendo o menor item_id
+    Necessário antes de criar a chave única
+
+    Returns:
+        int: Quantidade de itens removidos
+    """
+    resultado = conn.execute(text("""
+        DELETE FROM processed.fato_itens_pedidos f
+        USING processed.fato_itens_pedidos manter
+        WHERE f.pedido_id = manter.pedido_id
+          AND f.bling_item_id = manter.bling_item_id
+          AND f.item_id > manter.item_id
+    """))
+
+    return resultado.rowcount
+
+
+def aplicar(conn):
+    """
+    Cria todos os índices da migração (idempotente)
+
+    Args:
+        conn: Conexão dentro de uma transação (engine.begin())
+    """
+    removidos = remover_itens_duplicados(conn)
+    if removidos > 0:
+        print(f"   🗑️  {removidos} itens duplicados removidos de fato_itens_pedidos")
+
+    for nome, comando in INDICES:
+        conn.execute(text(comando))
+        print(f"   ✓ {nome}")
+
+    # Estatísticas atualizadas → o planner passa a considerar os índices novos
+    for tabela in ("raw.vendas_raw", "raw.contatos_raw", "raw.produtos_raw",
+                   "raw.estoque_raw", "processed.fato_itens_pedidos"):
+        conn.execute(text(f"ANALYZE {tabela}"))
+
+# =====================================================
+# 3. RELATÓRIO DE USO DOS ÍNDICES
+# =====================================================
+
+def relatorio_uso_indices(conn):
+    """
+    Mostra quantas vezes cada índice da migração foi usado (idx_scan) e o tamanho dele
+    Índices com idx_scan = 0 depois de alguns ciclos do pipeline são candidatos a remoção
+
+    Returns:
+        list: Linhas (indice, tabela, idx_scan, idx_tup_read, tamanho)
+    """
+    resultado = conn.execute(text("""
+        SELECT
+            s.indexrelname AS indice,
+            s.schemaname || '.' || s.relname AS tabela,
+            s.idx_scan,
+            s.idx_tup_read,
+            pg_size_pretty(pg_relation_size(s.indexrelid)) AS tamanho
+        FROM pg_stat_user_indexes s
+        WHERE s.indexrelname = ANY(:nomes)
+        ORDER BY s.idx_scan DESC
+    """), {"nomes": [nome for nome, _ in INDICES]})
+
+    linhas = resultado.fetchall()
+
+    print("\n📈 USO DOS ÍNDICES DE PERFORMANCE:")
+    for indice, tabela, idx_scan, idx_tup_read, tamanho in linhas:
+        print(f"   • {indice} ({tabela}): {idx_scan} scans, {idx_tup_read} tuplas lidas, {tamanho}")
+
+    nao_encontrados = {nome for nome, _ in INDICES} - {linha[0] for linha in linhas}
+    for nome in sorted(nao_encontrados):
+        print(f"   ⚠️  {nome} não existe no banco")
+
+    return linhas
+
+
+if __name__ == "__main__":
+    from config.database import obter_engine
+
+    with obter_engine().connect() as conn:
+        relatorio_uso_indices(conn)
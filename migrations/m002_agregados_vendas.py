@@ -0,0 +1,37 @@
+# Responsável por: criar as tabelas de agregados diários de vendas (processed.agg_*)
+
+from sqlalchemy import text
+from config.database import Base
+
+VERSAO = 2
+DESCRICAO = "Tabelas de agregados diários de vendas (canal, marca/categoria, situação)"
+
+# =====================================================
+# 1. APLICAR MIGRAÇÃO
+# =====================================================
+
+def aplicar(conn):
+    """
+    Cria as tabelas de agregados, os índices de data_processamento dos fatos
+    e faz a primeira carga completa
+    """
+    from models.dim_fato.agregados_vendas import AggVendasCanalDia, AggVendasProdutoDia, AggVendasSituacaoDia
+    from transform.aggregates_dw import AgregadosTransformer
+
+    Base.metadata.create_all(conn, tables=[
+        AggVendasCanalDia.__table__,
+        AggVendasProdutoDia.__table__,
+        AggVendasSituacaoDia.__table__,
+    ])
+
+    # Busca das datas tocadas em cada execução (data_processamento >= início do pipeline)
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_fato_pedidos_data_processamento "
+        "ON processed.fato_pedidos (data_processamento)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_fato_itens_pedidos_data_processamento "
+        "ON processed.fato_itens_pedidos (data_processamento)"
+    ))
+
+    AgregadosTransformer().recalcular(conn, datas=None)
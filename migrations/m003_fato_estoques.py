@@ -0,0 +1,59 @@
+# Responsável por: criar processed.fato_estoques (saldos guardados como variações)
+# e a view processed.vw_estoque_diario, que reconstrói o saldo completo de cada dia
+
+from sqlalchemy import text
+from config.database import Base
+
+VERSAO = 3
+DESCRICAO = "fato_estoques por variação de saldo + view vw_estoque_diario"
+
+# =====================================================
+# 1. VIEW DE SNAPSHOT DIÁRIO
+# =====================================================
+# Cada linha da fato vale do seu data_snapshot até o dia anterior à próxima mudança
+# (ou até hoje) → JOIN por faixa com dim_tempo gera o saldo de todo produto em todo dia.
+# Filtre sempre por data (ex: WHERE data = CURRENT_DATE) para ler só o dia desejado.
+
+VIEW_ESTOQUE_DIARIO = """
+    CREATE OR REPLACE VIEW processed.vw_estoque_diario AS
+    WITH faixas AS (
+        SELECT
+            fe.bling_produto_id,
+            fe.produto_id,
+            fe.data_snapshot,
+            fe.saldo_fisico,
+            fe.saldo_virtual,
+            LEAD(fe.data_snapshot) OVER (
+                PARTITION BY fe.bling_produto_id ORDER BY fe.data_snapshot
+            ) AS proxima_mudanca
+        FROM processed.fato_estoques fe
+    )
+    SELECT
+        t.data_completa AS data,
+        f.produto_id,
+        f.bling_produto_id,
+        f.saldo_fisico,
+        f.saldo_virtual,
+        (f.data_snapshot = t.data_completa) AS saldo_alterado_no_dia
+    FROM faixas f
+    INNER JOIN processed.dim_tempo t
+        ON t.data_completa >= f.data_snapshot
+       AND t.data_completa < COALESCE(f.proxima_mudanca, CURRENT_DATE + 1)
+"""
+
+# =====================================================
+# 2. APLICAR MIGRAÇÃO
+# =====================================================
+
+def aplicar(conn):
+    """
+    Cria a tabela fato_estoques e a view de snapshot diário
+    """
+    # Dimensões referenciadas pelas FKs precisam estar no Base.metadata
+    # (banco já na versão 2 roda esta migração sem a m000 no mesmo processo)
+    from models.dim_fato.dim_tempo import DimTempo
+    from models.dim_fato.dim_produtos import DimProdutos
+    from models.dim_fato.fato_estoques import FatoEstoques
+
+    Base.metadata.create_all(conn, tables=[FatoEstoques.__table__])
+    conn.execute(text(VIEW_ESTOQUE_DIARIO))
@@ -0,0 +1,21 @@
+# Responsável por: criar processed.agg_datas_pendentes (datas antigas de pedidos que mudaram
+# de data, recalculadas pelos agregados na próxima execução)
+
+from config.database import Base
+
+VERSAO = 4
+DESCRICAO = "Datas pendentes de recálculo dos agregados (pedidos que mudaram de data)"
+
+# =====================================================
+# 1. APLICAR MIGRAÇÃO
+# =====================================================
+
+def aplicar(conn):
+    """
+    Cria a tabela de datas pendentes
+    Pedidos que já mudaram de data antes desta migração não têm a data antiga registrada:
+    rode main_transform_aggregates.py uma vez para recalcular tudo
+    """
+    from models.dim_fato.agregados_vendas import AggDatasPendentes
+
+    Base.metadata.create_all(conn, tables=[AggDatasPendentes.__table__])
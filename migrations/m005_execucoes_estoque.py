@@ -0,0 +1,20 @@
+# Responsável por: criar raw.estoque_execucoes (início de cada extração de estoque concluída),
+# usada como janela de "produtos alterados desde a última execução"
+
+from config.database import Base
+
+VERSAO = 5
+DESCRICAO = "Registro das execuções da extração de estoque (janela incremental)"
+
+# =====================================================
+# 1. APLICAR MIGRAÇÃO
+# =====================================================
+
+def aplicar(conn):
+    """
+    Cria a tabela de execuções
+    Sem execução registrada, a próxima extração consulta todos os produtos ativos
+    """
+    from models.stocks_raw import EstoqueExecucaoRaw
+
+    Base.metadata.create_all(conn, tables=[EstoqueExecucaoRaw.__table__])
@@ -0,0 +1,17 @@
+# Responsável por: remover raw.ix_vendas_raw_com_itens (criado pela m001 em bancos antigos)
+# O predicado (dados_json ? 'itens') não casa com nenhuma consulta e bling_id já tem índice único
+
+from sqlalchemy import text
+
+VERSAO = 6
+DESCRICAO = "Remove o índice parcial ix_vendas_raw_com_itens (nunca usado pelo planner)"
+
+# =====================================================
+# 1. APLICAR MIGRAÇÃO
+# =====================================================
+
+def aplicar(conn):
+    """
+    Remove o índice (idempotente: bancos criados depois da correção da m001 não o têm)
+    """
+    conn.execute(text("DROP INDEX IF EXISTS raw.ix_vendas_raw_com_itens"))
@@ -0,0 +1,111 @@
+# Responsável por: converter processed.fato_pedidos em tabela particionada por mês (data_pedido)
+# ⚠️ Opcional e manual: rode `python -m migrations.particionar_fatos` uma vez quando quiser ativar
+# Os carregadores detectam o particionamento sozinhos (transform/partitioning.py)
+
+from datetime import date, datetime
+from sqlalchemy import text
+from config.database import obter_engine
+from transform.partitioning import tabela_particionada, garantir_particoes_mensais
+
+TABELA = "processed.fato_pedidos"
+
+# =====================================================
+# 1. CONVERTER FATO_PEDIDOS
+# =====================================================
+
+def particionar_fato_pedidos():
+    """
+    Recria processed.fato_pedidos como PARTITION BY RANGE (data_pedido), uma partição por mês
+
+    Mudanças de estrutura exigidas pelo PostgreSQL:
+    - Chave primária passa a ser (pedido_id, data_pedido)
+    - Unicidade do Bling passa a ser (bling_pedido_id, data_pedido) → os carregadores
+      removem a versão antiga do pedido quando a data muda
+    - A FK fato_itens_pedidos.pedido_id → fato_pedidos é removida (pedido_id sozinho
+      não é mais único); pedido_id continua sendo o id de raw.vendas_raw
+
+    fato_itens_pedidos não tem data_pedido → continua como tabela simples
+    """
+    print("\n🧩 PARTICIONANDO PROCESSED.FATO_PEDIDOS POR MÊS")
+    print("=" * 60)
+
+    inicio = datetime.now()
+
+    with obter_engine().begin() as conn:
+        if tabela_particionada(conn, TABELA):
+            print("✅ fato_pedidos já é particionada - nada a fazer")
+            return
+
+        conn.execute(text(f"LOCK TABLE {TABELA} IN ACCESS EXCLUSIVE MODE"))
+
+        # 1. Tabela atual vira fonte da cópia (sequence de pedido_id é preservada)
+        conn.execute(text(f"ALTER TABLE {TABELA} RENAME TO fato_pedidos_heap"))
+        sequencia = conn.execute(text(
+            "SELECT pg_get_serial_sequence('processed.fato_pedidos_heap', 'pedido_id')"
+        )).scalar()
+        if sequencia:
+            conn.execute(text(f"ALTER SEQUENCE {sequencia} OWNED BY NONE"))
+
+        # Índices da tabela original (modelo, m001, m002...) → recriados na particionada
+        # Únicos ficam de fora: sem data_pedido não são permitidos (PK/UNIQUE novos cobrem)
+        indices = conn.execute(text("""
+            SELECT indexname, indexdef
+            FROM pg_indexes
+            WHERE schemaname = 'processed'
+              AND tablename = 'fato_pedidos_heap'
+              AND indexdef NOT LIKE 'CREATE UNIQUE INDEX%'
+        """)).fetchall()
+
+        # 2. Nova tabela particionada com as mesmas colunas e defaults
+        conn.execute(text(f"""
+            CREATE TABLE {TABELA} (
+                LIKE processed.fato_pedidos_heap INCLUDING DEFAULTS,
+                PRIMARY KEY (pedido_id, data_pedido),
+                UNIQUE (bling_pedido_id, data_pedido),
+                FOREIGN KEY (data_pedido) REFERENCES processed.dim_tempo (data_completa),
+                FOREIGN KEY (cliente_id) REFERENCES processed.dim_contatos (cliente_id)
+            ) PARTITION BY RANGE (data_pedido)
+        """))
+
+        # 3. Partições do histórico + mês atual
+        data_min, data_max = conn.execute(text(
+            "SELECT MIN(data_pedido), MAX(data_pedido) FROM processed.fato_pedidos_heap"
+        )).one()
+        hoje = date.today()
+        particoes = garantir_particoes_mensais(
+            conn, TABELA, min(data_min or hoje, hoje), max(data_max or hoje, hoje)
+        )
+        print(f"   ✓ {particoes} partições mensais criadas")
+
+        # 4. Copiar dados e remover a tabela antiga (CASCADE remove a FK dos itens)
+        copiados = conn.execute(text(
+            f"INSERT INTO {TABELA} SELECT * FROM processed.fato_pedidos_heap"
+        )).rowcount
+        print(f"   ✓ {copiados} pedidos copiados")
+
+        conn.execute(text("DROP TABLE processed.fato_pedidos_heap CASCADE"))
+
+        if sequencia:
+            conn.execute(text(f"ALTER SEQUENCE {sequencia} OWNED BY {TABELA}.pedido_id"))
+
+        # 5. Índices (criados na tabela mãe → replicados em todas as partições)
+        for nome, definicao in indices:
+            conn.execute(text(
+                definicao
+                .replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1)
+                .replace(" ON processed.fato_pedidos_heap ", " ON fato_pedidos_heap ", 1)
+                .replace(" ON fato_pedidos_heap ", f" ON {TABELA} ", 1)  # indexdef omite o schema se estiver no search_path
+            ))
+            print(f"   ✓ {nome}")
+        print(f"   ✓ {len(indices)} índices recriados")
+
+    with obter_engine().connect() as conn:
+        conn.execute(text(f"ANALYZE {TABELA}"))
+        conn.commit()
+
+    print("=" * 60)
+    print(f"✅ fato_pedidos particionada em {datetime.now() - inicio}\n")
+
+
+if __name__ == "__main__":
+    particionar_fato_pedidos()
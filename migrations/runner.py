@@ -0,0 +1,118 @@
+# Responsável por: aplicar as migrações versionadas (migrations/mNNN_*.py) e registrar a versão do banco
+# Em execuções normais faz uma única consulta e segue em frente se o banco já estiver atualizado
+
+from datetime import datetime
+from sqlalchemy import text
+from config.database import obter_engine
+from migrations import (
+    m000_estrutura_inicial,
+    m001_indices_performance,
+    m002_agregados_vendas,
+    m003_fato_estoques,
+    m004_datas_pendentes_agregados,
+    m005_execucoes_estoque,
+    m006_remover_indice_vendas_com_itens,
+)
+
+# Migrações conhecidas, em ordem de versão
+MIGRACOES = [
+    m000_estrutura_inicial,
+    m001_indices_performance,
+    m002_agregados_vendas,
+    m003_fato_estoques,
+    m004_datas_pendentes_agregados,
+    m005_execucoes_estoque,
+    m006_remover_indice_vendas_com_itens,
+]
+
+VERSAO_ATUAL = max(migracao.VERSAO for migracao in MIGRACOES)
+
+# Chave do pg_advisory_xact_lock → duas execuções simultâneas não migram ao mesmo tempo
+CHAVE_LOCK_MIGRACAO = 7420011
+
+# =====================================================
+# 1. VERSÃO DO BANCO
+# =====================================================
+
+def criar_tabela_versoes(conn):
+    """
+    Cria public.schema_versoes (uma linha por migração aplicada)
+    """
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS public.schema_versoes (
+            versao INTEGER PRIMARY KEY,
+            descricao VARCHAR(255),
+            aplicada_em TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """))
+
+
+def versao_do_banco(conn):
+    """
+    Retorna a maior versão aplicada (-1 se o banco nunca foi migrado)
+    """
+    existe = conn.execute(text("SELECT to_regclass('public.schema_versoes') IS NOT NULL")).scalar()
+    if not existe:
+        return -1
+
+    versao = conn.execute(text("SELECT MAX(versao) FROM public.schema_versoes")).scalar()
+    return -1 if versao is None else versao
+
+# =====================================================
+# 2. EXECUTAR MIGRAÇÕES
+# =====================================================
+
+def migrar():
+    """
+    Aplica, em ordem, as migrações com versão maior que a do banco
+    Cada migração roda na própria transação junto com o registro da versão
+
+    Returns:
+        int: Versão do banco ao final
+    """
+    engine = obter_engine()
+
+    # Caminho rápido: banco já atualizado → uma consulta e nada mais
+    with engine.connect() as conn:
+        versao = versao_do_banco(conn)
+
+    if versao >= VERSAO_ATUAL:
+        print(f"✅ Banco atualizado (versão {versao})")
+        return versao
+
+    print(f"\n🧱 MIGRANDO BANCO: versão {versao} → {VERSAO_ATUAL}")
+    print("=" * 60)
+
+    for migracao in MIGRACOES:
+        if migracao.VERSAO <= versao:
+            continue
+
+        inicio = datetime.now()
+
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": CHAVE_LOCK_MIGRACAO})
+            criar_tabela_versoes(conn)
+
+            # Outra execução pode ter aplicado enquanto esperávamos o lock
+            if versao_do_banco(conn) >= migracao.VERSAO:
+                continue
+
+            print(f"\n▶️  {migracao.VERSAO:03d}: {migracao.DESCRICAO}")
+            migracao.aplicar(conn)
+
+            conn.execute(
+                text("INSERT INTO public.schema_versoes (versao, descricao) VALUES (:versao, :descricao)"),
+                {"versao": migracao.VERSAO, "descricao": migracao.DESCRICAO},
+            )
+
+        print(f"   ✅ Versão {migracao.VERSAO} aplicada em {datetime.now() - inicio}")
+        versao = migracao.VERSAO
+
+    print("=" * 60)
+    print(f"✅ Banco migrado para a versão {versao}\n")
+
+    return versao
+
+
+if __name__ == "__main__":
+    migrar()
@@ -0,0 +1,86 @@
+# Responsável por: definir as tabelas de agregados diários de vendas no schema processed
+# (resumos lidos pelos dashboards em vez de varrer fato_pedidos / fato_itens_pedidos)
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, Numeric, DateTime
+from config.database import Base
+
+# =====================================================
+# 1. VENDAS DIÁRIAS POR CANAL
+# =====================================================
+
+class AggVendasCanalDia(Base):
+    __table_args__ = {"schema": "processed"}
+    __tablename__ = "agg_vendas_canal_dia"
+
+    data = Column(Date, primary_key=True)
+    canal_id = Column(Integer, primary_key=True)  # 0 = pedido sem canal
+
+    quantidade_pedidos = Column(Integer, nullable=False)
+    quantidade_produtos = Column(Integer, nullable=False)
+    valor_total = Column(Numeric(15, 2), nullable=False)
+    valor_frete = Column(Numeric(15, 2), nullable=False)
+
+    data_atualizacao = Column(DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f"<AggVendasCanalDia(data={self.data}, canal_id={self.canal_id}, valor={self.valor_total})>"
+
+# =====================================================
+# 2. VENDAS DIÁRIAS POR MARCA / CATEGORIA
+# =====================================================
+
+class AggVendasProdutoDia(Base):
+    __table_args__ = {"schema": "processed"}
+    __tablename__ = "agg_vendas_marca_categoria_dia"
+
+    data = Column(Date, primary_key=True)
+    marca = Column(String(50), primary_key=True)  # "Sem marca" quando não informado
+    categoria = Column(String(50), primary_key=True)  # "Sem categoria" quando não informado
+
+    quantidade_pedidos = Column(Integer, nullable=False)
+    quantidade_itens = Column(Integer, nullable=False)
+    quantidade_vendida = Column(Numeric(15, 3), nullable=False)
+    valor_total = Column(Numeric(15, 2), nullable=False)
+    desconto_total = Column(Numeric(15, 2), nullable=False)
+
+    data_atualizacao = Column(DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f"<AggVendasProdutoDia(data={self.data}, marca={self.marca}, categoria={self.categoria})>"
+
+# =====================================================
+# 3. VENDAS DIÁRIAS POR SITUAÇÃO
+# =====================================================
+
+class AggVendasSituacaoDia(Base):
+    __table_args__ = {"schema": "processed"}
+    __tablename__ = "agg_vendas_situacao_dia"
+
+    data = Column(Date, primary_key=True)
+    situacao = Column(String(50), primary_key=True)  # "Sem situação" quando não informado
+
+    quantidade_pedidos = Column(Integer, nullable=False)
+    valor_total = Column(Numeric(15, 2), nullable=False)
+
+    data_atualizacao = Column(DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f"<AggVendasSituacaoDia(data={self.data}, situacao={self.situacao}, valor={self.valor_total})>"
+
+# =====================================================
+# 4. DATAS PENDENTES DE RECÁLCULO
+# =====================================================
+# Datas ANTIGAS de pedidos que mudaram de data: a linha do fato já está na data nova,
+# então só este registro indica que o dia antigo precisa ser recalculado
+
+class AggDatasPendentes(Base):
+    __table_args__ = {"schema": "processed"}
+    __tablename__ = "agg_datas_pendentes"
+
+    data = Column(Date, primary_key=True)
+
+    data_registro = Column(DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f"<AggDatasPendentes(data={self.data})>"
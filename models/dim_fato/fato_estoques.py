@@ -0,0 +1,56 @@
+# Responsável por: definir a estrutura da tabela fato_estoques no schema processed
+# Guarda só as MUDANÇAS de saldo (uma linha por produto/dia em que o saldo mudou)
+# O saldo de qualquer dia é reconstruído pela view processed.vw_estoque_diario
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, Date, Numeric, DateTime, ForeignKey, UniqueConstraint
+from config.database import Base
+
+# =====================================================
+# 1. MODELO DA TABELA - FATO_ESTOQUES
+# =====================================================
+
+class FatoEstoques(Base):
+    __table_args__ = (
+        # Uma linha por produto por dia (várias execuções no mesmo dia atualizam a mesma linha)
+        UniqueConstraint("bling_produto_id", "data_snapshot", name="uq_fato_estoques_produto_data"),
+        {"schema": "processed"},
+    )
+    __tablename__ = "fato_estoques"
+
+    # ============================
+    # CHAVES
+    # ============================
+    
+    # Chave primária
+    estoque_id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # Dia em que o saldo mudou (FK para dim_tempo)
+    data_snapshot = Column(Date, ForeignKey('processed.dim_tempo.data_completa'), nullable=False, index=True)
+    # FK para dim_produtos (pode ficar NULL se o produto ainda não foi transformado)
+    produto_id = Column(Integer, ForeignKey('processed.dim_produtos.produto_id'), index=True)
+    # Chave de negócio (ID do produto na API Bling)
+    bling_produto_id = Column(BigInteger, nullable=False, index=True)
+    
+    # ============================
+    # SALDOS (valor a partir deste dia)
+    # ============================
+    
+    saldo_fisico = Column(Numeric(15, 3), nullable=False)
+    saldo_virtual = Column(Numeric(15, 3), nullable=False)
+    
+    # ============================
+    # VARIAÇÕES (em relação ao último saldo registrado antes deste dia)
+    # ============================
+    
+    variacao_fisico = Column(Numeric(15, 3), nullable=False)
+    variacao_virtual = Column(Numeric(15, 3), nullable=False)
+    
+    # ============================
+    # METADADOS
+    # ============================
+    
+    data_processamento = Column(DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f"<FatoEstoques(produto={self.bling_produto_id}, data={self.data_snapshot}, saldo={self.saldo_fisico})>"
@@ -3,7 +3,7 @@
 from datetime import datetime
 import string
 from tokenize import String
-from sqlalchemy import Column, Integer, BigInteger, Numeric, DateTime, ForeignKey, String
+from sqlalchemy import Column, Integer, BigInteger, Numeric, DateTime, ForeignKey, String, Index
 from config.database import Base
 
 # =====================================================
@@ -11,7 +11,11 @@ from config.database import Base
 # =====================================================
 
 class FatoItensPedidos(Base):
-    __table_args__ = {"schema": "processed"}
+    __table_args__ = (
+        # Um item do Bling aparece uma única vez por pedido - migrations/m001
+        Index("uq_fato_itens_pedido_item", "pedido_id", "bling_item_id", unique=True),
+        {"schema": "processed"},
+    )
     __tablename__ = "fato_itens_pedidos"
 
     # ============================
@@ -22,6 +26,8 @@ class FatoItensPedidos(Base):
     item_id = Column(Integer, primary_key=True, autoincrement=True)
     
     # Chaves estrangeiras
+    # ⚠️ Com fato_pedidos particionada (migrations/particionar_fatos.py) a FK de pedido_id
+    # não existe no banco (pedido_id sozinho deixa de ser único)
     pedido_id = Column(Integer, ForeignKey('processed.fato_pedidos.pedido_id'), nullable=False, index=True)
     produto_id = Column(Integer, ForeignKey('processed.dim_produtos.produto_id'), index=True)
     
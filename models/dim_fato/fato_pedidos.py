@@ -19,6 +19,8 @@ class FatoPedidos(Base):
     # Chave primária
     pedido_id = Column(Integer, primary_key=True, autoincrement=True)
     # Chave de negócio (ID da API Bling)
+    # ⚠️ Com fato_pedidos particionada (migrations/particionar_fatos.py) o banco diverge deste modelo:
+    # PK (pedido_id, data_pedido) e UNIQUE (bling_pedido_id, data_pedido) em vez de bling_pedido_id único
     bling_pedido_id = Column(BigInteger, unique=True, nullable=False, index=True)
     # Número do pedido (visível para usuários)
     numero_pedido = Column(String(50), index=True)
@@ -65,6 +67,8 @@ class FatoPedidos(Base):
     data_ingestao = Column(DateTime)
     # Data de quando foi processado para o DW
     data_processamento = Column(DateTime, default=datetime.now, nullable=False)
+    # md5 do array de itens usado na última carga de fato_itens_pedidos (detecta itens alterados)
+    hash_itens = Column(String(32))
 
     def __repr__(self):
         return f"<FatoPedidos(pedido_id={self.pedido_id}, numero={self.numero_pedido}, valor={self.valor_total})>"
\ No newline at end of file
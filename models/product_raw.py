@@ -1,7 +1,7 @@
 # Responsável por: definir a estrutura da tabela produtos_raw
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, BigInteger, DateTime
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import JSONB  # Importa JSONB (Mais rápido e ja convertido)
 from config.database import Base
 
@@ -11,7 +11,11 @@ from config.database import Base
 
 # Definindo o modelo da tabela para dados brutos (raw)
 class ProdutoRaw(Base):
-    __table_args__ = {"schema": "raw"} # Definindo o esquema 
+    __table_args__ = (
+        # Índice parcial: só linhas pendentes (filtro de todos os transformadores) - migrations/m001
+        Index("ix_produtos_raw_pendentes", "bling_id", postgresql_where=text("status_processamento = 'pendente'")),
+        {"schema": "raw"},  # Definindo o esquema
+    )
     __tablename__ = "produtos_raw"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
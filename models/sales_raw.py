@@ -1,7 +1,7 @@
 # Responsável por: definir a estrutura da tabela vendas_raw
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, BigInteger, DateTime
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import JSONB  # Importa JSONB (Mais rápido e ja convertido)
 from config.database import Base
 
@@ -11,7 +11,11 @@ from config.database import Base
 
 # Definindo o modelo da tabela para dados brutos (raw)
 class VendasRaw(Base):
-    __table_args__ = {"schema": "raw"} # Definindo o esquema 
+    __table_args__ = (
+        # Índice parcial: só linhas pendentes (filtro de todos os transformadores) - migrations/m001
+        Index("ix_vendas_raw_pendentes", "bling_id", postgresql_where=text("status_processamento = 'pendente'")),
+        {"schema": "raw"},  # Definindo o esquema
+    )
     __tablename__ = "vendas_raw"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -19,6 +23,8 @@ class VendasRaw(Base):
     dados_json = Column(JSONB, nullable=False)  # JSONB é melhor que String para JSON. Nulllable é para dizer que a coluna não pode ser nula. Dados brutos do contato
     data_ingestao = Column(DateTime, default=datetime.now)  # Data de quando foi ingerido
     status_processamento = Column(String(20), default='pendente')  # Para controle de processamento - Saber o que ja virou dim_vendas (na hora de processar)
+    hash_resumo = Column(String(32))  # md5 do JSON resumido da listagem - sinal de mudança do pedido
+    hash_resumo_detalhado = Column(String(32))  # hash_resumo no momento da última busca de detalhes (itens)
 
     def __repr__(self):
         return f"<VendasRaw(bling_id={self.bling_id}, data_ingestao={self.data_ingestao})>"
\ No newline at end of file
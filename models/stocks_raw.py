@@ -1,7 +1,7 @@
 # Responsável por: definir a estrutura da tabela estoque_raw
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, BigInteger, DateTime
+from sqlalchemy import Column, Integer, String, BigInteger, Boolean, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import JSONB  # Importa JSONB (Mais rápido e ja convertido)
 from config.database import Base
 
@@ -11,7 +11,11 @@ from config.database import Base
 
 # Definindo o modelo da tabela para dados brutos (raw)
 class EstoqueRaw(Base):
-    __table_args__ = {"schema": "raw"} # Definindo o esquema 
+    __table_args__ = (
+        # Índice parcial: só linhas pendentes (filtro de todos os transformadores) - migrations/m001
+        Index("ix_estoque_raw_pendentes", "bling_id", postgresql_where=text("status_processamento = 'pendente'")),
+        {"schema": "raw"},  # Definindo o esquema
+    )
     __tablename__ = "estoque_raw"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -21,4 +25,23 @@ class EstoqueRaw(Base):
     status_processamento = Column(String(20), default='pendente')  # Para controle de processamento - Saber o que ja virou dim_estoque (na hora de processar)
 
     def __repr__(self):
-        return f"<EstoqueRaw(bling_id={self.bling_id}, data_ingestao={self.data_ingestao})>"
\ No newline at end of file
+        return f"<EstoqueRaw(bling_id={self.bling_id}, data_ingestao={self.data_ingestao})>"
+
+# =====================================================
+# 2. MODELO DA TABELA - EXECUÇÕES DA EXTRAÇÃO DE ESTOQUE
+# =====================================================
+
+# Uma linha por extração concluída: o início da última é a janela de "produtos alterados desde"
+# (data_ingestao do estoque_raw não avança quando nenhum saldo muda)
+class EstoqueExecucaoRaw(Base):
+    __table_args__ = {"schema": "raw"}
+    __tablename__ = "estoque_execucoes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    inicio_extracao = Column(DateTime, nullable=False, index=True)  # Início da execução (janela da próxima)
+    fim_extracao = Column(DateTime, default=datetime.now, nullable=False)
+    produtos_consultados = Column(Integer, nullable=False, default=0)
+    completo = Column(Boolean, nullable=False, default=False)  # True → consultou todos os produtos ativos
+
+    def __repr__(self):
+        return f"<EstoqueExecucaoRaw(inicio_extracao={self.inicio_extracao}, produtos={self.produtos_consultados})>"
@@ -0,0 +1,212 @@
+# =====================================================
+# TRANSFORMADOR DOS AGREGADOS DE VENDAS
+# =====================================================
+# Responsável por: manter as tabelas processed.agg_* (vendas diárias por canal,
+# marca/categoria e situação) recalculando só as datas tocadas em cada execução
+
+from datetime import datetime
+from sqlalchemy import text
+from config.database import obter_engine
+
+# =====================================================
+# 1. DEFINIÇÃO DOS AGREGADOS
+# =====================================================
+# tabela → SELECT que gera as linhas ({filtro} limita às datas recalculadas)
+
+AGREGADOS = {
+    "processed.agg_vendas_canal_dia": """
+        INSERT INTO processed.agg_vendas_canal_dia (
+            data, canal_id, quantidade_pedidos, quantidade_produtos,
+            valor_total, valor_frete, data_atualizacao
+        )
+        SELECT
+            fp.data_pedido,
+            COALESCE(fp.canal_id, 0),
+            COUNT(*),
+            COALESCE(SUM(fp.quantidade_produtos_total), 0),
+            COALESCE(SUM(fp.valor_total), 0),
+            COALESCE(SUM(fp.valor_frete), 0),
+            :agora
+        FROM processed.fato_pedidos fp
+        {filtro}
+        GROUP BY 1, 2
+    """,
+    "processed.agg_vendas_marca_categoria_dia": """
+        INSERT INTO processed.agg_vendas_marca_categoria_dia (
+            data, marca, categoria, quantidade_pedidos, quantidade_itens,
+            quantidade_vendida, valor_total, desconto_total, data_atualizacao
+        )
+        SELECT
+            fp.data_pedido,
+            COALESCE(NULLIF(dp.marca, ''), 'Sem marca'),
+            COALESCE(NULLIF(dp.categoria, ''), 'Sem categoria'),
+            COUNT(DISTINCT fi.pedido_id),
+            COUNT(*),
+            COALESCE(SUM(fi.quantidade), 0),
+            COALESCE(SUM(fi.preco_total), 0),
+            COALESCE(SUM(fi.desconto_valor), 0),
+            :agora
+        FROM processed.fato_itens_pedidos fi
+        INNER JOIN processed.fato_pedidos fp
+            ON fp.pedido_id = fi.pedido_id
+        LEFT JOIN processed.dim_produtos dp
+            ON dp.produto_id = fi.produto_id
+        {filtro}
+        GROUP BY 1, 2, 3
+    """,
+    "processed.agg_vendas_situacao_dia": """
+        INSERT INTO processed.agg_vendas_situacao_dia (
+            data, situacao, quantidade_pedidos, valor_total, data_atualizacao
+        )
+        SELECT
+            fp.data_pedido,
+            COALESCE(NULLIF(fp.situacao, ''), 'Sem situação'),
+            COUNT(*),
+            COALESCE(SUM(fp.valor_total), 0),
+            :agora
+        FROM processed.fato_pedidos fp
+        {filtro}
+        GROUP BY 1, 2
+    """,
+}
+
+
+def registrar_datas_pendentes(conn, datas):
+    """
+    Registra datas a recalcular que não aparecem mais nos fatos
+    (data antiga de um pedido que mudou de data) → lidas por datas_tocadas
+
+    Args:
+        conn: Conexão da mesma transação que altera o fato
+        datas: Lista de datas (date)
+    """
+    if not datas:
+        return
+
+    conn.execute(text("""
+        INSERT INTO processed.agg_datas_pendentes (data, data_registro)
+        SELECT DISTINCT d, NOW() FROM unnest(CAST(:datas AS date[])) AS d
+        ON CONFLICT (data) DO NOTHING
+    """), {"datas": list(datas)})
+
+# =====================================================
+# 2. CLASSE TRANSFORMADORA
+# =====================================================
+
+class AgregadosTransformer:
+    """
+    Mantém os agregados diários de vendas
+    - Pós-etapa do pipeline: recalcula só as datas de pedidos/itens gravados na execução
+    - Recalculo completo: main_transform_aggregates.py (ex: após reclassificar marcas)
+    """
+
+    def __init__(self):
+        self.engine = obter_engine()
+
+    # =====================================================
+    # 3. DATAS TOCADAS
+    # =====================================================
+
+    def datas_tocadas(self, desde):
+        """
+        Datas de pedido com pedidos ou itens gravados a partir de `desde`
+        + datas antigas de pedidos que mudaram de data (processed.agg_datas_pendentes)
+
+        Args:
+            desde: Início da execução do pipeline (datetime)
+
+        Returns:
+            list: Datas (date) a recalcular
+        """
+        with self.engine.connect() as conn:
+            return list(conn.execute(text("""
+                SELECT data_pedido
+                FROM processed.fato_pedidos
+                WHERE data_processamento >= :desde
+                UNION
+                SELECT fp.data_pedido
+                FROM processed.fato_itens_pedidos fi
+                INNER JOIN processed.fato_pedidos fp
+                    ON fp.pedido_id = fi.pedido_id
+                WHERE fi.data_processamento >= :desde
+                UNION
+                SELECT data
+                FROM processed.agg_datas_pendentes
+            """), {"desde": desde}).scalars())
+
+    # =====================================================
+    # 4. RECALCULAR
+    # =====================================================
+
+    def recalcular(self, conn, datas=None):
+        """
+        Apaga e recalcula as linhas dos agregados das datas informadas
+
+        Args:
+            conn: Conexão dentro de uma transação (dashboards nunca veem a data pela metade)
+            datas: Lista de datas; None → recalcula tudo
+
+        Returns:
+            dict: {tabela: linhas geradas}
+        """
+        agora = datetime.now()
+        resultado = {}
+
+        for tabela, insert_sql in AGREGADOS.items():
+            if datas is None:
+                conn.execute(text(f"DELETE FROM {tabela}"))
+                filtro = ""
+                parametros = {"agora": agora}
+            else:
+                conn.execute(text(f"DELETE FROM {tabela} WHERE data = ANY(:datas)"), {"datas": datas})
+                filtro = "WHERE fp.data_pedido = ANY(:datas)"
+                parametros = {"agora": agora, "datas": datas}
+
+            resultado[tabela] = conn.execute(text(insert_sql.format(filtro=filtro)), parametros).rowcount
+            print(f"   ✓ {tabela}: {resultado[tabela]} linhas")
+
+        return resultado
+
+    # =====================================================
+    # 5. EXECUTAR
+    # =====================================================
+
+    def atualizar_datas_tocadas(self, desde):
+        """
+        Pós-etapa do pipeline: recalcula apenas as datas tocadas desde `desde`
+        """
+        print("\n📊 ATUALIZANDO AGREGADOS DE VENDAS...")
+
+        inicio = datetime.now()
+        datas = self.datas_tocadas(desde)
+
+        if not datas:
+            print("✅ Nenhuma data alterada - agregados já estão atualizados")
+            return 0
+
+        print(f"📅 {len(datas)} datas a recalcular ({min(datas)} até {max(datas)})")
+
+        with self.engine.begin() as conn:
+            self.recalcular(conn, datas)
+            conn.execute(
+                text("DELETE FROM processed.agg_datas_pendentes WHERE data = ANY(:datas)"),
+                {"datas": datas}
+            )
+
+        print(f"✅ Agregados atualizados em {datetime.now() - inicio}")
+        return len(datas)
+
+    def executar_transformacao_completa(self):
+        """
+        Recalcula todos os agregados a partir dos fatos
+        """
+        print("\n📊 RECALCULANDO TODOS OS AGREGADOS DE VENDAS...")
+
+        inicio = datetime.now()
+
+        with self.engine.begin() as conn:
+            resultado = self.recalcular(conn, datas=None)
+            conn.execute(text("DELETE FROM processed.agg_datas_pendentes"))
+
+        print(f"✅ Agregados recalculados em {datetime.now() - inicio}")
+        return resultado
@@ -8,7 +8,8 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from sqlalchemy import text
-from config.database import Session, engine
+from config.database import Session, obter_engine
+from transform.normalization import strings_vazias_para_nan
 
 # =====================================================
 # 1. CLASSE TRANSFORMADORA
@@ -21,7 +22,7 @@ class CanaisTransformer:
     """
 
     def __init__(self):
-        self.engine = engine
+        self.engine = obter_engine()
 
     # =====================================================
     # 2. EXTRAIR DADOS RAW
@@ -81,9 +82,7 @@ class CanaisTransformer:
 
         # === LIMPAR STRINGS VAZIAS ===
         print("   • Limpando strings vazias...")
-        for coluna in df.select_dtypes(include=["object"]).columns:
-            df[coluna] = df[coluna].replace(r"^\s*$", np.nan, regex=True)
-            df[coluna] = df[coluna].replace(["", " "], np.nan)
+        df = strings_vazias_para_nan(df)
 
         # === RENOMEAR COLUNAS ===
         print("   • Renomeando colunas...")
@@ -184,7 +183,7 @@ class CanaisTransformer:
 
             # Verificar total na tabela
             query = text("SELECT COUNT(*) FROM processed.dim_canais")
-            with engine.connect() as conn:
+            with self.engine.connect() as conn:
                 total = conn.execute(query).scalar()
                 print(f"✅ Verificação: {total} registros na tabela")
 
@@ -0,0 +1,132 @@
+# =====================================================
+# LIMPEZA VETORIZADA DE CONTATOS
+# =====================================================
+# Responsável por: limpar e padronizar colunas de contatos com métodos .str do pandas
+# (uma passada por coluna, padrões compilados uma única vez)
+
+import re
+import numpy as np
+import pandas as pd
+
+# =====================================================
+# 1. PADRÕES COMPILADOS
+# =====================================================
+
+PADRAO_CARACTERES_ESPECIAIS = re.compile(r"[^a-zA-Z0-9\s\-]")  # Manter letras, números, espaços e hífen
+PADRAO_ESPACOS = re.compile(r"\s+")
+PADRAO_NAO_DIGITOS = re.compile(r"\D")
+PADRAO_CEP = re.compile(r"^(\d{2})(\d{3})(\d{3})$")
+PADRAO_CELULAR = re.compile(r"^(\d{2})(\d{5})(\d{4})$")
+PADRAO_FIXO = re.compile(r"^(\d{2})(\d{4})(\d{4})$")
+
+# Sufixos empresariais, aplicados NESTA ordem (a ordem altera o resultado)
+SUFIXOS_EMPRESARIAIS = [
+    (re.compile(rf"\s*-?\s*({re.escape(sufixo)})(?:\s+.*)?$", re.IGNORECASE), f" - {sufixo.upper()}")
+    for sufixo in ["Epp", "Ltda", "Eireli", "Ltd", "Limitada"]
+]
+
+# =====================================================
+# 2. FUNÇÕES AUXILIARES
+# =====================================================
+
+def _como_texto(serie):
+    """
+    Converte os valores preenchidos para str, mantendo NaN onde não há valor
+    """
+    return serie.astype(object).where(serie.isna(), serie.astype(str))
+
+
+def _apenas_digitos(serie):
+    """Remove tudo que não for dígito (NaN continua NaN)"""
+    return _como_texto(serie).str.replace(PADRAO_NAO_DIGITOS, "", regex=True)
+
+
+def _vazio_para_nan(serie):
+    """Troca strings vazias por NaN"""
+    return serie.mask(serie.eq(""))
+
+# =====================================================
+# 3. LIMPEZAS
+# =====================================================
+
+def limpar_nomes(serie):
+    """
+    Limpa e padroniza nomes:
+    - Remove caracteres especiais e espaços múltiplos
+    - Title Case
+    - Padroniza sufixos empresariais (ex: "Empresa ltda" → "Empresa - LTDA")
+    """
+    nomes = _como_texto(serie).str.strip()
+    nomes = nomes.str.replace(PADRAO_CARACTERES_ESPECIAIS, " ", regex=True)
+    nomes = nomes.str.replace(PADRAO_ESPACOS, " ", regex=True).str.strip()
+    nomes = nomes.str.title()
+
+    for padrao, substituto in SUFIXOS_EMPRESARIAIS:
+        nomes = nomes.str.replace(padrao, substituto, regex=True)
+
+    return _vazio_para_nan(nomes.str.strip())
+
+
+def padronizar_cpf_cnpj(serie):
+    """
+    Padroniza CPF/CNPJ com zeros à esquerda (11 ou 14 dígitos)
+    Documentos com mais de 14 dígitos viram NaN
+    """
+    documentos = _apenas_digitos(serie)
+    tamanho = documentos.str.len()
+
+    resultado = np.select(
+        [tamanho.eq(0), tamanho.le(11), tamanho.le(14)],
+        [np.nan, documentos.str.zfill(11), documentos.str.zfill(14)],
+        default=np.nan,
+    )
+
+    return pd.Series(resultado, index=serie.index, dtype=object)
+
+
+def determinar_tipo_pessoa(tipo_pessoa, cpf_cnpj):
+    """
+    Determina tipo de pessoa baseado no CPF/CNPJ (já padronizado):
+    - Mantém "F"/"J" se já estiver preenchido
+    - 11 dígitos (CPF) → "F" (Pessoa Física)
+    - 14 dígitos (CNPJ) → "J" (Pessoa Jurídica)
+    - Sem documento ou documento inválido → NaN
+    """
+    tamanho = cpf_cnpj.str.len()
+
+    resultado = np.select(
+        [tipo_pessoa.isin(["F", "J"]), tamanho.eq(11), tamanho.eq(14)],
+        [tipo_pessoa, "F", "J"],
+        default=np.nan,
+    )
+
+    return pd.Series(resultado, index=tipo_pessoa.index, dtype=object)
+
+
+def padronizar_ceps(serie):
+    """Padroniza CEP no formato xx.xxx-xx (CEPs sem exatamente 8 dígitos viram NaN)"""
+    ceps = _apenas_digitos(serie)
+
+    return ceps.str.replace(PADRAO_CEP, r"\1.\2-\3", regex=True).where(ceps.str.len().eq(8))
+
+
+def padronizar_telefones(serie):
+    """
+    Formata telefone como:
+    - Celular: (XX) XXXXX-XXXX (11 dígitos)
+    - Fixo: (XX) XXXX-XXXX (10 dígitos)
+    Outros tamanhos viram NaN
+    """
+    telefones = _apenas_digitos(serie)
+    tamanho = telefones.str.len()
+
+    resultado = np.select(
+        [tamanho.eq(11), tamanho.eq(10)],
+        [
+            telefones.str.replace(PADRAO_CELULAR, r"(\1) \2-\3", regex=True),
+            telefones.str.replace(PADRAO_FIXO, r"(\1) \2-\3", regex=True),
+        ],
+        default=np.nan,
+    )
+
+    return pd.Series(resultado, index=serie.index, dtype=object)
@@ -6,10 +6,19 @@
 
 import pandas as pd
 import numpy as np
-import re
 from datetime import datetime
 from sqlalchemy import text
-from config.database import Session, engine
+from config.database import Session, obter_engine
+from core.lookup_cache import cache_contatos
+from transform.normalization import strings_vazias_para_nan
+from transform.projection import selecao_campos_json
+from transform.contacts_cleaning import (
+    limpar_nomes,
+    padronizar_cpf_cnpj,
+    determinar_tipo_pessoa,
+    padronizar_ceps,
+    padronizar_telefones,
+)
 
 # =====================================================
 # 1. CONECTANDO AO BANCO E IMPORTAR DADOS
@@ -22,8 +31,19 @@ class ContatosTransformer:
     Aplica todas as limpezas e padronizações necessárias
     """
 
+    # Caminhos do dados_json usados na transformação (só eles são lidos do banco)
+    CAMPOS_JSON = [
+        "nome",
+        "tipo",
+        "numeroDocumento",
+        "telefone",
+        "endereco.geral.municipio",
+        "endereco.geral.uf",
+        "endereco.geral.cep",
+    ]
+
     def __init__(self):
-        self.engine = engine
+        self.engine = obter_engine()
 
     # Buscar dados da tabela contatos_raw
     def extrair_dados_raw(self):
@@ -32,53 +52,24 @@ class ContatosTransformer:
         """
         print("\n1️⃣ EXTRAINDO DADOS DE RAW.CONTATOS_RAW...")
 
-        query = """
+        query = f"""
             SELECT 
                 id,
                 bling_id,
-                dados_json,
-                data_ingestao
+                data_ingestao,
+                {selecao_campos_json(self.CAMPOS_JSON)}
             FROM raw.contatos_raw
             WHERE status_processamento = 'pendente'
             ORDER BY bling_id
         """
 
         df_raw = pd.read_sql(query, self.engine)
-        print(f"✅ {len(df_raw)} registros extraídos (status = 'pendente')")
+        print(f"✅ {len(df_raw)} registros extraídos (status = 'pendente') com {len(self.CAMPOS_JSON)} campos do JSON")
 
         return df_raw
 
 # =====================================================
-# 2. EXPANDIR JSON EM COLUNAS
-# =====================================================
-
-    def expandir_json(self, df_raw):
-        """
-        Expande o JSON em colunas
-        """
-        print("\n2️⃣ EXPANDINDO JSON EM COLUNAS...")
-
-        # Normalizar o JSON principal
-        df_json = pd.json_normalize(df_raw["dados_json"])
-
-        # Renomear 'id' do JSON para 'id_bling' para não dar divergência
-        if "id" in df_json.columns:
-            df_json = df_json.rename(columns={"id": "id_bling"})
-
-        # Combinar com as colunas originais
-        df = pd.concat(
-            [
-                df_raw[["id", "bling_id", "data_ingestao"]],
-                df_json,
-            ],
-            axis=1,
-        )
-
-        print(f"✅ JSON expandido! {len(df.columns)} colunas disponíveis")
-        return df
-
-# =====================================================
-# 3. LIMPEZA DE DADOS
+# 2. LIMPEZA DE DADOS
 # =====================================================
 
     def aplicar_limpezas(self, df):
@@ -86,57 +77,7 @@ class ContatosTransformer:
         Aplica TODAS as limpezas e transformações
         SEGUINDO OS ARQUIVOS DO ANALYSIS/ QUE FIZ PARA TESTES E VALIDAÇÕES
         """
-        print("\n3️⃣ APLICANDO LIMPEZAS E TRANSFORMAÇÕES...")
-
-        # === REMOVER COLUNAS DESNECESSÁRIAS ===
-        print("   • Removendo colunas desnecessárias...")
-        colunas_remover = [
-            "ie",
-            "rg",
-            "email",
-            "codigo",
-            "celular",
-            "id_bling",
-            "fantasia",
-            "situacao",
-            "pais.nome",
-            "indicadorIe",
-            "vendedor.id",
-            "orgaoEmissor",
-            "tiposContato",
-            "pessoasContato",
-            "emailNotaFiscal",
-            "inscricaoMunicipal",
-            "dadosAdicionais.sexo",
-            "endereco.cobranca.uf",
-            "endereco.cobranca.cep",
-            "endereco.geral.bairro",
-            "endereco.geral.numero",
-            "endereco.geral.endereco",
-            "financeiro.categoria.id",
-            "financeiro.limiteCredito",
-            "endereco.cobranca.bairro",
-            "endereco.cobranca.numero",
-            "endereco.cobranca.endereco",
-            "endereco.geral.complemento",
-            "endereco.cobranca.municipio",
-            "financeiro.condicaoPagamento",
-            "dadosAdicionais.naturalidade",
-            "endereco.cobranca.complemento",
-            "dadosAdicionais.dataNascimento",
-            "endereco_estruturado.tem_endereco",
-            "endereco_estruturado.data_processamento",
-            "endereco_estruturado.endereco_detalhado.cep",
-            "endereco_estruturado.endereco_detalhado.pais",
-            "endereco_estruturado.endereco_detalhado.cidade",
-            "endereco_estruturado.endereco_detalhado.estado",
-            "endereco_estruturado.endereco_detalhado.numero",
-            "endereco_estruturado.endereco_detalhado.bairro",
-            "endereco_estruturado.endereco_completo_formatado",
-            "endereco_estruturado.endereco_detalhado.logradouro",
-            "endereco_estruturado.endereco_detalhado.complemento",
-        ]
-        df = df.drop(columns=[col for col in colunas_remover if col in df.columns])
+        print("\n2️⃣ APLICANDO LIMPEZAS E TRANSFORMAÇÕES...")
 
         # === RENOMEAR COLUNAS ===
         print("   • Renomeando colunas...")
@@ -154,27 +95,24 @@ class ContatosTransformer:
 
         # === CONVERTENDO E PADRONIZANDO STRINGS VAZIAS, ESPAÇOS, NONE PARA NaN ===
         print("   • Convertendo strings vazias para NaN...")
-        for coluna in df.select_dtypes(include=["object"]).columns:
-            df[coluna] = df[coluna].replace(r"^\s*$", np.nan, regex=True)
-            df[coluna] = df[coluna].replace("", np.nan)
-            df[coluna] = df[coluna].replace(" ", np.nan)
+        df = strings_vazias_para_nan(df)
 
         # === LIMPAR E PADRONIZAR NOMES ===
         print("   • Limpando e padronizando nomes...")
-        df["nome"] = df["nome"].apply(self._limpar_nome)
-        df["cpf_cnpj"] = df["cpf_cnpj"].apply(self._padronizar_cpf_cnpj)
+        df["nome"] = limpar_nomes(df["nome"])
+        df["cpf_cnpj"] = padronizar_cpf_cnpj(df["cpf_cnpj"])
 
         # === DETERMINAR TIPO DE PESSOA ===
         print("   • Determinando tipo de pessoa...")
-        df["tipo_pessoa"] = df.apply(self._determinar_tipo_pessoa, axis=1)
+        df["tipo_pessoa"] = determinar_tipo_pessoa(df["tipo_pessoa"], df["cpf_cnpj"])
 
         # === PADRONIZAR CEP ===
         print("   • Padronizando CEP...")
-        df["cep"] = df["cep"].apply(self._padronizar_cep)
+        df["cep"] = padronizar_ceps(df["cep"])
 
         # === PADRONIZAR TELEFONE ===
         print("   • Padronizando telefone...")
-        df["telefone"] = df["telefone"].apply(self._padronizar_telefone)
+        df["telefone"] = padronizar_telefones(df["telefone"])
 
         # === ADICIONAR METADADOS ===
         print("   • Adicionando metadados de processamento...")
@@ -183,122 +121,15 @@ class ContatosTransformer:
         print("✅ Todas as limpezas aplicadas com sucesso!")
         return df
 
-    def _limpar_nome(self, nome):
-        """Limpa e padroniza nomes"""
-        if pd.isna(nome):
-            return np.nan
-        
-        nome = str(nome).strip()
-        nome = re.sub(r'[^a-zA-Z0-9\s\-]', ' ', nome) # Remover caracteres especiais (manter letras, números, espaços e hífen)
-        nome = ' '.join(nome.split()) # Remover espaços múltiplos
-        nome = nome.title() # Capitalizar (Title Case)
-        
-        # Lista de sufixos empresariais
-        sufixos = ['Epp', 'Ltda', 'Eireli', 'Ltd', 'Limitada']
-        # Padronizar cada sufixo
-        for sufixo in sufixos:
-            sufixo_upper = sufixo.upper()
-            pattern = rf'\s*-?\s*({re.escape(sufixo)})(?:\s+.*)?$'
-            nome = re.sub(pattern, f' - {sufixo_upper}', nome, flags=re.IGNORECASE)
-
-        # Remover espaços extras no final
-        nome = nome.strip()
-        return nome if nome else np.nan
-
-    def _padronizar_cpf_cnpj(self, documento):
-        """Padroniza CPF/CNPJ com zeros à esquerda"""
-        if pd.isna(documento):
-            return np.nan
-
-        doc = re.sub(r"\D", "", str(documento).strip())  # Remover caracteres não numéricos
-
-        if not doc:
-            return np.nan
-
-        # Preencher com zeros
-        if len(doc) <= 11:
-            return doc.zfill(11)
-        elif len(doc) <= 14:
-            return doc.zfill(14)
-        else:
-            return np.nan
-
-    def _determinar_tipo_pessoa(self, row):
-        """
-        Determina tipo de pessoa baseado no CPF/CNPJ:
-        - 11 dígitos (CPF) → "F" (Pessoa Física)
-        - 14 dígitos (CNPJ) → "J" (Pessoa Jurídica)
-        - Mantém o valor existente se já estiver preenchido
-        """
-
-         # Se tipo_pessoa já está preenchido, manter
-        if pd.notna(row["tipo_pessoa"]) and row["tipo_pessoa"] in ["F", "J"]:
-            return row["tipo_pessoa"]
-
-        # Se não tem CPF/CNPJ, deixar vazio
-        if pd.isna(row["cpf_cnpj"]):
-            return np.nan
-
-        # Determinar baseado no tamanho do documento
-        tamanho = len(str(row["cpf_cnpj"]))
-
-        if tamanho == 11:
-            return "F" # CPF = Pessoa Física
-        elif tamanho == 14:
-            return "J" # CNPJ = Pessoa Jurídica
-        else:
-            return np.nan # Documento inválido
-
-    def _padronizar_cep(self, cep):
-        """Padroniza CEP no formato xx.xxx-xx"""
-        if pd.isna(cep):
-            return np.nan
-
-        # Remover todos os caracteres não numéricos
-        cep_numeros = re.sub(r"\D", "", str(cep).strip())
-
-        # Se não tiver exatamente 8 dígitos, retornar vazio
-        if len(cep_numeros) != 8:
-            return np.nan
-
-        return f"{cep_numeros[:2]}.{cep_numeros[2:5]}-{cep_numeros[5:]}"
-
-    def _padronizar_telefone(self, telefone):
-        """
-        Formata telefone como:
-        - Celular: (XX) XXXXX-XXXX (11 dígitos)
-        - Fixo: (XX) XXXX-XXXX (10 dígitos)
-        """
-        if pd.isna(telefone):
-            return np.nan
-
-        # Remover caracteres não numéricos
-        tel_num = re.sub(r"\D", "", str(telefone).strip())
-
-        if not tel_num:
-            return np.nan
-
-        tamanho = len(tel_num)
-
-        if tamanho == 11:
-            # Celular
-            return f"({tel_num[:2]}) {tel_num[2:7]}-{tel_num[7:]}"
-        elif tamanho == 10:
-            # Fixo
-            return f"({tel_num[:2]}) {tel_num[2:6]}-{tel_num[6:]}"
-        else:
-            # Inválido
-            return np.nan
-
 # =====================================================
-# 4. PREPARANDO DADOS PARA EXPORTAÇÃO
+# 3. PREPARANDO DADOS PARA EXPORTAÇÃO
 # =====================================================
 
     def preparar_para_exportacao(self, df):
         """
         Ordena colunas e prepara DataFrame final
         """
-        print("\n4️⃣ PREPARANDO DADOS PARA EXPORTAÇÃO...")
+        print("\n3️⃣ PREPARANDO DADOS PARA EXPORTAÇÃO...")
 
         colunas_finais = [
             # IDs e Metadados
@@ -327,14 +158,14 @@ class ContatosTransformer:
         return df
 
 # =====================================================
-# 5. EXECUTANDO VALIDAÇÃO DE DADOS
+# 4. EXECUTANDO VALIDAÇÃO DE DADOS
 # =====================================================
 
     def validar_dados(self, df):
         """
         Executa validações de qualidade
         """
-        print("\n5️⃣ EXECUTANDO VALIDAÇÕES DE QUALIDADE...")
+        print("\n4️⃣ EXECUTANDO VALIDAÇÕES DE QUALIDADE...")
 
         total = len(df)
         com_nome = df["nome"].notna().sum()
@@ -368,7 +199,7 @@ class ContatosTransformer:
         """
         Exporta dados para processed.dim_contatos
         """
-        print("\n6️⃣ EXPORTANDO PARA PROCESSED.DIM_CONTATOS...")
+        print("\n5️⃣ EXPORTANDO PARA PROCESSED.DIM_CONTATOS...")
 
         try:
             # IMPORTANTE: Use 'replace' na PRIMEIRA execução
@@ -385,9 +216,12 @@ class ContatosTransformer:
 
             print(f"✅ {len(df)} registros exportados com sucesso!")
 
+            # dim_contatos mudou → mapeamento de clientes em memória precisa ser relido
+            cache_contatos.marcar_desatualizado()
+
             # Verificar
             query = text("SELECT COUNT(*) FROM processed.dim_contatos")
-            with engine.connect() as conn:
+            with self.engine.connect() as conn:
                 total = conn.execute(query).scalar()
                 print(f"✅ Verificação: {total} registros na tabela")
 
@@ -405,7 +239,7 @@ class ContatosTransformer:
         """
         Atualiza status dos registros processados em raw.contatos_raw
         """
-        print("\n7️⃣ ATUALIZANDO STATUS NA TABELA RAW...")
+        print("\n6️⃣ ATUALIZANDO STATUS NA TABELA RAW...")
 
         session = Session()
 
@@ -448,22 +282,19 @@ class ContatosTransformer:
                 print("   Todos os contatos já foram transformados.")
                 return
 
-            # 2. Expandir JSON
-            df = self.expandir_json(df_raw)
-
-            # 3. Aplicar limpezas
-            df = self.aplicar_limpezas(df)
+            # 2. Aplicar limpezas (campos do JSON já vêm projetados do banco)
+            df = self.aplicar_limpezas(df_raw)
 
-            # 4. Preparar para exportação
+            # 3. Preparar para exportação
             df = self.preparar_para_exportacao(df)
 
-            # 5. Validar
+            # 4. Validar
             df = self.validar_dados(df)
 
-            # 6. Exportar
+            # 5. Exportar
             total_exportado = self.exportar_para_processed(df)
 
-            # 7. Atualizar status
+            # 6. Atualizar status
             self.atualizar_status_raw(df)
 
             # Relatório final
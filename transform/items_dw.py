@@ -8,7 +8,10 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from sqlalchemy import text
-from config.database import Session, engine
+from config.database import Session, obter_engine
+from core.lookup_cache import cache_produtos
+from config.settings import obter_configuracoes
+from transform.staging import carregar_staging
 
 # =====================================================
 # 1. CLASSE TRANSFORMADORA
@@ -20,8 +23,47 @@ class ItensTransformer:
     Extrai itens do JSON de vendas_raw e cria registros individuais
     """
 
-    def __init__(self):
-        self.engine = engine
+    # Colunas geradas pela explosão (mesma ordem em todos os modos)
+    COLUNAS_ITENS = [
+        'pedido_id',
+        'bling_item_id',
+        'bling_produto_id',
+        'descricao_item',
+        'codigo_produto',
+        'quantidade',
+        'preco_unitario',
+        'desconto_valor',
+    ]
+
+    def __init__(self, resolucao_chaves=None, explosao_itens=None, estrategia_itens=None, motor=None):
+        """
+        Args:
+            resolucao_chaves: "python" (mapa em memória) ou "sql" (JOIN com dim_produtos no merge)
+            explosao_itens: "python", "pandas" ou "sql" (como o array de itens vira linhas)
+            estrategia_itens: "substituir" (recarrega pedidos com itens alterados) ou "inserir_novos"
+            motor: "pandas" (transforma no Python, útil para depuração) ou "sql" (tudo no banco)
+            (omitidos → valores do .env: RESOLUCAO_CHAVES, EXPLOSAO_ITENS, ESTRATEGIA_ITENS, MOTOR_TRANSFORMACAO)
+        """
+        configuracoes = obter_configuracoes()
+        resolucao_chaves = resolucao_chaves or configuracoes.resolucao_chaves
+        explosao_itens = explosao_itens or configuracoes.explosao_itens
+        estrategia_itens = estrategia_itens or configuracoes.estrategia_itens
+        motor = motor or configuracoes.motor_transformacao
+
+        if resolucao_chaves not in ("python", "sql"):
+            raise ValueError(f"resolucao_chaves inválida: {resolucao_chaves} (use 'python' ou 'sql')")
+        if explosao_itens not in ("python", "pandas", "sql"):
+            raise ValueError(f"explosao_itens inválida: {explosao_itens} (use 'python', 'pandas' ou 'sql')")
+        if estrategia_itens not in ("substituir", "inserir_novos"):
+            raise ValueError(f"estrategia_itens inválida: {estrategia_itens} (use 'substituir' ou 'inserir_novos')")
+        if motor not in ("pandas", "sql"):
+            raise ValueError(f"motor inválido: {motor} (use 'pandas' ou 'sql')")
+
+        self.engine = obter_engine()
+        self.motor = motor
+        self.resolucao_chaves = resolucao_chaves
+        self.explosao_itens = explosao_itens
+        self.estrategia_itens = estrategia_itens
 
     # =====================================================
     # 2. EXTRAIR DADOS DE VENDAS_RAW
@@ -31,24 +73,53 @@ class ItensTransformer:
         """
         Extrai vendas que já foram processadas em fato_pedidos
         e que possuem itens no JSON
+
+        Na estratégia "substituir", só traz os pedidos cujo hash do array de itens
+        difere do fato_pedidos.hash_itens gravado na última carga (inclusive pedidos
+        que ficaram sem itens mas ainda têm linhas em fato_itens_pedidos, para que
+        os itens antigos sejam apagados)
         """
         print("\n1️⃣ EXTRAINDO VENDAS COM ITENS DE RAW.VENDAS_RAW...")
 
-        query = """
+        # Se os itens são explodidos no banco → não precisa trazer o JSON
+        itens_no_banco = self.explosao_itens == "sql" or self.motor == "sql"
+        coluna_itens = "" if itens_no_banco else "vr.dados_json->'itens' as itens_json,"
+
+        if self.estrategia_itens == "substituir":
+            filtro = """
+            AND fp.hash_itens IS DISTINCT FROM md5((vr.dados_json->'itens')::text)
+            AND (
+                jsonb_array_length(vr.dados_json->'itens') > 0
+                OR EXISTS (
+                    SELECT 1
+                    FROM processed.fato_itens_pedidos fi
+                    WHERE fi.pedido_id = fp.pedido_id
+                )
+            )
+            """
+        else:
+            filtro = "AND jsonb_array_length(vr.dados_json->'itens') > 0"
+
+        query = f"""
             SELECT 
                 vr.bling_id as bling_pedido_id,
-                vr.dados_json->'itens' as itens_json,
+                {coluna_itens}
+                md5((vr.dados_json->'itens')::text) as hash_itens,
                 fp.pedido_id
             FROM raw.vendas_raw vr
             INNER JOIN processed.fato_pedidos fp 
                 ON vr.bling_id = fp.bling_pedido_id
             WHERE vr.dados_json->'itens' IS NOT NULL
-            AND jsonb_array_length(vr.dados_json->'itens') > 0
+            {filtro}
             ORDER BY fp.pedido_id
         """
 
         df_vendas = pd.read_sql(query, self.engine)
-        print(f"✅ {len(df_vendas)} pedidos com itens encontrados")
+
+        if self.estrategia_itens == "substituir":
+            print(f"✅ {len(df_vendas)} pedidos com itens novos ou alterados encontrados")
+        else:
+            print(f"✅ {len(df_vendas)} pedidos com itens encontrados")
 
         return df_vendas
 
@@ -62,9 +133,27 @@ class ItensTransformer:
         
         Exemplo:
         Pedido 1 com 3 itens → 3 linhas na tabela fato_itens_pedidos
+
+        O modo vem de explosao_itens ("python", "pandas" ou "sql")
         """
-        print("\n2️⃣ EXPLODINDO ARRAY DE ITENS...")
+        print(f"\n2️⃣ EXPLODINDO ARRAY DE ITENS (modo: {self.explosao_itens})...")
+
+        if self.explosao_itens == "sql":
+            df_itens = self._explodir_itens_sql(df_vendas)
+        elif self.explosao_itens == "pandas":
+            df_itens = self._explodir_itens_pandas(df_vendas)
+        else:
+            df_itens = self._explodir_itens_python(df_vendas)
 
+        print(f"✅ {len(df_itens)} itens extraídos de {len(df_vendas)} pedidos")
+        print(f"   Média de {len(df_itens)/len(df_vendas):.1f} itens por pedido")
+
+        return df_itens
+
+    def _explodir_itens_python(self, df_vendas):
+        """
+        Explosão item a item em Python puro (modo original)
+        """
         # Lista para armazenar todos os itens
         itens_processados = []
 
@@ -88,13 +177,68 @@ class ItensTransformer:
                     itens_processados.append(item_processado)
 
         # Criar DataFrame com todos os itens
-        df_itens = pd.DataFrame(itens_processados)
-        
-        print(f"✅ {len(df_itens)} itens extraídos de {len(df_vendas)} pedidos")
-        print(f"   Média de {len(df_itens)/len(df_vendas):.1f} itens por pedido")
+        return pd.DataFrame(itens_processados, columns=self.COLUNAS_ITENS)
+
+    def _explodir_itens_pandas(self, df_vendas):
+        """
+        Explosão vetorizada: DataFrame.explode (1 linha por item) + json_normalize (1 coluna por campo)
+        """
+        df_explodido = df_vendas[['pedido_id', 'itens_json']].explode('itens_json', ignore_index=True)
+        df_explodido = df_explodido[df_explodido['itens_json'].notna()].reset_index(drop=True)
+
+        df_json = pd.json_normalize(df_explodido['itens_json'].tolist())
+        df_json = df_json.reindex(columns=['id', 'produto.id', 'descricao', 'codigo', 'quantidade', 'valor', 'desconto'])
+
+        df_itens = pd.DataFrame({
+            'pedido_id': df_explodido['pedido_id'],
+            'bling_item_id': df_json['id'],
+            'bling_produto_id': df_json['produto.id'],
+            'descricao_item': df_json['descricao'],
+            'codigo_produto': df_json['codigo'],
+            'quantidade': df_json['quantidade'].fillna(0),
+            'preco_unitario': df_json['valor'].fillna(0),
+            'desconto_valor': df_json['desconto'].fillna(0),
+        })
 
         return df_itens
 
+    def _explodir_itens_sql(self, df_vendas):
+        """
+        Explosão no banco: jsonb_to_recordset transforma o array de itens em linhas tipadas
+        """
+        query = text("""
+            SELECT
+                fp.pedido_id,
+                item.id AS bling_item_id,
+                (item.produto->>'id')::bigint AS bling_produto_id,
+                item.descricao AS descricao_item,
+                item.codigo AS codigo_produto,
+                COALESCE(item.quantidade, 0) AS quantidade,
+                COALESCE(item.valor, 0) AS preco_unitario,
+                COALESCE(item.desconto, 0) AS desconto_valor
+            FROM raw.vendas_raw vr
+            INNER JOIN processed.fato_pedidos fp
+                ON vr.bling_id = fp.bling_pedido_id
+            CROSS JOIN LATERAL jsonb_to_recordset(vr.dados_json->'itens') AS item(
+                id bigint,
+                produto jsonb,
+                descricao text,
+                codigo text,
+                quantidade numeric,
+                valor numeric,
+                desconto numeric
+            )
+            WHERE fp.pedido_id = ANY(:pedido_ids)
+            ORDER BY fp.pedido_id
+        """)
+
+        pedido_ids = [int(pedido_id) for pedido_id in df_vendas['pedido_id']]
+
+        with self.engine.connect() as conn:
+            df_itens = pd.read_sql(query, conn, params={"pedido_ids": pedido_ids})
+
+        return df_itens[self.COLUNAS_ITENS]
+
     # =====================================================
     # 4. MAPEAR PRODUTO_ID
     # =====================================================
@@ -102,20 +246,13 @@ class ItensTransformer:
     def mapear_produto_id(self, df_itens):
         """
         Busca o produto_id na dim_produtos usando o bling_produto_id
+        (mapeamento vem do cache compartilhado → não relê a dim_produtos inteira a cada chamada)
         """
         print("\n3️⃣ MAPEANDO PRODUTO_ID NA DIM_PRODUTOS...")
 
-        session = Session()
-
         try:
             # Buscar mapeamento de produtos
-            query = text("""
-                SELECT bling_produto_id, produto_id
-                FROM processed.dim_produtos
-            """)
-
-            resultado = session.execute(query)
-            mapa_produtos = {row.bling_produto_id: row.produto_id for row in resultado}
+            mapa_produtos = cache_produtos.obter()
 
             if mapa_produtos:
                 df_itens['produto_id'] = df_itens['bling_produto_id'].map(mapa_produtos)
@@ -138,8 +275,6 @@ class ItensTransformer:
         except Exception as e:
             print(f"   ⚠️  Erro ao mapear produtos: {e}")
             df_itens['produto_id'] = None
-        finally:
-            session.close()
 
         return df_itens
 
@@ -198,6 +333,11 @@ class ItensTransformer:
             'data_processamento'
         ]
 
+        # Chave de negócio só segue para o merge no banco (JOIN com dim_produtos);
+        # no modo python, fato_itens_pedidos não tem essa coluna
+        if self.resolucao_chaves == "sql":
+            colunas_finais.insert(2, 'bling_produto_id')
+
         df_itens = df_itens[[col for col in colunas_finais if col in df_itens.columns]]
 
         print(f"✅ {len(df_itens)} itens prontos para exportação")
@@ -214,7 +354,9 @@ class ItensTransformer:
         print("\n6️⃣ VALIDANDO DADOS...")
 
         total = len(df_itens)
-        com_produto = df_itens['produto_id'].notna().sum()
+        # No modo "sql" o produto_id ainda não foi resolvido → conta os que têm ID Bling
+        coluna_produto = 'produto_id' if 'produto_id' in df_itens.columns else 'bling_produto_id'
+        com_produto = df_itens[coluna_produto].notna().sum()
         com_quantidade = (df_itens['quantidade'] > 0).sum()
         com_preco = (df_itens['preco_unitario'] > 0).sum()
 
@@ -252,18 +394,21 @@ class ItensTransformer:
         session = Session()
 
         try:
-            # === BUSCAR ITENS EXISTENTES ===
+            # === BUSCAR ITENS EXISTENTES (SÓ DOS PEDIDOS DESTE LOTE) ===
             print("🔍 Buscando itens existentes para comparação...")
             inicio_busca = datetime.now()
 
+            pedido_ids = [int(pedido_id) for pedido_id in df_itens['pedido_id'].unique()]
+
             query = text("""
                 SELECT 
                     pedido_id,
                     bling_item_id
                 FROM processed.fato_itens_pedidos
+                WHERE pedido_id = ANY(:pedido_ids)
             """)
 
-            df_existentes = pd.read_sql(query, self.engine)
+            df_existentes = pd.read_sql(query, self.engine, params={"pedido_ids": pedido_ids})
             fim_busca = datetime.now()
 
             print(f"📋 {len(df_existentes)} itens existentes carregados em {fim_busca - inicio_busca}")
@@ -272,18 +417,12 @@ class ItensTransformer:
             print("🔍 Identificando itens novos...")
 
             if len(df_existentes) > 0:
-                # Criar chave composta para identificar duplicatas
-                df_existentes['chave'] = df_existentes['pedido_id'].astype(str) + '_' + df_existentes['bling_item_id'].astype(str)
-                df_itens_temp = df_itens.copy()
-                df_itens_temp['chave'] = df_itens_temp['pedido_id'].astype(str) + '_' + df_itens_temp['bling_item_id'].astype(str)
-
-                # Filtrar apenas novos
-                chaves_existentes = set(df_existentes['chave'])
-                df_novos = df_itens_temp[~df_itens_temp['chave'].isin(chaves_existentes)].copy()
-                
-                # Remover coluna auxiliar
-                if 'chave' in df_novos.columns:
-                    df_novos = df_novos.drop(columns=['chave'])
+                # Anti-join pela chave composta (pedido_id, bling_item_id) com MultiIndex
+                # (tipos alinhados em Int64 dos dois lados → sem conversão para string)
+                chaves_existentes = self._chaves_itens(df_existentes)
+                chaves_itens = self._chaves_itens(df_itens)
+
+                df_novos = df_itens[~chaves_itens.isin(chaves_existentes)].copy()
 
                 itens_ignorados = len(df_itens) - len(df_novos)
             else:
@@ -359,8 +498,331 @@ class ItensTransformer:
         finally:
             session.close()
 
+    def _chaves_itens(self, df):
+        """
+        Monta o MultiIndex (pedido_id, bling_item_id) usado no anti-join de itens existentes
+        """
+        return pd.MultiIndex.from_arrays([
+            pd.to_numeric(df['pedido_id'], errors='coerce').astype('Int64'),
+            pd.to_numeric(df['bling_item_id'], errors='coerce').astype('Int64'),
+        ])
+
     # =====================================================
-    # 9. EXECUTAR TRANSFORMAÇÃO COMPLETA
+    # 8.1. EXPORTAR COM RESOLUÇÃO DE CHAVES NO BANCO
+    # =====================================================
+
+    def exportar_para_processed_sql(self, df_itens):
+        """
+        Exporta itens resolvendo o produto_id no próprio banco
+        - Carrega o DataFrame na tabela temporária stg_fato_itens_pedidos
+        - INSERT ... SELECT com LEFT JOIN em dim_produtos
+        - NOT EXISTS ignora itens já existentes (mesma chave pedido_id + bling_item_id)
+        Tudo em uma única transação (staging temporária some no COMMIT)
+        """
+        print("\n7️⃣ EXPORTANDO PARA PROCESSED.FATO_ITENS_PEDIDOS (chaves resolvidas no banco)...")
+
+        if len(df_itens) == 0:
+            print("⚠️  Nenhum item para exportar")
+            return 0
+
+        inicio = datetime.now()
+
+        try:
+            with self.engine.begin() as conn:
+                tabela_staging = carregar_staging(conn, df_itens, "stg_fato_itens_pedidos")
+                print(f"📥 {len(df_itens)} itens carregados em {tabela_staging}")
+
+                query = self._sql_inserir_de_staging(tabela_staging, apenas_novos=True)
+
+                inseridos = conn.execute(query).rowcount
+
+            itens_ignorados = len(df_itens) - inseridos
+
+            print(f"\n📊 RESULTADO DO MERGE ({datetime.now() - inicio}):")
+            print(f"   • 🆕 Inseridos: {inseridos}")
+            print(f"   • ⏭️  Já existentes (ignorados): {itens_ignorados}")
+
+            with self.engine.connect() as conn:
+                total = conn.execute(text("SELECT COUNT(*) FROM processed.fato_itens_pedidos")).scalar()
+
+            print(f"\n🎉 EXPORTAÇÃO CONCLUÍDA!")
+            print(f"   • Total na tabela: {total}")
+
+            return inseridos
+
+        except Exception as e:
+            print(f"❌ ERRO ao exportar: {e}")
+            raise
+
+    def _sql_inserir_de_staging(self, tabela_staging, apenas_novos):
+        """
+        Monta o INSERT ... SELECT da staging para fato_itens_pedidos (produto_id via JOIN com dim_produtos)
+
+        Args:
+            apenas_novos: Se True, ignora itens que já existem (pedido_id + bling_item_id)
+        """
+        filtro = """
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM processed.fato_itens_pedidos f
+                WHERE f.pedido_id = s.pedido_id::integer
+                  AND f.bling_item_id IS NOT DISTINCT FROM s.bling_item_id::bigint
+            )
+        """ if apenas_novos else ""
+
+        return text(f"""
+            INSERT INTO processed.fato_itens_pedidos (
+                pedido_id, produto_id, bling_item_id, quantidade, preco_unitario,
+                preco_total, desconto_valor, descricao_item, data_processamento
+            )
+            SELECT
+                s.pedido_id::integer,
+                dp.produto_id,
+                s.bling_item_id::bigint,
+                s.quantidade,
+                s.preco_unitario,
+                s.preco_total,
+                s.desconto_valor,
+                s.descricao_item,
+                s.data_processamento
+            FROM {tabela_staging} s
+            LEFT JOIN processed.dim_produtos dp
+                ON dp.bling_produto_id = s.bling_produto_id::bigint
+            {filtro}
+        """)
+
+    # =====================================================
+    # 8.2. EXPORTAR SUBSTITUINDO OS ITENS DE CADA PEDIDO
+    # =====================================================
+
+    def exportar_substituindo_por_pedido(self, df_vendas, df_itens, pedidos_por_lote=500):
+        """
+        Recarrega os itens dos pedidos cujo array de itens mudou
+        Para cada lote de pedidos, em UMA transação:
+        1. DELETE dos itens atuais desses pedidos
+        2. INSERT dos itens novos (produto_id já mapeado ou via JOIN, conforme resolucao_chaves)
+        3. UPDATE de fato_pedidos.hash_itens → na próxima execução esses pedidos são ignorados
+
+        Args:
+            df_vendas: Pedidos selecionados (pedido_id + hash_itens)
+            df_itens: Itens explodidos e transformados desses pedidos
+            pedidos_por_lote: Quantidade de pedidos por transação
+
+        Returns:
+            int: Quantidade de itens inseridos
+        """
+        print("\n7️⃣ EXPORTANDO PARA PROCESSED.FATO_ITENS_PEDIDOS (substituição por pedido)...")
+
+        colunas_finais = [col for col in df_itens.columns if col != 'codigo_produto']
+        pedido_ids = [int(pedido_id) for pedido_id in df_vendas['pedido_id']]
+        hashes = df_vendas['hash_itens'].tolist()
+
+        total_removidos = 0
+        total_inseridos = 0
+        inicio = datetime.now()
+
+        try:
+            for i in range(0, len(pedido_ids), pedidos_por_lote):
+                ids_lote = pedido_ids[i:i + pedidos_por_lote]
+                hashes_lote = hashes[i:i + pedidos_por_lote]
+                itens_lote = df_itens[df_itens['pedido_id'].isin(ids_lote)][colunas_finais]
+
+                with self.engine.begin() as conn:
+                    # 1. Apagar itens atuais dos pedidos do lote
+                    removidos = conn.execute(
+                        text("DELETE FROM processed.fato_itens_pedidos WHERE pedido_id = ANY(:ids)"),
+                        {"ids": ids_lote}
+                    ).rowcount
+
+                    # 2. Inserir itens atuais
+                    if len(itens_lote) > 0:
+                        if self.resolucao_chaves == "sql":
+                            tabela_staging = carregar_staging(conn, itens_lote, "stg_fato_itens_pedidos")
+                            conn.execute(self._sql_inserir_de_staging(tabela_staging, apenas_novos=False))
+                        else:
+                            itens_lote.to_sql(
+                                name='fato_itens_pedidos',
+                                con=conn,
+                                schema='processed',
+                                if_exists='append',
+                                index=False,
+                                method='multi',
+                                chunksize=500
+                            )
+
+                    # 3. Registrar o hash dos itens carregados
+                    conn.execute(
+                        text("""
+                            UPDATE processed.fato_pedidos fp
+                            SET hash_itens = v.hash_itens
+                            FROM unnest(CAST(:ids AS integer[]), CAST(:hashes AS varchar[])) AS v(pedido_id, hash_itens)
+                            WHERE fp.pedido_id = v.pedido_id
+                        """),
+                        {"ids": ids_lote, "hashes": hashes_lote}
+                    )
+
+                total_removidos += removidos
+                total_inseridos += len(itens_lote)
+                print(f"   ✅ {min(i + pedidos_por_lote, len(pedido_ids))}/{len(pedido_ids)} pedidos recarregados...")
+
+            print(f"\n📊 RESULTADO ({datetime.now() - inicio}):")
+            print(f"   • 🗑️  Itens antigos removidos: {total_removidos}")
+            print(f"   • 🆕 Itens inseridos: {total_inseridos}")
+
+            with self.engine.connect() as conn:
+                total = conn.execute(text("SELECT COUNT(*) FROM processed.fato_itens_pedidos")).scalar()
+
+            print(f"\n🎉 EXPORTAÇÃO CONCLUÍDA!")
+            print(f"   • Total na tabela: {total}")
+
+            return total_inseridos
+
+        except Exception as e:
+            print(f"❌ ERRO ao exportar: {e}")
+            raise
+
+    # =====================================================
+    # 9. MOTOR SQL (TRANSFORMAÇÃO INTEIRA NO BANCO)
+    # =====================================================
+
+    def executar_transformacao_sql(self, df_vendas, pedidos_por_lote=1000):
+        """
+        Monta fato_itens_pedidos inteiramente no PostgreSQL, uma transação por lote de pedidos:
+        - jsonb_to_recordset explode dados_json->'itens'
+        - produto_id via JOIN com dim_produtos
+        - preco_total = ROUND(quantidade * preco_unitario - desconto, 2) (mesmos arredondamentos do pandas)
+        Estratégia "substituir": DELETE dos itens antigos, INSERT e hash_itens na mesma transação
+        Estratégia "inserir_novos": INSERT só dos itens que ainda não existem
+
+        Args:
+            df_vendas: Pedidos selecionados por extrair_vendas_com_itens (só pedido_id é usado)
+            pedidos_por_lote: Quantidade de pedidos por transação
+
+        Returns:
+            tuple: (itens removidos, itens inseridos)
+        """
+        print(f"\n🗄️  MONTANDO FATO_ITENS_PEDIDOS DIRETO NO BANCO (motor SQL, estratégia: {self.estrategia_itens})...")
+
+        substituir = self.estrategia_itens == "substituir"
+
+        # Statements separados na mesma transação: a ordem de CTEs irmãs que modificam dados
+        # não é definida no PostgreSQL → o DELETE precisa terminar antes do INSERT (uq_fato_itens_pedido_item)
+        remover = text("""
+            DELETE FROM processed.fato_itens_pedidos
+            WHERE pedido_id = ANY(:pedido_ids)
+        """)
+
+        if substituir:
+            filtro_novos = ""
+        else:
+            filtro_novos = """
+                WHERE NOT EXISTS (
+                    SELECT 1
+                    FROM processed.fato_itens_pedidos f
+                    WHERE f.pedido_id = p.pedido_id
+                      AND f.bling_item_id IS NOT DISTINCT FROM item.id
+                )
+            """
+
+        inserir = text(f"""
+            WITH pedidos AS (
+                SELECT
+                    fp.pedido_id,
+                    vr.dados_json->'itens' AS itens
+                FROM raw.vendas_raw vr
+                INNER JOIN processed.fato_pedidos fp
+                    ON vr.bling_id = fp.bling_pedido_id
+                WHERE fp.pedido_id = ANY(:pedido_ids)
+            ),
+            inseridos AS (
+                INSERT INTO processed.fato_itens_pedidos (
+                    pedido_id, produto_id, bling_item_id, quantidade, preco_unitario,
+                    preco_total, desconto_valor, descricao_item, data_processamento
+                )
+                SELECT
+                    p.pedido_id,
+                    dp.produto_id,
+                    item.id,
+                    ROUND(COALESCE(item.quantidade, 0), 3),
+                    ROUND(COALESCE(item.valor, 0), 2),
+                    ROUND(COALESCE(item.quantidade, 0) * COALESCE(item.valor, 0) - COALESCE(item.desconto, 0), 2),
+                    ROUND(COALESCE(item.desconto, 0), 2),
+                    item.descricao,
+                    :data_processamento
+                FROM pedidos p
+                CROSS JOIN LATERAL jsonb_to_recordset(p.itens) AS item(
+                    id bigint,
+                    produto jsonb,
+                    descricao text,
+                    quantidade numeric,
+                    valor numeric,
+                    desconto numeric
+                )
+                LEFT JOIN processed.dim_produtos dp
+                    ON dp.bling_produto_id = (item.produto->>'id')::bigint
+                {filtro_novos}
+                RETURNING produto_id
+            )
+            SELECT
+                COUNT(*) AS inseridos,
+                COUNT(*) FILTER (WHERE produto_id IS NULL) AS sem_produto
+            FROM inseridos
+        """)
+
+        registrar_hash = text("""
+            UPDATE processed.fato_pedidos fp
+            SET hash_itens = md5((vr.dados_json->'itens')::text)
+            FROM raw.vendas_raw vr
+            WHERE vr.bling_id = fp.bling_pedido_id
+              AND fp.pedido_id = ANY(:pedido_ids)
+        """)
+
+        pedido_ids = [int(pedido_id) for pedido_id in df_vendas['pedido_id']]
+        data_processamento = datetime.now()
+
+        total_removidos = 0
+        total_inseridos = 0
+        total_sem_produto = 0
+        inicio = datetime.now()
+
+        try:
+            for i in range(0, len(pedido_ids), pedidos_por_lote):
+                ids_lote = pedido_ids[i:i + pedidos_por_lote]
+
+                with self.engine.begin() as conn:
+                    # 1. Apagar itens atuais dos pedidos do lote
+                    removidos = conn.execute(remover, {"pedido_ids": ids_lote}).rowcount if substituir else 0
+
+                    # 2. Inserir itens atuais (explodidos e calculados no banco)
+                    resultado = conn.execute(inserir, {
+                        "pedido_ids": ids_lote,
+                        "data_processamento": data_processamento,
+                    }).one()
+
+                    # 3. Registrar o hash dos itens carregados
+                    if substituir:
+                        conn.execute(registrar_hash, {"pedido_ids": ids_lote})
+
+                total_removidos += removidos
+                total_inseridos += resultado.inseridos
+                total_sem_produto += resultado.sem_produto
+                print(f"   ✅ {min(i + pedidos_por_lote, len(pedido_ids))}/{len(pedido_ids)} pedidos processados...")
+
+            print(f"\n📊 RESULTADO ({datetime.now() - inicio}):")
+            if substituir:
+                print(f"   • 🗑️  Itens antigos removidos: {total_removidos}")
+            print(f"   • 🆕 Itens inseridos: {total_inseridos}")
+            if total_sem_produto > 0:
+                print(f"   ⚠️  {total_sem_produto} itens sem produto_id (produto não encontrado na dim_produtos)")
+
+            return total_removidos, total_inseridos
+
+        except Exception as e:
+            print(f"❌ ERRO na transformação SQL: {e}")
+            raise
+
+    # =====================================================
+    # 10. EXECUTAR TRANSFORMAÇÃO COMPLETA
     # =====================================================
 
     def executar_transformacao_completa(self):
@@ -378,27 +840,52 @@ class ItensTransformer:
             df_vendas = self.extrair_vendas_com_itens()
 
             if len(df_vendas) == 0:
-                print("\n⚠️  Nenhuma venda com itens encontrada")
-                print("💡 Execute primeiro: python main_transform_sales.py")
+                if self.estrategia_itens == "substituir":
+                    print("\n✅ Nenhum pedido com itens alterados desde a última carga!")
+                else:
+                    print("\n⚠️  Nenhuma venda com itens encontrada")
+                    print("💡 Execute primeiro: python main_transform_sales.py")
+                return
+
+            # Motor SQL: explosão, chaves, métricas e gravação acontecem no banco
+            if self.motor == "sql":
+                _, total_exportado = self.executar_transformacao_sql(df_vendas)
+
+                print(f"\n{'='*70}")
+                print(f"🎉 TRANSFORMAÇÃO CONCLUÍDA COM SUCESSO! (motor SQL)")
+                print(f"⏱️  Tempo total: {datetime.now() - inicio}")
+                print(f"{'='*70}")
+
+                print(f"\n📊 RESUMO FINAL:")
+                print(f"   • Pedidos processados: {len(df_vendas)}")
+                print(f"   • Itens inseridos: {total_exportado}")
                 return
 
             # 2. Explodir array de itens
             df_itens = self.explodir_itens(df_vendas)
 
-            # 3. Mapear produto_id
-            df_itens = self.mapear_produto_id(df_itens)
+            # Na estratégia "substituir" podem vir só pedidos que ficaram sem itens
+            if len(df_itens) > 0:
+                # 3. Mapear produto_id (no modo "sql" o JOIN com dim_produtos acontece no merge)
+                if self.resolucao_chaves == "python":
+                    df_itens = self.mapear_produto_id(df_itens)
 
-            # 4. Calcular métricas
-            df_itens = self.calcular_metricas(df_itens)
+                # 4. Calcular métricas
+                df_itens = self.calcular_metricas(df_itens)
 
-            # 5. Preparar para exportação
-            df_itens = self.preparar_para_exportacao(df_itens)
+                # 5. Preparar para exportação
+                df_itens = self.preparar_para_exportacao(df_itens)
 
-            # 6. Validar
-            df_itens = self.validar_dados(df_itens)
+                # 6. Validar
+                df_itens = self.validar_dados(df_itens)
 
             # 7. Exportar
-            total_exportado = self.exportar_para_processed(df_itens)
+            if self.estrategia_itens == "substituir":
+                total_exportado = self.exportar_substituindo_por_pedido(df_vendas, df_itens)
+            elif self.resolucao_chaves == "sql":
+                total_exportado = self.exportar_para_processed_sql(df_itens)
+            else:
+                total_exportado = self.exportar_para_processed(df_itens)
 
             # Relatório final
             fim = datetime.now()
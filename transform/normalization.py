@@ -0,0 +1,30 @@
+# =====================================================
+# NORMALIZAÇÃO COMPARTILHADA DOS TRANSFORMADORES
+# =====================================================
+# Responsável por: padronizações genéricas usadas por vários transformadores
+
+# =====================================================
+# 1. STRINGS VAZIAS → NaN
+# =====================================================
+
+def strings_vazias_para_nan(df):
+    """
+    Converte strings vazias ou só com espaços ("", " ", "\\t"...) em NaN
+    em todas as colunas de texto do DataFrame
+
+    Uma única passada por coluna (strip + máscara), sem regex
+    Valores que não são texto (números, listas, dicts) não são alterados
+    """
+    for coluna in df.select_dtypes(include=["object"]).columns:
+        serie = df[coluna]
+
+        try:
+            vazias = serie.str.strip().eq("")
+        except AttributeError:
+            # Coluna sem nenhum valor de texto (ex: só listas/dicts) → nada a limpar
+            continue
+
+        if vazias.any():
+            df[coluna] = serie.mask(vazias)
+
+    return df
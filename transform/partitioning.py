@@ -0,0 +1,70 @@
+# =====================================================
+# PARTIÇÕES MENSAIS DOS FATOS
+# =====================================================
+# Responsável por: detectar se um fato foi particionado (migrations/particionar_fatos.py)
+# e criar, antes de cada carga, as partições mensais dos meses que o lote vai tocar
+
+from datetime import date
+from sqlalchemy import text
+
+# =====================================================
+# 1. DETECTAR PARTICIONAMENTO
+# =====================================================
+
+def tabela_particionada(conexao, tabela):
+    """
+    Verifica se a tabela é particionada (PARTITION BY) no banco
+
+    Args:
+        conexao: Conexão aberta
+        tabela: Nome qualificado (ex: "processed.fato_pedidos")
+
+    Returns:
+        bool: True se a tabela for particionada
+    """
+    return conexao.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tabela)
+        )
+    """), {"tabela": tabela}).scalar()
+
+# =====================================================
+# 2. CRIAR PARTIÇÕES MENSAIS
+# =====================================================
+
+def _meses(data_inicio, data_fim):
+    """Primeiro dia de cada mês entre data_inicio e data_fim (inclusive)"""
+    atual = date(data_inicio.year, data_inicio.month, 1)
+    while atual <= data_fim:
+        proximo = date(atual.year + atual.month // 12, atual.month % 12 + 1, 1)
+        yield atual, proximo
+        atual = proximo
+
+
+def garantir_particoes_mensais(conexao, tabela, data_inicio, data_fim):
+    """
+    Cria (se não existirem) as partições mensais que cobrem o intervalo
+    Nome da partição: <tabela>_pAAAA_MM (ex: processed.fato_pedidos_p2025_03)
+
+    Args:
+        conexao: Conexão dentro de uma transação (mesma da carga)
+        tabela: Tabela particionada (ex: "processed.fato_pedidos")
+        data_inicio: Menor data do lote (date)
+        data_fim: Maior data do lote (date)
+
+    Returns:
+        int: Quantidade de partições verificadas
+    """
+    if data_inicio is None or data_fim is None:
+        return 0
+
+    meses = list(_meses(data_inicio, data_fim))
+
+    for inicio_mes, proximo_mes in meses:
+        conexao.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {tabela}_p{inicio_mes:%Y_%m}
+            PARTITION OF {tabela}
+            FOR VALUES FROM ('{inicio_mes.isoformat()}') TO ('{proximo_mes.isoformat()}')
+        """))
+
+    return len(meses)
@@ -10,7 +10,9 @@ import numpy as np
 import re
 from datetime import datetime
 from sqlalchemy import text
-from config.database import Session, engine
+from config.database import Session, obter_engine
+from core.lookup_cache import cache_produtos
+from transform.projection import selecao_campos_json
 
 # =====================================================
 # 1. CLASSE TRANSFORMADORA
@@ -23,8 +25,17 @@ class ProdutosTransformer:
     Remove a coluna tipo_produto e mantém apenas extrações de bicicletas
     """
 
+    # Caminhos do dados_json usados na transformação (só eles são lidos do banco)
+    CAMPOS_JSON = [
+        "nome",
+        "codigo",
+        "preco",
+        "precoCusto",
+        "situacao",
+    ]
+
     def __init__(self):
-        self.engine = engine
+        self.engine = obter_engine()
 
     # =====================================================
     # 2. EXTRAIR DADOS RAW
@@ -34,45 +45,24 @@ class ProdutosTransformer:
         """Extrai dados da tabela raw.produtos_raw"""
         print("\n1️⃣ EXTRAINDO DADOS DE RAW.PRODUTOS_RAW...")
 
-        query = """
+        query = f"""
             SELECT 
                 id,
                 bling_id,
-                dados_json,
-                data_ingestao
+                data_ingestao,
+                {selecao_campos_json(self.CAMPOS_JSON)}
             FROM raw.produtos_raw
             WHERE status_processamento = 'pendente'
             ORDER BY bling_id
         """
 
         df_raw = pd.read_sql(query, self.engine)
-        print(f"✅ {len(df_raw)} registros extraídos (status = 'pendente')")
+        print(f"✅ {len(df_raw)} registros extraídos (status = 'pendente') com {len(self.CAMPOS_JSON)} campos do JSON")
 
         return df_raw
 
     # =====================================================
-    # 3. EXPANDIR JSON
-    # =====================================================
-
-    def expandir_json(self, df_raw):
-        """Expande o JSON em colunas"""
-        print("\n2️⃣ EXPANDINDO JSON...")
-
-        df_json = pd.json_normalize(df_raw["dados_json"])
-
-        if "id" in df_json.columns:
-            df_json = df_json.rename(columns={"id": "id_bling_json"})
-
-        df = pd.concat(
-            [df_raw[["id", "bling_id", "data_ingestao"]], df_json],
-            axis=1,
-        )
-
-        print(f"✅ {len(df.columns)} colunas")
-        return df
-
-    # =====================================================
-    # 4. IDENTIFICAR BICICLETAS
+    # 3. IDENTIFICAR BICICLETAS
     # =====================================================
 
     def eh_bicicleta(self, nome):
@@ -99,7 +89,7 @@ class ProdutosTransformer:
         return False
 
     # =====================================================
-    # 5. FUNÇÕES DE EXTRAÇÃO (DO EXPLORE_PRODUTOS_RAW)
+    # 4. FUNÇÕES DE EXTRAÇÃO (DO EXPLORE_PRODUTOS_RAW)
     # =====================================================
 
     def extrair_aro(self, nome):
@@ -336,24 +326,12 @@ class ProdutosTransformer:
         return None
 
     # =====================================================
-    # 6. APLICAR TRANSFORMAÇÕES
+    # 5. APLICAR TRANSFORMAÇÕES
     # =====================================================
 
     def aplicar_transformacoes(self, df):
         """Aplica todas as transformações"""
-        print("\n3️⃣ APLICANDO TRANSFORMAÇÕES...")
-
-        # Remover colunas desnecessárias
-        colunas_drop = [
-            "tipo",
-            "formato",
-            "descricaoCurta",
-            "imagemURL",
-            "idProdutoPai",
-            "id_bling_json",
-            "estoque.saldoVirtualTotal",
-        ]
-        df = df.drop(columns=[c for c in colunas_drop if c in df.columns])
+        print("\n2️⃣ APLICANDO TRANSFORMAÇÕES...")
 
         # Renomear colunas
         df = df.rename(
@@ -441,12 +419,12 @@ class ProdutosTransformer:
         return df
 
     # =====================================================
-    # 7. PREPARAR PARA EXPORTAÇÃO
+    # 6. PREPARAR PARA EXPORTAÇÃO
     # =====================================================
 
     def preparar_para_exportacao(self, df):
         """Seleciona colunas finais"""
-        print("\n4️⃣ PREPARANDO PARA EXPORTAÇÃO...")
+        print("\n3️⃣ PREPARANDO PARA EXPORTAÇÃO...")
 
         colunas_finais = [
             "produto_id",
@@ -477,12 +455,12 @@ class ProdutosTransformer:
         return df
 
     # =====================================================
-    # 8. VALIDAR DADOS
+    # 7. VALIDAR DADOS
     # =====================================================
 
     def validar_dados(self, df):
         """Valida qualidade dos dados"""
-        print("\n5️⃣ VALIDANDO DADOS...")
+        print("\n4️⃣ VALIDANDO DADOS...")
 
         total = len(df)
         com_sku = df["sku"].notna().sum()
@@ -504,7 +482,7 @@ class ProdutosTransformer:
         return df
 
     # =====================================================
-    # 9. EXPORTAR COM COMPARAÇÃO INTELIGENTE (UPSERT)
+    # 8. EXPORTAR COM COMPARAÇÃO INTELIGENTE (UPSERT)
     # =====================================================
 
     def exportar_para_processed(self, df):
@@ -519,7 +497,7 @@ class ProdutosTransformer:
         4. UPDATE apenas diferentes
         5. SKIP idênticos
         """
-        print("\n6️⃣ EXPORTANDO PARA PROCESSED.DIM_PRODUTOS...")
+        print("\n5️⃣ EXPORTANDO PARA PROCESSED.DIM_PRODUTOS...")
 
         if len(df) == 0:
             print("⚠️  Nenhum registro para exportar")
@@ -678,6 +656,9 @@ class ProdutosTransformer:
 
             if not registros_novos and not registros_atualizar:
                 print(f"\n✨ Nenhum registro novo ou alterado! DW já está atualizado.")
+            else:
+                # dim_produtos mudou → mapeamento de produtos em memória precisa ser relido
+                cache_produtos.marcar_desatualizado()
 
             # === VERIFICAR TOTAL ===
             query = text("SELECT COUNT(*) FROM processed.dim_produtos")
@@ -697,12 +678,12 @@ class ProdutosTransformer:
             session.close()
 
     # =====================================================
-    # 10. ATUALIZAR STATUS
+    # 9. ATUALIZAR STATUS
     # =====================================================
 
     def atualizar_status_raw(self, df):
         """Atualiza status em raw.produtos_raw"""
-        print("\n7️⃣ ATUALIZANDO STATUS...")
+        print("\n6️⃣ ATUALIZANDO STATUS...")
 
         session = Session()
 
@@ -729,7 +710,7 @@ class ProdutosTransformer:
             session.close()
 
     # =====================================================
-    # 11. EXECUTAR TRANSFORMAÇÃO COMPLETA
+    # 10. EXECUTAR TRANSFORMAÇÃO COMPLETA
     # =====================================================
 
     def executar_transformacao_completa(self):
@@ -741,8 +722,7 @@ class ProdutosTransformer:
                 print("\n✅ Nenhum registro pendente")
                 return
 
-            df = self.expandir_json(df_raw)
-            df = self.aplicar_transformacoes(df)
+            df = self.aplicar_transformacoes(df_raw)
             df = self.preparar_para_exportacao(df)
             df = self.validar_dados(df)
             self.exportar_para_processed(df)
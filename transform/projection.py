@@ -0,0 +1,32 @@
+# =====================================================
+# PROJEÇÃO DE CAMPOS DO JSON NO BANCO
+# =====================================================
+# Responsável por: extrair do dados_json (JSONB) apenas os caminhos que cada
+# transformador usa, em vez de expandir o JSON inteiro com json_normalize
+
+# =====================================================
+# 1. MONTAR SELECT DOS CAMPOS
+# =====================================================
+
+def selecao_campos_json(caminhos, coluna_json="dados_json"):
+    """
+    Monta as expressões SQL que extraem os caminhos pedidos do JSONB
+
+    Exemplo:
+        "loja.id" → dados_json #> '{loja,id}' AS "loja.id"
+
+    O operador #> devolve JSONB → o driver entrega número como número, texto como
+    texto e listas/objetos como list/dict (mesmos tipos do json_normalize).
+    As colunas mantêm o nome com ponto, igual ao json_normalize.
+
+    Args:
+        caminhos: Lista de caminhos separados por ponto (ex: ["total", "loja.id"])
+        coluna_json: Coluna JSONB de origem
+
+    Returns:
+        str: Expressões separadas por vírgula, prontas para o SELECT
+    """
+    return ",\n                ".join(
+        f"{coluna_json} #> '{{{caminho.replace('.', ',')}}}' AS \"{caminho}\""
+        for caminho in caminhos
+    )
@@ -10,8 +10,15 @@ import numpy as np
 from datetime import datetime
 from sqlalchemy import text
 from sqlalchemy.dialects.postgresql import insert
-from config.database import Session, engine
+from config.database import Session, obter_engine
 from extract.situation import obter_mapeamento_situacoes
+from core.lookup_cache import cache_contatos
+from config.settings import obter_configuracoes
+from transform.staging import carregar_staging
+from transform.normalization import strings_vazias_para_nan
+from transform.projection import selecao_campos_json
+from transform.partitioning import tabela_particionada, garantir_particoes_mensais
+from transform.aggregates_dw import registrar_datas_pendentes
 
 # =====================================================
 # 1. CLASSE TRANSFORMADORA
@@ -23,8 +30,37 @@ class VendasTransformer:
     Aplica todas as limpezas e padronizações necessárias
     """
 
-    def __init__(self):
-        self.engine = engine
+    # Caminhos do dados_json usados na transformação (só eles são lidos do banco)
+    CAMPOS_JSON = [
+        "data",
+        "total",
+        "numeroLoja",
+        "loja.id",
+        "contato.id",
+        "situacao.id",
+        "transporte.frete",
+        "itens",
+    ]
+
+    def __init__(self, resolucao_chaves=None, motor=None):
+        """
+        Args:
+            resolucao_chaves: "python" (mapa em memória) ou "sql" (JOIN com dim_contatos no merge)
+            motor: "pandas" (transforma no Python) ou "sql" (INSERT ... SELECT no banco)
+            (omitidos → RESOLUCAO_CHAVES / MOTOR_TRANSFORMACAO do .env)
+        """
+        configuracoes = obter_configuracoes()
+        resolucao_chaves = resolucao_chaves or configuracoes.resolucao_chaves
+        motor = motor or configuracoes.motor_transformacao
+
+        if resolucao_chaves not in ("python", "sql"):
+            raise ValueError(f"resolucao_chaves inválida: {resolucao_chaves} (use 'python' ou 'sql')")
+        if motor not in ("pandas", "sql"):
+            raise ValueError(f"motor inválido: {motor} (use 'pandas' ou 'sql')")
+
+        self.engine = obter_engine()
+        self.resolucao_chaves = resolucao_chaves
+        self.motor = motor
 
     # =====================================================
     # 2. EXTRAIR DADOS RAW
@@ -36,107 +72,31 @@ class VendasTransformer:
         """
         print("\n1️⃣ EXTRAINDO DADOS DE RAW.VENDAS_RAW...")
 
-        query = """
+        query = f"""
             SELECT 
                 id,
                 bling_id,
-                dados_json,
-                data_ingestao
+                data_ingestao,
+                {selecao_campos_json(self.CAMPOS_JSON)}
             FROM raw.vendas_raw
             WHERE status_processamento = 'pendente'
             ORDER BY bling_id
         """
 
         df_raw = pd.read_sql(query, self.engine)
-        print(f"✅ {len(df_raw)} registros extraídos (status = 'pendente')")
+        print(f"✅ {len(df_raw)} registros extraídos (status = 'pendente') com {len(self.CAMPOS_JSON)} campos do JSON")
 
         return df_raw
 
     # =====================================================
-    # 3. EXPANDIR JSON
-    # =====================================================
-
-    def expandir_json(self, df_raw):
-        """
-        Expande o JSON em colunas
-        """
-        print("\n2️⃣ EXPANDINDO JSON EM COLUNAS...")
-
-        # Normalizar o JSON principal
-        df_json = pd.json_normalize(df_raw["dados_json"])
-
-        # Renomear 'id' do JSON para 'id_bling'
-        if "id" in df_json.columns:
-            df_json = df_json.rename(columns={"id": "id_bling"})
-
-        # Combinar com colunas originais
-        df = pd.concat(
-            [
-                df_raw[["id", "bling_id", "data_ingestao"]],
-                df_json,
-            ],
-            axis=1,
-        )
-
-        print(f"✅ JSON expandido! {len(df.columns)} colunas disponíveis")
-        return df
-
-    # =====================================================
-    # 4. APLICAR TRANSFORMAÇÕES
+    # 3. APLICAR TRANSFORMAÇÕES
     # =====================================================
 
     def aplicar_transformacoes(self, df):
         """
         Aplica TODAS as limpezas e transformações
         """
-        print("\n3️⃣ APLICANDO TRANSFORMAÇÕES...")
-
-        # === REMOVER COLUNAS DESNECESSÁRIAS ===
-        print("   • Removendo colunas desnecessárias...")
-        colunas_remover = [
-            "id_bling",
-            "numero",
-            "contato.nome",
-            "dataSaida",
-            "dataPrevista",
-            "parcelas",
-            "observacoes",
-            "outrasDespesas",
-            "numeroPedidoCompra",
-            "observacoesInternas",
-            "taxas.valorBase",
-            "taxas.custoFrete",
-            "taxas.taxaComissao",
-            "contato.tipoPessoa",
-            "contato.numeroDocumento",
-            "desconto.valor",
-            "desconto.unidade",
-            "situacao.valor",
-            "vendedor.id",
-            "categoria.id",
-            "notaFiscal.id",
-            "transporte.contato.id",
-            "transporte.contato.nome",
-            "transporte.volumes",
-            "transporte.etiqueta.uf",
-            "transporte.etiqueta.cep",
-            "transporte.etiqueta.nome",
-            "transporte.etiqueta.bairro",
-            "transporte.etiqueta.numero",
-            "transporte.etiqueta.endereco",
-            "transporte.etiqueta.nomePais",
-            "transporte.etiqueta.municipio",
-            "transporte.etiqueta.complemento",
-            "transporte.pesoBruto",
-            "transporte.prazoEntrega",
-            "transporte.fretePorConta",
-            "transporte.quantidadeVolumes",
-            "tributacao.totalIPI",
-            "tributacao.totalICMS",
-            "intermediador.cnpj",
-            "intermediador.nomeUsuario",
-        ]
-        df = df.drop(columns=[col for col in colunas_remover if col in df.columns])
+        print("\n2️⃣ APLICANDO TRANSFORMAÇÕES...")
 
         # === RENOMEAR COLUNAS ===
         print("   • Renomeando colunas...")
@@ -183,9 +143,7 @@ class VendasTransformer:
 
         # === LIMPAR STRINGS VAZIAS ===
         print("   • Limpando strings vazias...")
-        for coluna in df.select_dtypes(include=["object"]).columns:
-            df[coluna] = df[coluna].replace(r"^\s*$", np.nan, regex=True)
-            df[coluna] = df[coluna].replace(["", " "], np.nan)
+        df = strings_vazias_para_nan(df)
 
         # === MAPEAR SITUAÇÕES ===
         print("   • Mapeando situações (ID → nome)...")
@@ -202,8 +160,11 @@ class VendasTransformer:
         df = df.rename(columns={"situacao.id": "situacao"})
 
         # === BUSCAR CLIENTE_ID ===
-        print("   • Buscando cliente_id na dim_contatos...")
-        df = self._mapear_cliente_id(df)
+        if self.resolucao_chaves == "sql":
+            print("   • cliente_id será resolvido no banco (JOIN com dim_contatos no merge)")
+        else:
+            print("   • Buscando cliente_id na dim_contatos...")
+            df = self._mapear_cliente_id(df)
 
         # === ADICIONAR METADADOS ===
         print("   • Adicionando metadados...")
@@ -213,25 +174,16 @@ class VendasTransformer:
         return df
 
     # =====================================================
-    # 5. MAPEAR CLIENTE_ID
+    # 4. MAPEAR CLIENTE_ID
     # =====================================================
 
     def _mapear_cliente_id(self, df):
         """
         Busca o cliente_id na dim_contatos usando o bling_cliente_id
+        (mapeamento vem do cache compartilhado → não relê a dim_contatos inteira a cada chamada)
         """
-        session = Session()
-
         try:
-            query = text(
-                """
-                SELECT bling_cliente_id, cliente_id
-                FROM processed.dim_contatos
-            """
-            )
-
-            resultado = session.execute(query)
-            mapa_clientes = {row.bling_cliente_id: row.cliente_id for row in resultado}
+            mapa_clientes = cache_contatos.obter()
 
             if mapa_clientes:
                 df["cliente_id"] = df["bling_cliente_id"].map(mapa_clientes)
@@ -252,20 +204,18 @@ class VendasTransformer:
         except Exception as e:
             print(f"   ⚠️  Erro ao mapear clientes: {e}")
             df["cliente_id"] = None
-        finally:
-            session.close()
 
         return df
 
     # =====================================================
-    # 6. PREPARAR PARA EXPORTAÇÃO
+    # 5. PREPARAR PARA EXPORTAÇÃO
     # =====================================================
 
     def preparar_para_exportacao(self, df):
         """
         Ordena colunas e prepara DataFrame final
         """
-        print("\n4️⃣ PREPARANDO DADOS PARA EXPORTAÇÃO...")
+        print("\n3️⃣ PREPARANDO DADOS PARA EXPORTAÇÃO...")
 
         colunas_finais = [
             "pedido_id",
@@ -273,6 +223,7 @@ class VendasTransformer:
             "numero_pedido",
             "data_pedido",
             "cliente_id",
+            "bling_cliente_id",  # Só existe no modo resolucao_chaves="sql"
             "canal_id",
             "valor_total",
             "valor_frete",
@@ -289,14 +240,14 @@ class VendasTransformer:
         return df
 
     # =====================================================
-    # 7. VALIDAR DADOS
+    # 6. VALIDAR DADOS
     # =====================================================
 
     def validar_dados(self, df):
         """
         Executa validações de qualidade
         """
-        print("\n5️⃣ EXECUTANDO VALIDAÇÕES...")
+        print("\n4️⃣ EXECUTANDO VALIDAÇÕES...")
 
         total = len(df)
 
@@ -309,7 +260,9 @@ class VendasTransformer:
 
         # Validações
         com_numero = df["numero_pedido"].notna().sum()
-        com_cliente = df["cliente_id"].notna().sum()
+        # No modo "sql" o cliente_id ainda não foi resolvido → conta os que têm ID Bling
+        coluna_cliente = "cliente_id" if "cliente_id" in df.columns else "bling_cliente_id"
+        com_cliente = df[coluna_cliente].notna().sum()
         com_situacao = df["situacao"].notna().sum()
 
         print(f"\n   📊 ESTATÍSTICAS DE QUALIDADE:")
@@ -329,19 +282,19 @@ class VendasTransformer:
         return df
 
     # =====================================================
-    # 8. EXPORTAR COM COMPARAÇÃO INTELIGENTE
+    # 7. EXPORTAR COM COMPARAÇÃO INTELIGENTE
     # =====================================================
 
     def exportar_para_processed(self, df):
         """
         Exporta dados comparando antes de salvar (IGUAL EXTRATORES)
-        - Busca registros existentes
+        - Busca registros existentes (só os pedidos do lote)
         - Compara campos relevantes
         - INSERT apenas novos
         - UPDATE apenas diferentes
         - SKIP idênticos
         """
-        print("\n6️⃣ EXPORTANDO PARA PROCESSED.FATO_PEDIDOS...")
+        print("\n5️⃣ EXPORTANDO PARA PROCESSED.FATO_PEDIDOS...")
         
         if len(df) == 0:
             print("⚠️  Nenhum registro para exportar")
@@ -358,14 +311,17 @@ class VendasTransformer:
                 SELECT 
                     pedido_id,
                     bling_pedido_id,
+                    data_pedido,
                     valor_total,
                     situacao,
                     quantidade_itens_total,
                     quantidade_produtos_total
                 FROM processed.fato_pedidos
+                WHERE bling_pedido_id = ANY(:bling_ids)
             """)
             
-            df_existentes = pd.read_sql(query, self.engine)
+            bling_ids = [int(bling_id) for bling_id in df['bling_pedido_id']]
+            df_existentes = pd.read_sql(query, self.engine, params={"bling_ids": bling_ids})
             fim_busca = datetime.now()
             
             print(f"📋 {len(df_existentes)} registros existentes carregados em {fim_busca - inicio_busca}")
@@ -380,6 +336,7 @@ class VendasTransformer:
             registros_novos = []
             registros_atualizar = []
             registros_identicos = 0
+            datas_antigas = set()  # Pedidos que mudaram de data → dia antigo recalculado nos agregados
             
             for idx, row in df.iterrows():
                 bling_id = row['bling_pedido_id']
@@ -394,15 +351,19 @@ class VendasTransformer:
                     # Comparar valores (arredondar floats)
                     valor_mudou = round(float(row['valor_total']), 2) != round(float(existente['valor_total']), 2)
                     situacao_mudou = str(row['situacao']) != str(existente['situacao'])
+                    data_anterior = pd.Timestamp(existente['data_pedido']).date()
+                    data_mudou = row['data_pedido'].date() != data_anterior
                     qtd_mudou = (
                         int(row['quantidade_itens_total']) != int(existente['quantidade_itens_total']) or
                         int(row['quantidade_produtos_total']) != int(existente['quantidade_produtos_total'])
                     )
                     
-                    if valor_mudou or situacao_mudou or qtd_mudou:
+                    if valor_mudou or situacao_mudou or qtd_mudou or data_mudou:
                         # DIFERENTE → UPDATE
                         row['pedido_id'] = existente['pedido_id']  # Manter ID existente
                         registros_atualizar.append(row)
+                        if data_mudou:
+                            datas_antigas.add(data_anterior)
                     else:
                         # IDÊNTICO → SKIP
                         registros_identicos += 1
@@ -416,6 +377,11 @@ class VendasTransformer:
             print(f"   • 🔄 Diferentes (atualizar): {len(registros_atualizar)}")
             print(f"   • ⏭️ Idênticos (ignorar): {registros_identicos}")
             
+            # === PARTIÇÕES DOS MESES DO LOTE (se fato_pedidos for particionada) ===
+            if registros_novos or registros_atualizar:
+                with self.engine.begin() as conn:
+                    self._preparar_particoes(conn, df['data_pedido'].min(), df['data_pedido'].max())
+
             # === INSERIR NOVOS ===
             if registros_novos:
                 print(f"\n💾 Inserindo {len(registros_novos)} registros novos...")
@@ -434,6 +400,8 @@ class VendasTransformer:
             # === ATUALIZAR DIFERENTES ===
             if registros_atualizar:
                 print(f"\n🔄 Atualizando {len(registros_atualizar)} registros diferentes...")
+
+                registrar_datas_pendentes(session, datas_antigas)
                 
                 for i, row in enumerate(registros_atualizar):
                     stmt = text("""
@@ -496,14 +464,153 @@ class VendasTransformer:
             session.close()
 
     # =====================================================
-    # 9. ATUALIZAR STATUS RAW
+    # 7.1. EXPORTAR COM RESOLUÇÃO DE CHAVES NO BANCO
+    # =====================================================
+
+    def exportar_para_processed_sql(self, df):
+        """
+        Exporta dados resolvendo o cliente_id no próprio banco
+        - Carrega o DataFrame na tabela temporária stg_fato_pedidos
+        - INSERT ... SELECT com LEFT JOIN em dim_contatos
+        - ON CONFLICT atualiza apenas registros diferentes
+        Tudo em uma única transação (staging temporária some no COMMIT)
+        """
+        print("\n5️⃣ EXPORTANDO PARA PROCESSED.FATO_PEDIDOS (chaves resolvidas no banco)...")
+
+        if len(df) == 0:
+            print("⚠️  Nenhum registro para exportar")
+            return 0
+
+        # Expressão SQL de cada coluna do fato a partir da staging (s) e da dimensão (dc)
+        expressoes = {
+            "pedido_id": "s.pedido_id::integer",
+            "bling_pedido_id": "s.bling_pedido_id::bigint",
+            "numero_pedido": "s.numero_pedido",
+            "data_pedido": "s.data_pedido::date",
+            "cliente_id": "dc.cliente_id",
+            "canal_id": "s.canal_id::integer",
+            "valor_total": "s.valor_total",
+            "valor_frete": "COALESCE(s.valor_frete, 0)",
+            "quantidade_itens_total": "s.quantidade_itens_total::integer",
+            "quantidade_produtos_total": "s.quantidade_produtos_total::integer",
+            "situacao": "s.situacao",
+            "data_ingestao": "s.data_ingestao",
+            "data_processamento": "s.data_processamento",
+        }
+        origem = {"cliente_id": "bling_cliente_id"}
+        colunas = [col for col in expressoes if origem.get(col, col) in df.columns]
+
+        # Mesmos campos da comparação do modo python + cliente_id (pode chegar depois do pedido)
+        campos_comparados = [
+            col for col in ("data_pedido", "valor_total", "situacao", "quantidade_itens_total",
+                            "quantidade_produtos_total", "cliente_id")
+            if col in colunas
+        ]
+        colunas_atualizar = [col for col in colunas if col not in ("pedido_id", "bling_pedido_id", "data_ingestao")]
+
+        inicio = datetime.now()
+
+        try:
+            with self.engine.begin() as conn:
+                tabela_staging = carregar_staging(conn, df, "stg_fato_pedidos")
+                print(f"📥 {len(df)} registros carregados em {tabela_staging}")
+
+                conflito = self._preparar_particoes(conn, df['data_pedido'].min(), df['data_pedido'].max())
+
+                # Pedido mudou de data → dia antigo precisa ser recalculado nos agregados
+                conn.execute(text(f"""
+                    INSERT INTO processed.agg_datas_pendentes (data, data_registro)
+                    SELECT DISTINCT f.data_pedido, NOW()
+                    FROM processed.fato_pedidos f
+                    INNER JOIN {tabela_staging} s
+                        ON f.bling_pedido_id = s.bling_pedido_id::bigint
+                    WHERE f.data_pedido <> s.data_pedido::date
+                    ON CONFLICT (data) DO NOTHING
+                """))
+
+                if conflito != "bling_pedido_id":
+                    # Pedido mudou de data → sai da partição antiga antes do merge
+                    conn.execute(text(f"""
+                        DELETE FROM processed.fato_pedidos f
+                        USING {tabela_staging} s
+                        WHERE f.bling_pedido_id = s.bling_pedido_id::bigint
+                          AND f.data_pedido <> s.data_pedido::date
+                    """))
+
+                query = text(f"""
+                    INSERT INTO processed.fato_pedidos ({", ".join(colunas)})
+                    SELECT {", ".join(expressoes[col] for col in colunas)}
+                    FROM {tabela_staging} s
+                    LEFT JOIN processed.dim_contatos dc
+                        ON dc.bling_cliente_id = s.bling_cliente_id::bigint
+                    ON CONFLICT ({conflito}) DO UPDATE SET
+                        {", ".join(f"{col} = EXCLUDED.{col}" for col in colunas_atualizar)}
+                    WHERE ({", ".join(f"fato_pedidos.{col}" for col in campos_comparados)})
+                        IS DISTINCT FROM ({", ".join(f"EXCLUDED.{col}" for col in campos_comparados)})
+                    RETURNING (xmax = 0) AS inserido
+                """)
+
+                resultado = conn.execute(query).fetchall()
+
+            inseridos = sum(1 for row in resultado if row.inserido)
+            atualizados = len(resultado) - inseridos
+            identicos = len(df) - len(resultado)
+
+            print(f"\n📊 RESULTADO DO MERGE ({datetime.now() - inicio}):")
+            print(f"   • 🆕 Inseridos: {inseridos}")
+            print(f"   • 🔄 Atualizados: {atualizados}")
+            print(f"   • ⏭️ Idênticos (ignorados): {identicos}")
+
+            with self.engine.connect() as conn:
+                total = conn.execute(text("SELECT COUNT(*) FROM processed.fato_pedidos")).scalar()
+                sem_cliente = conn.execute(text(
+                    "SELECT COUNT(*) FROM processed.fato_pedidos WHERE cliente_id IS NULL"
+                )).scalar()
+
+            print(f"\n🎉 EXPORTAÇÃO CONCLUÍDA!")
+            print(f"   • Total na tabela: {total}")
+            if sem_cliente > 0:
+                print(f"   ⚠️  {sem_cliente} pedidos sem cliente_id (cliente não encontrado na dim_contatos)")
+
+            return len(df)
+
+        except Exception as e:
+            print(f"❌ ERRO ao exportar: {e}")
+            raise
+
+    # =====================================================
+    # 7.2. PARTIÇÕES MENSAIS (FATO_PEDIDOS PARTICIONADA)
+    # =====================================================
+
+    def _preparar_particoes(self, conn, data_inicio, data_fim):
+        """
+        Se fato_pedidos for particionada (migrations/particionar_fatos.py), cria as
+        partições dos meses do lote → a carga escreve só nas partições afetadas
+
+        Returns:
+            str: Colunas do ON CONFLICT ("bling_pedido_id" ou "bling_pedido_id, data_pedido")
+        """
+        if not tabela_particionada(conn, "processed.fato_pedidos"):
+            return "bling_pedido_id"
+
+        if pd.notna(data_inicio) and pd.notna(data_fim):
+            particoes = garantir_particoes_mensais(
+                conn, "processed.fato_pedidos", pd.Timestamp(data_inicio).date(), pd.Timestamp(data_fim).date()
+            )
+            print(f"🧩 {particoes} partições mensais verificadas")
+
+        # Em tabela particionada a chave única precisa incluir a coluna de partição
+        return "bling_pedido_id, data_pedido"
+
+    # =====================================================
+    # 8. ATUALIZAR STATUS RAW
     # =====================================================
 
     def atualizar_status_raw(self, df):
         """
         Atualiza status dos registros processados
         """
-        print("\n7️⃣ ATUALIZANDO STATUS NA TABELA RAW...")
+        print("\n6️⃣ ATUALIZANDO STATUS NA TABELA RAW...")
 
         session = Session()
 
@@ -529,6 +636,163 @@ class VendasTransformer:
         finally:
             session.close()
 
+    # =====================================================
+    # 9. MOTOR SQL (TRANSFORMAÇÃO INTEIRA NO BANCO)
+    # =====================================================
+
+    def executar_transformacao_sql(self):
+        """
+        Transforma raw.vendas_raw → processed.fato_pedidos em UM statement no banco
+        Mesmas regras do caminho pandas:
+        - Strings só com espaços → NULL (numero_pedido)
+        - data_pedido inválida → registro ignorado (e continua 'pendente')
+        - situação mapeada por situacoes_raw (se a tabela estiver vazia, mantém o ID)
+        - cliente_id por JOIN com dim_contatos
+        - quantidade de itens / produtos via jsonb_array_elements
+        - UPDATE só quando data, valor, situação ou quantidades mudaram
+        - Data antiga de pedido que mudou de data → processed.agg_datas_pendentes
+        Os registros gravados são marcados como 'processado' no mesmo statement
+        """
+        print("\n🗄️  TRANSFORMANDO VENDAS DIRETO NO BANCO (motor SQL)...")
+
+        inicio = datetime.now()
+
+        with self.engine.begin() as conn:
+            # Intervalo de datas dos pendentes → partições necessárias (só se particionada)
+            data_inicio, data_fim = conn.execute(text("""
+                SELECT MIN(processed.try_cast_date(dados_json->>'data')),
+                       MAX(processed.try_cast_date(dados_json->>'data'))
+                FROM raw.vendas_raw
+                WHERE status_processamento = 'pendente'
+            """)).one() if tabela_particionada(conn, "processed.fato_pedidos") else (None, None)
+            conflito = self._preparar_particoes(conn, data_inicio, data_fim)
+
+        # Tabela particionada: pedido que mudou de data sai da partição antiga no mesmo statement
+        movidos = """
+            movidos AS (
+                DELETE FROM processed.fato_pedidos f
+                USING validos v
+                WHERE f.bling_pedido_id = v.bling_pedido_id
+                  AND f.data_pedido <> v.data_pedido
+                RETURNING 1
+            ),
+        """ if conflito != "bling_pedido_id" else ""
+
+        query = text(f"""
+            WITH origem AS (
+                SELECT
+                    vr.id AS pedido_id,
+                    vr.bling_id AS bling_pedido_id,
+                    CASE WHEN vr.dados_json->>'numeroLoja' ~ '^[[:space:]]*$' THEN NULL
+                         ELSE vr.dados_json->>'numeroLoja' END AS numero_pedido,
+                    processed.try_cast_date(vr.dados_json->>'data') AS data_pedido,
+                    dc.cliente_id,
+                    (vr.dados_json->'loja'->>'id')::integer AS canal_id,
+                    (vr.dados_json->>'total')::numeric AS valor_total,
+                    COALESCE((vr.dados_json->'transporte'->>'frete')::numeric, 0) AS valor_frete,
+                    CASE WHEN jsonb_typeof(vr.dados_json->'itens') = 'array'
+                         THEN jsonb_array_length(vr.dados_json->'itens') ELSE 0 END AS quantidade_itens_total,
+                    CASE WHEN jsonb_typeof(vr.dados_json->'itens') = 'array'
+                         THEN (
+                             SELECT COALESCE(SUM((item->>'quantidade')::numeric), 0)
+                             FROM jsonb_array_elements(vr.dados_json->'itens') AS item
+                         )::integer
+                         ELSE 0 END AS quantidade_produtos_total,
+                    CASE WHEN EXISTS (SELECT 1 FROM raw.situacoes_raw) THEN sr.nome
+                         ELSE vr.dados_json->'situacao'->>'id' END AS situacao,
+                    vr.data_ingestao
+                FROM raw.vendas_raw vr
+                LEFT JOIN raw.situacoes_raw sr
+                    ON sr.bling_situacao_id = (vr.dados_json->'situacao'->>'id')::integer
+                LEFT JOIN processed.dim_contatos dc
+                    ON dc.bling_cliente_id = (vr.dados_json->'contato'->>'id')::bigint
+                WHERE vr.status_processamento = 'pendente'
+            ),
+            validos AS (
+                SELECT * FROM origem WHERE data_pedido IS NOT NULL
+            ),
+            datas_antigas AS (
+                -- Pedido mudou de data → dia antigo recalculado nos agregados (lê o fato antes da gravação)
+                INSERT INTO processed.agg_datas_pendentes (data, data_registro)
+                SELECT DISTINCT f.data_pedido, NOW()
+                FROM processed.fato_pedidos f
+                INNER JOIN validos v
+                    ON f.bling_pedido_id = v.bling_pedido_id
+                WHERE f.data_pedido <> v.data_pedido
+                ON CONFLICT (data) DO NOTHING
+                RETURNING 1
+            ),
+            {movidos}
+            gravados AS (
+                INSERT INTO processed.fato_pedidos (
+                    pedido_id, bling_pedido_id, numero_pedido, data_pedido, cliente_id, canal_id,
+                    valor_total, valor_frete, quantidade_itens_total, quantidade_produtos_total,
+                    situacao, data_ingestao, data_processamento
+                )
+                SELECT
+                    pedido_id, bling_pedido_id, numero_pedido, data_pedido, cliente_id, canal_id,
+                    valor_total, valor_frete, quantidade_itens_total, quantidade_produtos_total,
+                    situacao, data_ingestao, :data_processamento
+                FROM validos
+                ON CONFLICT ({conflito}) DO UPDATE SET
+                    numero_pedido = EXCLUDED.numero_pedido,
+                    data_pedido = EXCLUDED.data_pedido,
+                    cliente_id = EXCLUDED.cliente_id,
+                    canal_id = EXCLUDED.canal_id,
+                    valor_total = EXCLUDED.valor_total,
+                    valor_frete = EXCLUDED.valor_frete,
+                    quantidade_itens_total = EXCLUDED.quantidade_itens_total,
+                    quantidade_produtos_total = EXCLUDED.quantidade_produtos_total,
+                    situacao = EXCLUDED.situacao,
+                    data_processamento = EXCLUDED.data_processamento
+                WHERE (fato_pedidos.data_pedido, fato_pedidos.valor_total, fato_pedidos.situacao,
+                       fato_pedidos.quantidade_itens_total, fato_pedidos.quantidade_produtos_total)
+                    IS DISTINCT FROM
+                      (EXCLUDED.data_pedido, EXCLUDED.valor_total, EXCLUDED.situacao,
+                       EXCLUDED.quantidade_itens_total, EXCLUDED.quantidade_produtos_total)
+                RETURNING (xmax = 0) AS inserido
+            ),
+            marcados AS (
+                UPDATE raw.vendas_raw vr
+                SET status_processamento = 'processado'
+                FROM validos v
+                WHERE vr.id = v.pedido_id
+                RETURNING 1
+            )
+            SELECT
+                (SELECT COUNT(*) FROM origem) AS pendentes,
+                (SELECT COUNT(*) FROM validos) AS validos,
+                (SELECT COUNT(*) FROM gravados WHERE inserido) AS inseridos,
+                (SELECT COUNT(*) FROM gravados WHERE NOT inserido) AS atualizados,
+                (SELECT COUNT(*) FROM marcados) AS marcados
+        """)
+
+        try:
+            with self.engine.begin() as conn:
+                resultado = conn.execute(query, {"data_processamento": datetime.now()}).one()
+
+            if resultado.pendentes == 0:
+                print("\n✅ Nenhum registro pendente para processar!")
+                return 0
+
+            sem_data = resultado.pendentes - resultado.validos
+            identicos = resultado.validos - resultado.inseridos - resultado.atualizados
+
+            print(f"\n📊 RESULTADO ({datetime.now() - inicio}):")
+            print(f"   • Pendentes: {resultado.pendentes}")
+            if sem_data > 0:
+                print(f"   ⚠️  {sem_data} registros sem data válida ignorados")
+            print(f"   • 🆕 Inseridos: {resultado.inseridos}")
+            print(f"   • 🔄 Atualizados: {resultado.atualizados}")
+            print(f"   • ⏭️ Idênticos (ignorados): {identicos}")
+            print(f"   • ✅ Marcados como 'processado': {resultado.marcados}")
+
+            return resultado.validos
+
+        except Exception as e:
+            print(f"❌ ERRO na transformação SQL: {e}")
+            raise
+
     # =====================================================
     # 10. EXECUTAR TRANSFORMAÇÃO COMPLETA
     # =====================================================
@@ -538,6 +802,16 @@ class VendasTransformer:
         Executa o pipeline completo de transformação
         """
         try:
+            if self.motor == "sql":
+                total_exportado = self.executar_transformacao_sql()
+
+                print(f"\n{'='*70}")
+                print(f"🎉 TRANSFORMAÇÃO CONCLUÍDA! (motor SQL)")
+                print(f"{'='*70}")
+                print(f"\n   📊 RESUMO:")
+                print(f"      • Registros exportados: {total_exportado}")
+                return
+
             # 1. Extrair dados raw
             df_raw = self.extrair_dados_raw()
 
@@ -545,22 +819,22 @@ class VendasTransformer:
                 print("\n✅ Nenhum registro pendente para processar!")
                 return
 
-            # 2. Expandir JSON
-            df = self.expandir_json(df_raw)
+            # 2. Aplicar transformações (campos do JSON já vêm projetados do banco)
+            df = self.aplicar_transformacoes(df_raw)
 
-            # 3. Aplicar transformações
-            df = self.aplicar_transformacoes(df)
-
-            # 4. Preparar para exportação
+            # 3. Preparar para exportação
             df = self.preparar_para_exportacao(df)
 
-            # 5. Validar
+            # 4. Validar
             df = self.validar_dados(df)
 
-            # 6. Exportar (COM COMPARAÇÃO INTELIGENTE)
-            total_exportado = self.exportar_para_processed(df)
+            # 5. Exportar (COM COMPARAÇÃO INTELIGENTE)
+            if self.resolucao_chaves == "sql":
+                total_exportado = self.exportar_para_processed_sql(df)
+            else:
+                total_exportado = self.exportar_para_processed(df)
 
-            # 7. Atualizar status
+            # 6. Atualizar status
             self.atualizar_status_raw(df)
 
             # Relatório final
@@ -0,0 +1,44 @@
+# =====================================================
+# STAGING NO BANCO
+# =====================================================
+# Responsável por: carregar DataFrames em tabelas temporárias da sessão
+# para que chaves e merges sejam resolvidos com SQL (JOIN no banco)
+
+import pandas as pd
+from sqlalchemy import text
+
+# =====================================================
+# 1. CARREGAR STAGING
+# =====================================================
+
+def carregar_staging(conexao, df, nome_tabela, chunksize=1000):
+    """
+    Grava o DataFrame em uma tabela temporária (CREATE TEMP TABLE ... ON COMMIT DROP)
+
+    - Visível só nesta conexão → execuções simultâneas não disputam a mesma tabela
+    - Nada é criado no schema processed e a tabela some no fim da transação (sem DROP)
+    - Colunas com os mesmos tipos que o to_sql criaria (os merges usam casts explícitos)
+
+    Args:
+        conexao: Conexão já dentro de uma transação (engine.begin())
+        df: DataFrame com os dados transformados
+        nome_tabela: Nome da tabela de staging (ex: "stg_fato_pedidos")
+
+    Returns:
+        str: Nome da tabela temporária (ex: "stg_fato_pedidos")
+    """
+    ddl = pd.io.sql.get_schema(df, nome_tabela, con=conexao)
+    conexao.execute(text(
+        ddl.strip().replace("CREATE TABLE", "CREATE TEMP TABLE", 1) + " ON COMMIT DROP"
+    ))
+
+    df.to_sql(
+        name=nome_tabela,
+        con=conexao,
+        if_exists="append",
+        index=False,
+        method="multi",
+        chunksize=chunksize,
+    )
+
+    return nome_tabela
@@ -0,0 +1,179 @@
+# =====================================================
+# TRANSFORMADOR DE ESTOQUES
+# =====================================================
+# Responsável por: transformar os saldos de raw.estoque_raw (payload de /estoques/saldos)
+# em processed.fato_estoques, gravando só os produtos cujo saldo mudou (variações)
+
+from datetime import date, datetime
+from sqlalchemy import text
+from config.database import obter_engine
+
+# =====================================================
+# 1. CLASSE TRANSFORMADORA
+# =====================================================
+
+class EstoquesTransformer:
+    """
+    Transformador de estoques (snapshot diário guardado como variações)
+
+    Para cada saldo pendente em raw.estoque_raw:
+    - Compara com o último saldo registrado ANTES do dia do snapshot
+    - Saldo diferente → grava/atualiza a linha do dia com o saldo e a variação
+    - Saldo igual → nada é gravado (e a linha do dia é removida, se o saldo voltou ao anterior)
+    O saldo completo de qualquer dia fica na view processed.vw_estoque_diario
+    """
+
+    def __init__(self):
+        self.engine = obter_engine()
+
+    # =====================================================
+    # 2. TRANSFORMAR E GRAVAR (NO BANCO)
+    # =====================================================
+
+    def transformar_saldos(self, data_snapshot=None):
+        """
+        Um único statement: lê os saldos pendentes, calcula as variações,
+        grava fato_estoques e marca o raw como 'processado'
+
+        Args:
+            data_snapshot: Dia do snapshot (padrão: hoje)
+
+        Returns:
+            dict: Contadores (pendentes, alterados, sem_mudanca, removidos)
+        """
+        data_snapshot = data_snapshot or date.today()
+
+        query = text("""
+            WITH atual AS (
+                -- Payload de /estoques/saldos: {produto: {id, codigo}, saldoFisicoTotal, saldoVirtualTotal, depositos}
+                SELECT DISTINCT ON (bling_produto_id)
+                    er.id AS raw_id,
+                    COALESCE((er.dados_json->'produto'->>'id')::bigint, er.bling_id) AS bling_produto_id,
+                    COALESCE((er.dados_json->>'saldoFisicoTotal')::numeric, 0) AS saldo_fisico,
+                    COALESCE((er.dados_json->>'saldoVirtualTotal')::numeric, 0) AS saldo_virtual
+                FROM raw.estoque_raw er
+                WHERE er.status_processamento = 'pendente'
+                ORDER BY bling_produto_id, er.data_ingestao DESC
+            ),
+            anterior AS (
+                SELECT DISTINCT ON (fe.bling_produto_id)
+                    fe.bling_produto_id,
+                    fe.saldo_fisico,
+                    fe.saldo_virtual
+                FROM processed.fato_estoques fe
+                INNER JOIN atual a
+                    ON a.bling_produto_id = fe.bling_produto_id
+                WHERE fe.data_snapshot < :data_snapshot
+                ORDER BY fe.bling_produto_id, fe.data_snapshot DESC
+            ),
+            comparacao AS (
+                SELECT
+                    a.bling_produto_id,
+                    a.saldo_fisico,
+                    a.saldo_virtual,
+                    a.saldo_fisico - COALESCE(ant.saldo_fisico, 0) AS variacao_fisico,
+                    a.saldo_virtual - COALESCE(ant.saldo_virtual, 0) AS variacao_virtual,
+                    (ant.saldo_fisico, ant.saldo_virtual) IS DISTINCT FROM (a.saldo_fisico, a.saldo_virtual) AS mudou
+                FROM atual a
+                LEFT JOIN anterior ant
+                    ON ant.bling_produto_id = a.bling_produto_id
+            ),
+            removidos AS (
+                -- Saldo voltou ao valor anterior no mesmo dia → a mudança do dia deixa de existir
+                DELETE FROM processed.fato_estoques fe
+                USING comparacao c
+                WHERE fe.bling_produto_id = c.bling_produto_id
+                  AND fe.data_snapshot = :data_snapshot
+                  AND NOT c.mudou
+                RETURNING 1
+            ),
+            gravados AS (
+                INSERT INTO processed.fato_estoques (
+                    data_snapshot, produto_id, bling_produto_id, saldo_fisico, saldo_virtual,
+                    variacao_fisico, variacao_virtual, data_processamento
+                )
+                SELECT
+                    :data_snapshot,
+                    dp.produto_id,
+                    c.bling_produto_id,
+                    c.saldo_fisico,
+                    c.saldo_virtual,
+                    c.variacao_fisico,
+                    c.variacao_virtual,
+                    :data_processamento
+                FROM comparacao c
+                LEFT JOIN processed.dim_produtos dp
+                    ON dp.bling_produto_id = c.bling_produto_id
+                WHERE c.mudou
+                ON CONFLICT (bling_produto_id, data_snapshot) DO UPDATE SET
+                    produto_id = EXCLUDED.produto_id,
+                    saldo_fisico = EXCLUDED.saldo_fisico,
+                    saldo_virtual = EXCLUDED.saldo_virtual,
+                    variacao_fisico = EXCLUDED.variacao_fisico,
+                    variacao_virtual = EXCLUDED.variacao_virtual,
+                    data_processamento = EXCLUDED.data_processamento
+                WHERE (fato_estoques.saldo_fisico, fato_estoques.saldo_virtual)
+                    IS DISTINCT FROM (EXCLUDED.saldo_fisico, EXCLUDED.saldo_virtual)
+                RETURNING 1
+            ),
+            marcados AS (
+                UPDATE raw.estoque_raw er
+                SET status_processamento = 'processado'
+                WHERE er.status_processamento = 'pendente'
+                RETURNING 1
+            )
+            SELECT
+                (SELECT COUNT(*) FROM atual) AS pendentes,
+                (SELECT COUNT(*) FROM comparacao WHERE mudou) AS alterados,
+                (SELECT COUNT(*) FROM gravados) AS gravados,
+                (SELECT COUNT(*) FROM removidos) AS removidos,
+                (SELECT COUNT(*) FROM marcados) AS marcados
+        """)
+
+        with self.engine.begin() as conn:
+            resultado = conn.execute(query, {
+                "data_snapshot": data_snapshot,
+                "data_processamento": datetime.now(),
+            }).one()
+
+        return {
+            "pendentes": resultado.pendentes,
+            "alterados": resultado.alterados,
+            "gravados": resultado.gravados,
+            "sem_mudanca": resultado.pendentes - resultado.alterados,
+            "removidos": resultado.removidos,
+            "marcados": resultado.marcados,
+        }
+
+    # =====================================================
+    # 3. EXECUTAR TRANSFORMAÇÃO COMPLETA
+    # =====================================================
+
+    def executar_transformacao_completa(self, data_snapshot=None):
+        """
+        Executa a transformação dos saldos pendentes
+        """
+        print("\n📦 TRANSFORMANDO ESTOQUES (RAW.ESTOQUE_RAW → FATO_ESTOQUES)...")
+
+        inicio = datetime.now()
+
+        try:
+            stats = self.transformar_saldos(data_snapshot)
+
+            if stats["pendentes"] == 0:
+                print("\n✅ Nenhum saldo pendente para processar!")
+                return stats
+
+            print(f"\n📊 RESULTADO ({datetime.now() - inicio}):")
+            print(f"   • Saldos pendentes: {stats['pendentes']}")
+            print(f"   • 🔄 Com saldo alterado: {stats['alterados']} ({stats['gravados']} linhas gravadas)")
+            print(f"   • ⏭️ Sem mudança (não gravados): {stats['sem_mudanca']}")
+            if stats["removidos"] > 0:
+                print(f"   • ↩️  Voltaram ao saldo anterior: {stats['removidos']}")
+            print(f"   • ✅ Marcados como 'processado': {stats['marcados']}")
+
+            return stats
+
+        except Exception as e:
+            print(f"❌ ERRO na transformação de estoques: {e}")
+            raise
@@ -0,0 +1,271 @@
+# =====================================================
+# TRANSFORMADOR DA DIMENSÃO TEMPO
+# =====================================================
+# Responsável por: gerar as datas da dim_tempo de forma vetorizada (.dt do pandas),
+# marcar feriados nacionais e inserir apenas as datas que faltam (ON CONFLICT DO NOTHING)
+
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from config.database import obter_engine
+
+# =====================================================
+# 1. NOMES E REGRAS DE FERIADOS
+# =====================================================
+
+# Índice = número do mês (posição 0 não é usada)
+NOMES_MESES = np.array([
+    "", "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
+])
+NOMES_MESES_ABREV = np.array([
+    "", "Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez",
+])
+
+# Índice = dayofweek do pandas (0=Segunda, 6=Domingo)
+NOMES_DIAS_SEMANA = np.array([
+    "Segunda-feira", "Terça-feira", "Quarta-feira", "Quinta-feira", "Sexta-feira", "Sábado", "Domingo",
+])
+NOMES_DIAS_SEMANA_ABREV = np.array(["Seg", "Ter", "Qua", "Qui", "Sex", "Sab", "Dom"])
+
+# Feriados nacionais de data fixa: (mês, dia, nome, ano em que passou a valer)
+FERIADOS_FIXOS = [
+    (1, 1, "Confraternização Universal", None),
+    (4, 21, "Tiradentes", None),
+    (5, 1, "Dia do Trabalho", None),
+    (9, 7, "Independência do Brasil", None),
+    (10, 12, "Nossa Senhora Aparecida", None),
+    (11, 2, "Finados", None),
+    (11, 15, "Proclamação da República", None),
+    (11, 20, "Dia da Consciência Negra", 2024),  # Lei 14.759/2023
+    (12, 25, "Natal", None),
+]
+
+# Feriados móveis: (dias em relação ao Domingo de Páscoa, nome)
+FERIADOS_MOVEIS = [
+    (-48, "Carnaval (segunda-feira)"),
+    (-47, "Carnaval (terça-feira)"),
+    (-2, "Sexta-feira Santa"),
+    (60, "Corpus Christi"),
+]
+
+
+def calcular_pascoa(ano):
+    """
+    Domingo de Páscoa no calendário gregoriano (algoritmo de Meeus/Jones/Butcher)
+    """
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+
+    return date(ano, mes, dia + 1)
+
+
+def feriados_nacionais(anos):
+    """
+    Datas dos feriados nacionais (fixos + móveis) dos anos informados
+
+    Args:
+        anos: Iterável de anos (ex: range(2020, 2031))
+
+    Returns:
+        dict: {date: nome do feriado}
+    """
+    feriados = {}
+
+    for ano in anos:
+        for mes, dia, nome, desde in FERIADOS_FIXOS:
+            if desde is None or ano >= desde:
+                feriados[date(ano, mes, dia)] = nome
+
+        pascoa = calcular_pascoa(ano)
+        for deslocamento, nome in FERIADOS_MOVEIS:
+            feriados[pascoa + timedelta(days=deslocamento)] = nome
+
+    return feriados
+
+# =====================================================
+# 2. CLASSE TRANSFORMADORA
+# =====================================================
+
+class TempoTransformer:
+    """
+    Transformador da dim_tempo
+    - Carga completa de um intervalo (main_time.py)
+    - Extensão automática para cobrir as datas dos pedidos (pipeline)
+    """
+
+    def __init__(self):
+        self.engine = obter_engine()
+
+    # =====================================================
+    # 3. GERAR DATAS (VETORIZADO)
+    # =====================================================
+
+    def gerar_datas(self, data_inicio, data_fim):
+        """
+        Gera o DataFrame da dim_tempo para o intervalo, coluna a coluna (sem loop por dia)
+        """
+        datas = pd.Series(pd.date_range(start=data_inicio, end=data_fim, freq="D"))
+        mes = datas.dt.month.to_numpy()
+        dia_semana = datas.dt.dayofweek.to_numpy()
+
+        feriados = feriados_nacionais(range(datas.dt.year.min(), datas.dt.year.max() + 1)) if len(datas) else {}
+
+        return pd.DataFrame({
+            "data_completa": datas.dt.date,
+            "ano": datas.dt.year,
+            "mes": mes,
+            "dia": datas.dt.day,
+            "trimestre": datas.dt.quarter,
+            "semestre": np.where(mes <= 6, 1, 2),
+            "nome_mes": NOMES_MESES[mes],
+            "nome_mes_abrev": NOMES_MESES_ABREV[mes],
+            "dia_semana": dia_semana,
+            "nome_dia_semana": NOMES_DIAS_SEMANA[dia_semana],
+            "nome_dia_semana_abrev": NOMES_DIAS_SEMANA_ABREV[dia_semana],
+            "eh_fim_semana": dia_semana >= 5,  # Sábado=5, Domingo=6
+            "eh_feriado": datas.dt.date.isin(list(feriados)),
+            "semana_ano": datas.dt.isocalendar().week.astype(int).to_numpy(),
+        })
+
+    # =====================================================
+    # 4. CARREGAR NO BANCO
+    # =====================================================
+
+    def carregar(self, df, atualizar_feriados=False, tamanho_lote=1000):
+        """
+        Insere as datas com ON CONFLICT → pode rodar quantas vezes for preciso
+
+        Args:
+            df: DataFrame gerado por gerar_datas
+            atualizar_feriados: Se True, datas já existentes recebem o eh_feriado calculado
+            tamanho_lote: Linhas por INSERT
+
+        Returns:
+            int: Linhas inseridas (ou com feriado atualizado)
+        """
+        from models.dim_fato.dim_tempo import DimTempo
+
+        registros = df.to_dict("records")
+        total = 0
+
+        with self.engine.begin() as conn:
+            for i in range(0, len(registros), tamanho_lote):
+                stmt = insert(DimTempo).values(registros[i:i + tamanho_lote])
+
+                if atualizar_feriados:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["data_completa"],
+                        set_={"eh_feriado": stmt.excluded.eh_feriado},
+                        where=DimTempo.eh_feriado.is_distinct_from(stmt.excluded.eh_feriado),
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=["data_completa"])
+
+                total += conn.execute(stmt).rowcount
+
+        return total
+
+    # =====================================================
+    # 5. CARGA COMPLETA DE UM INTERVALO
+    # =====================================================
+
+    def popular_intervalo(self, data_inicio, data_fim):
+        """
+        Gera e carrega todas as datas do intervalo
+        Datas existentes são mantidas (só o eh_feriado é corrigido)
+        """
+        print(f"\n📅 POPULANDO DIM_TEMPO: {data_inicio} até {data_fim}")
+
+        inicio = datetime.now()
+
+        df = self.gerar_datas(data_inicio, data_fim)
+        print(f"✅ {len(df)} datas geradas ({int(df['eh_feriado'].sum())} feriados)")
+
+        total = self.carregar(df, atualizar_feriados=True)
+        print(f"✅ {total} datas inseridas/atualizadas em {datetime.now() - inicio}")
+
+        return total
+
+    # =====================================================
+    # 6. ESTENDER PARA COBRIR OS PEDIDOS
+    # =====================================================
+
+    def intervalo_necessario(self):
+        """
+        Menor e maior data que a dim_tempo precisa cobrir:
+        datas dos pedidos pendentes em raw.vendas_raw, de fato_pedidos e o dia de hoje
+
+        Returns:
+            tuple: (data_inicio, data_fim)
+        """
+        with self.engine.connect() as conn:
+            data_min, data_max = conn.execute(text("""
+                SELECT MIN(d), MAX(d)
+                FROM (
+                    SELECT processed.try_cast_date(dados_json->>'data') AS d
+                    FROM raw.vendas_raw
+                    WHERE status_processamento = 'pendente'
+                    UNION ALL
+                    SELECT MIN(data_pedido) FROM processed.fato_pedidos
+                    UNION ALL
+                    SELECT MAX(data_pedido) FROM processed.fato_pedidos
+                ) datas
+            """)).one()
+
+        hoje = date.today()
+        return min(data_min or hoje, hoje), max(data_max or hoje, hoje)
+
+    def estender_para_cobrir(self):
+        """
+        Insere apenas as datas que faltam para cobrir o intervalo necessário
+        Seguro para rodar em toda execução do pipeline (antes do fato_pedidos)
+        """
+        print("\n📅 VERIFICANDO COBERTURA DA DIM_TEMPO...")
+
+        data_inicio, data_fim = self.intervalo_necessario()
+
+        with self.engine.connect() as conn:
+            existentes = conn.execute(text("""
+                SELECT COUNT(*) FROM processed.dim_tempo
+                WHERE data_completa BETWEEN :inicio AND :fim
+            """), {"inicio": data_inicio, "fim": data_fim}).scalar()
+
+        necessarias = (data_fim - data_inicio).days + 1
+        if existentes >= necessarias:
+            print(f"✅ dim_tempo já cobre {data_inicio} até {data_fim}")
+            return 0
+
+        with self.engine.connect() as conn:
+            datas_existentes = set(conn.execute(text("""
+                SELECT data_completa FROM processed.dim_tempo
+                WHERE data_completa BETWEEN :inicio AND :fim
+            """), {"inicio": data_inicio, "fim": data_fim}).scalars())
+
+        df = self.gerar_datas(data_inicio, data_fim)
+        df = df[~df["data_completa"].isin(datas_existentes)]
+
+        total = self.carregar(df)
+        print(f"✅ {total} datas adicionadas ({data_inicio} até {data_fim})")
+
+        return total
+
+    # =====================================================
+    # 7. EXECUTAR TRANSFORMAÇÃO COMPLETA
+    # =====================================================
+
+    def executar_transformacao_completa(self):
+        """
+        Usado pelo pipeline: garante que toda data de pedido exista na dim_tempo
+        """
+        return self.estender_para_cobrir()